@@ -21,7 +21,8 @@ def cook(scriptOP):
         if label == 'shoulders_mid':
             lx, ly, lv = get_xyv('left_shoulder'); rx, ry, rv = get_xyv('right_shoulder')
             return ((lx+rx)*0.5, (ly+ry)*0.5, min(lv,rv))
-        x = ch(f'{label}_x'); y = ch(f'{label}_y'); v = ch(f'{label}_z')
+        x = ch(f'{label}_x'); y = ch(f'{label}_y')
+        v = ch(f'{label}_v') if src.channels.get(f'{label}_v') else 1.0
         v = max(0.0, min(1.0, v))
         return (x,y,v)
 
@@ -9,7 +9,10 @@ This extension is designed to be placed on a component that contains:
   - 'Customfiltercsv' (String): Path to a landmark list csv for use when menu is Custom.
   - 'Rebuildmenu' (Pulse): Triggers a rebuild of the menu.
 - A 'switch1' CHOP (to bypass or engage filtering)
-- A 'select1' CHOP (to select landmark channels by name)
+- A 'mask_gather' Script CHOP (scripts/LandmarkSelect_maskChop.py) that copies
+  only the masked landmark channels, by precomputed channel index. Components
+  built before mask_gather existed still work with their 'select1' CHOP: the mask
+  is then pushed to it as exact channel-name patterns (one pattern match per cook).
 - A 'landmark_filter' Table DAT (to hold the list of active landmark names)
 - A 'LandmarkFilterMenu_csv' Table DAT (the menu source, populated from the manifest CSV)
 
@@ -19,17 +22,34 @@ Primary Method: LoadActiveFilter()
 - If the filter is 'all' or empty, it bypasses the filter.
 - Otherwise, it looks up the filter name in the 'LandmarkFilterMenu_csv' DAT to find a CSV file.
 - It loads the landmark names from that CSV into the 'landmark_filter' DAT for inspection.
-- It generates a channel name pattern (e.g., "nose* mouth_left* ...") and
-  configures the 'select1' CHOP to select all matching channels (e.g., p1_nose_x, p1_nose_y).
+- The landmark names become the active mask. The first time 'mask_gather' cooks
+  against a given stream layout, the mask is compiled into an exact index array of
+  the matching channels (e.g., p1_nose_x, p1_nose_y, p1_nose_z, p1_nose_v but not
+  p1_nose_tip_x). Later cooks are a single NumPy gather; the index is only
+  recompiled when the mask or the incoming channel layout changes.
 - It activates the 'switch1' CHOP to use the filtered channel set.
 
+CSV files are read through the shared 'landmark_mask_cache' module (scripts/landmark_mask_cache.py,
+placed in /local/modules), so applying a filter or switching effects does no file I/O once the
+files are cached. When its watcher is running, edited CSVs are pushed back to every registered
+LandmarkSelect through OnMaskFilesChanged().
+
 Integration:
 - An Execute DAT's onStart() should call owner.ext.LandmarkSelectExt.Initialize().
 - A Parameter Execute DAT should monitor 'Landmarkfiltermenu' and 'Rebuildmenu'
   to call LoadActiveFilter() and RebuildMenu() respectively.
 """
 import os
-import csv
+import re
+import fnmatch
+import numpy as np
+
+import landmark_mask_cache
+
+MANIFEST_FILENAME = 'data/landmarkFilterMenu.csv'
+
+# <optional p{pid}_><landmark name>_<axis>; matches pose_fanout and person_select output
+_RE_LANDMARK_CHAN = re.compile(r"^(?:p\d+_)?(?P<name>.+)_[xyzv]$")
 
 class LandmarkSelectExt:
     """
@@ -50,7 +70,10 @@ class LandmarkSelectExt:
 
         # --- Cache references to operators and parameters for performance and clarity ---
         self.switchChop = self.owner.op('switch1')
+        self.maskChop = self.owner.op('mask_gather')
         self.selectChop = self.owner.op('select1')
+        # mask_gather when present, else the legacy select1 path
+        self.filterChop = self.maskChop if self.maskChop is not None else self.selectChop
         self.filter_tableDat = self.owner.op('landmark_filter')
         self.menu_dat = self.owner.op('LandmarkFilterMenu_csv')
 
@@ -61,10 +84,15 @@ class LandmarkSelectExt:
         self.customfiltercsv_par = self._lookup_custom_parameter('Customfiltercsv')
         self.defaultfilter_par = self._lookup_custom_parameter('Defaultfilter')
 
-        print(f"list custom parameters of {self.owner.name}")
-        for p in self.owner.customPars:
-            print(f"{p.name} = {p.eval()}")
-            
+        # Active mask (landmark base names, '*' wildcards allowed) and its compiled form.
+        # _mask_layout is the channel-name tuple the index was compiled against.
+        self._mask_names = []
+        self._mask_index = None
+        self._mask_layout = None
+        self._mask_out_names = []
+        # Absolute path of the mask CSV currently applied (None when pass-through)
+        self._active_csv_path = None
+
         self.is_valid = False
         self._validate_ops()
         
@@ -95,7 +123,7 @@ class LandmarkSelectExt:
         """
         required = [
             ('switch1', self.switchChop),
-            ('select1', self.selectChop),
+            ('mask_gather or select1', self.filterChop),
             ('landmark_filter', self.filter_tableDat),
             ('LandmarkFilterMenu_csv', self.menu_dat),
             ('Landmarkfiltermenu', self.filtermenu_par),
@@ -136,6 +164,7 @@ class LandmarkSelectExt:
         Rebuilds the menu and ensures the initial filter state is loaded correctly.
         """
         debug(f"[{self.owner.name}] Initialize called")
+        landmark_mask_cache.Register(self.owner)
         self.RebuildMenu()
         debug(f"[{self.owner.name}] Initialize complete")
 
@@ -184,13 +213,13 @@ class LandmarkSelectExt:
         if passthrough:
             debug(f"[{self.owner.name}] Setting pass-through mode.")
             if self.switchChop.par.index != 0: self.switchChop.par.index = 0
-            if not self.selectChop.bypass: self.selectChop.bypass = True
+            if not self.filterChop.bypass: self.filterChop.bypass = True
             if self.filter_tableDat.numRows > 1 or self.filter_tableDat.numCols == 0:
                 self.filter_tableDat.clear()
                 self.filter_tableDat.appendRow(['name'])
         else: # Active filtering mode
             debug(f"[{self.owner.name}] Setting active filter mode.")
-            if self.selectChop.bypass: self.selectChop.bypass = False
+            if self.filterChop.bypass: self.filterChop.bypass = False
             if self.switchChop.par.index != 1: self.switchChop.par.index = 1
 
     def _load_filter_internal(self):
@@ -202,11 +231,7 @@ class LandmarkSelectExt:
             debug(f"[{self.owner.name}] LoadActiveFilter not is_valid")
             return 0
 
-        # --- 1. Debug menu contents as requested ---
-        print(f"Filter Menu Parameter '{self.filtermenu_par.name}' contents:")
-        print(f"  - Menu Names: {self.filtermenu_par.menuNames}")
-        print(f"  - Menu Labels: {self.filtermenu_par.menuLabels}")
-        print(f"  - Current Value: {self.filtermenu_par.eval()}")
+        self._active_csv_path = None
 
         # --- 2. Determine the active filter name, using 'Defaultfilter' as an override ---
         default_filter_override = (self.defaultfilter_par.eval() or '').strip().lower()
@@ -241,6 +266,7 @@ class LandmarkSelectExt:
 
         # --- 5. Read the landmark names from the specified CSV ---
         landmark_names = self._read_landmarks_from_csv(csv_filename)
+        self._active_csv_path = self._mask_csv_path(csv_filename)
 
         if landmark_names is None: # Indicates an error during file read
             self._set_pass_through_mode(True, reason=f"Failed to read landmarks from '{csv_filename}'")
@@ -248,24 +274,23 @@ class LandmarkSelectExt:
         
 
         # --- 6. Populate the local 'landmark_filter' Table DAT ---
-        # note the DAT is just for reference. The Select CHOP uses patterns.
+        # note the DAT is just for reference. mask_gather uses the compiled index.
         self.filter_tableDat.clear()
         self.filter_tableDat.appendRow(['name'])
         for name in landmark_names:
             self.filter_tableDat.appendRow([name])
 
-        # --- 7. Configure the 'select1' CHOP with channel patterns ---
-        # A Select CHOP uses channel name patterns, not a DAT reference.
-        # We generate this pattern from the loaded landmark names.
-
-        pattern = ' '.join(landmark_names)
-
-        # a space-separated list of channel names pushed into the select CHOP
-        if self.selectChop.par.channames.eval() != pattern:
-            self.selectChop.par.channames = pattern
-            debug(f"[{self.owner.name}] Updated select CHOP channel names to: {pattern}")   
+        # --- 7. Install the mask; mask_gather compiles it on its next cook ---
+        if self.maskChop is None:
+            self._apply_select_pattern(landmark_names)
+        elif landmark_names != self._mask_names:
+            self._mask_names = landmark_names
+            self._mask_index = None
+            self._mask_layout = None
+            self.maskChop.cook(force=True)
+            debug(f"[{self.owner.name}] Updated mask to: {landmark_names}")
         else:
-            debug(f"[{self.owner.name}] Select CHOP channel names unchanged")
+            debug(f"[{self.owner.name}] Mask unchanged")
 
         # --- 8. Activate the filter path in the CHOP network ---
         self._set_pass_through_mode(False, reason=f"Successfully Loaded filter '{filter_name}'")
@@ -285,36 +310,28 @@ class LandmarkSelectExt:
             return 0
 
         # The path is now fixed to 'data/landmarkFilterMenu.csv'.
-        manifest_filename = 'data/landmarkFilterMenu.csv'
-        csv_path = os.path.normpath(os.path.join(project.folder, manifest_filename))
-
-        # Clear the menu DAT to ensure a clean state, but add a header for clarity on failure.
-        self.menu_dat.clear()
-        self.menu_dat.appendRow(['key', 'label', 'csv'])
-
-        if not os.path.isfile(csv_path):
-            debug(f"ERROR: Menu manifest CSV not found: {csv_path}")
-            return 0
+        csv_path = self._manifest_path()
 
-        try:
-            with open(csv_path, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                # Clear the DAT again to remove the placeholder header before populating.
-                self.menu_dat.clear()
-                for row in reader:
-                    self.menu_dat.appendRow(row)
-            debug(f"[{self.owner.name}] Rebuilt menu from {csv_path} with {self.menu_dat.numRows} entries.")
-
-            # After loading, check for a 'custom' entry and update the parameter.
-            self._update_custom_csv_par_from_menu()
-
-        except Exception as e:
-            debug(f"ERROR: Failed to read or parse menu manifest CSV {csv_path}: {e}")
+        # Parsed rows come from the shared cache; only the first call per file edit reads disk.
+        rows = landmark_mask_cache.GetRows(csv_path)
+        if rows is None:
+            debug(f"ERROR: Menu manifest CSV not found or unreadable: {csv_path}")
             # Ensure menu is in a safe, empty state with a header.
             self.menu_dat.clear()
             self.menu_dat.appendRow(['key', 'label', 'csv'])
             return 0
 
+        # Only rewrite the DAT when the contents differ, to avoid needless recooks.
+        current = [[c.val for c in r] for r in self.menu_dat.rows()]
+        if current != rows:
+            self.menu_dat.clear()
+            for row in rows:
+                self.menu_dat.appendRow(row)
+            debug(f"[{self.owner.name}] Rebuilt menu from {csv_path} with {self.menu_dat.numRows} entries.")
+
+        # After loading, check for a 'custom' entry and update the parameter.
+        self._update_custom_csv_par_from_menu()
+
         # After rebuilding, reload the current filter to ensure consistency.
         v = self.LoadActiveFilter()
         return 1
@@ -354,60 +371,132 @@ class LandmarkSelectExt:
         debug(f"Lookup CSV for filter {filter_name} not found")
         return None
 
+    # ===== Mask compile / gather ==============================================
+    def CompileMaskIndex(self, chan_names):
+        """
+        Compile the active mask into channel indices for the given stream layout.
+
+        A channel is kept when its landmark base name (channel name without the
+        optional 'p{pid}_' prefix and the '_x'/'_y'/'_z'/'_v' suffix) equals a mask
+        entry exactly, or matches it when the entry contains a '*' wildcard.
+        Source channel order is preserved.
+
+        Args:
+            chan_names (tuple[str]): Channel names of the incoming CHOP.
+
+        Returns:
+            numpy.ndarray: int32 indices into chan_names.
+        """
+        exact = {n for n in self._mask_names if '*' not in n}
+        wild = [n for n in self._mask_names if '*' in n]
+        keep = []
+        for i, cname in enumerate(chan_names):
+            m = _RE_LANDMARK_CHAN.match(cname)
+            if not m:
+                continue
+            base = m.group('name')
+            if base in exact or any(fnmatch.fnmatchcase(base, w) for w in wild):
+                keep.append(i)
+        self._mask_index = np.array(keep, dtype=np.int32)
+        self._mask_layout = chan_names
+        self._mask_out_names = [chan_names[i] for i in keep]
+        debug(f"[{self.owner.name}] Compiled mask: {len(keep)} of {len(chan_names)} channels")
+        return self._mask_index
+
+    def _apply_select_pattern(self, landmark_names):
+        """
+        Legacy path for components without 'mask_gather': push the mask into the
+        'select1' CHOP as exact patterns ('p*_nose_?' and 'nose_?' per entry), so
+        'nose' still does not catch 'nose_tip_x'.
+        """
+        self._mask_names = landmark_names
+        pattern = ' '.join(f"p*_{n}_? {n}_?" for n in landmark_names)
+        if self.selectChop.par.channames.eval() != pattern:
+            self.selectChop.par.channames = pattern
+            debug(f"[{self.owner.name}] Updated select CHOP channel names to: {pattern}")
+        else:
+            debug(f"[{self.owner.name}] Select CHOP channel names unchanged")
+
+    def GatherMasked(self, scriptOp, src):
+        """
+        onCook body for the 'mask_gather' Script CHOP.
+
+        Recompiles the index only when the mask or the source layout changed,
+        otherwise copies the masked channels with one NumPy fancy-index.
+        """
+        if src is None or src.numChans == 0 or not self._mask_names:
+            scriptOp.clear()
+            self._mask_layout = None
+            return
+
+        chan_names = tuple(c.name for c in src.chans())
+        rebuild = self._mask_index is None or chan_names != self._mask_layout
+        if rebuild:
+            self.CompileMaskIndex(chan_names)
+
+        scriptOp.numSamples = src.numSamples
+        scriptOp.rate = src.rate
+        scriptOp.start = src.start
+        if rebuild or scriptOp.numChans != len(self._mask_out_names):
+            scriptOp.clear()
+            if self._mask_out_names:
+                scriptOp.appendChan(self._mask_out_names)
+
+        if len(self._mask_index) == 0:
+            return
+        data = src.numpyArray()[self._mask_index]
+        for i, row in enumerate(data):
+            scriptOp.chan(i).vals = row
+
+    def OnMaskFilesChanged(self, paths):
+        """
+        Called by landmark_mask_cache.Poll() when watched CSVs changed on disk.
+        Rebuilds the menu if the manifest changed, else reloads the active mask
+        if its file is among the changed paths.
+        """
+        paths = {os.path.normpath(p) for p in paths}
+        if self._manifest_path() in paths:
+            debug(f"[{self.owner.name}] Menu manifest changed on disk")
+            self.RebuildMenu()
+        elif self._active_csv_path in paths:
+            debug(f"[{self.owner.name}] Active mask changed on disk")
+            self.LoadActiveFilter()
+
+    def _manifest_path(self):
+        return os.path.normpath(os.path.join(project.folder, MANIFEST_FILENAME))
+
+    def _mask_csv_path(self, csv_filename):
+        """Mask CSVs live in the project's /data folder unless a 'data/' prefix is given."""
+        if csv_filename.startswith(('data/', 'data\\')):
+            return os.path.normpath(os.path.join(project.folder, csv_filename))
+        return os.path.normpath(os.path.join(project.folder, 'data', csv_filename))
+
     def _read_landmarks_from_csv(self, csv_filename):
         """
-        Reads landmark names from a CSV file and prepares them as channel patterns.
+        Reads landmark names from a CSV file for use as the active mask.
 
         The method performs the following steps:
         1. Constructs a full path to the CSV, assuming it's in the project's /data
            folder unless a 'data/' prefix is already present.
-        2. Reads all rows from the CSV.
+        2. Gets the parsed rows from landmark_mask_cache (re-read only if the
+           file changed since it was last parsed).
         3. Intelligently skips a header row if the first cell contains 'key', 'name',
            or 'landmark' (case-insensitive).
         4. Extracts the first column from the remaining rows.
-        5. Converts each landmark name into a wildcard pattern by appending a '*'
-           (e.g., 'nose' becomes 'nose*'). This allows the Select CHOP to match
-           all related channels like 'p1_nose_x', 'p1_nose_y', etc.
+        5. Names are used as exact landmark base names; an entry may still carry
+           a '*' wildcard (e.g., 'ear*') to match several landmarks.
 
         Args:
             csv_filename (str): The name of the CSV file to read.
 
         Returns:
-            list[str] or None: A list of landmark channel patterns, or None if the
+            list[str] or None: A list of landmark names, or None if the
                                file cannot be read.
         """
-        # If the filename already includes the 'data/' prefix, use it directly
-        # relative to the project folder. Otherwise, prepend 'data/'.
-        if csv_filename.startswith(('data/', 'data\\')):
-            csv_path = os.path.normpath(os.path.join(project.folder, csv_filename))
-        else:
-            csv_path = os.path.normpath(os.path.join(project.folder, 'data', csv_filename))
-            
-        if not os.path.isfile(csv_path):
-            debug(f"ERROR: Landmark CSV file not found: {csv_path}")
+        csv_path = self._mask_csv_path(csv_filename)
+        names = landmark_mask_cache.GetMask(csv_path)
+        if names is None:
+            debug(f"ERROR: Landmark CSV file not found or unreadable: {csv_path}")
             return None
-
-        try:
-            with open(csv_path, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                # Read all non-empty rows from the CSV
-                all_rows = [row for row in reader if row and row[0].strip()]
-                if not all_rows:
-                    return [] # Handle empty or effectively empty files
-
-                # Check if the first row is a header and should be skipped
-                first_cell = all_rows[0][0].strip().lower()
-                if first_cell in ('key', 'name', 'landmark'):
-                    data_rows = all_rows[1:]
-                else:
-                    data_rows = all_rows
-                
-                # Extract the first column from the data rows
-                rowData = [row[0].strip() for row in data_rows]
-                # Ensure each landmark name is a pattern ending with a wildcard '*'
-                # This is idempotent; it won't add a '*' if one already exists.
-                patterns = [name if name.endswith('*') else f'{name}*' for name in rowData]
-                return patterns
-        except Exception as e:
-            debug(f"ERROR: Failed to read or parse landmark CSV {csv_path}: {e}")
-            return None
\ No newline at end of file
+        # copy so the cached list is never mutated through the mask
+        return list(names)
\ No newline at end of file
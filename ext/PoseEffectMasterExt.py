@@ -41,13 +41,13 @@ class PoseEffectMasterExt:
             self.ApplyFilter()
 
     def ApplyFilter(self):
-        """Ask the child landmarkSelect to rebuild its Select CHOP pattern."""
+        """Ask the child landmarkSelect to reload its mask (served from landmark_mask_cache, no file I/O)."""
         debug("PoseEffect Ext ApplyFilter called" )
         #ls = self.owner.op('landmarkselect')
         landmarkSelectOp = self.owner.op('landmarkSelect')
         if landmarkSelectOp and hasattr(landmarkSelectOp.ext, 'LandmarkSelectExt'):
-            debug("PoseEffectMasterExt tell my landmarkSelect to Rebuild()")
-            landmarkSelectOp.ext.LandmarkSelectExt.Rebuild()
+            debug("PoseEffectMasterExt tell my landmarkSelect to LoadActiveFilter()")
+            landmarkSelectOp.ext.LandmarkSelectExt.LoadActiveFilter()
         else:
             debug(f"ERROR LandmarkSelect not found or missing ext: {landmarkSelectOp}")
 
@@ -13,23 +13,58 @@
 #       - fx.allowCooking  = True for active, False for others
 #       - fxCore.bypass    = False for active, True for others
 #       - fx.ext.PoseEffectMasterExt.SetActive(active)
+#   • Keep a cached effect registry (ordered list, name -> index, name -> label)
+#     shared by the switch paths and /ShowControlIO/osc_router. It is rebuilt
+#     only when effects/ children are added, removed or renamed
+#     (see scripts/poseEfxSwitch_effectsExec.py) or on RebuildEffectsMenu.
+#   • Optional preroll/crossfade switching: the incoming effect starts cooking
+#     Prerollframes before the cut, then the output crossfades over
+#     Crossfadeframes; only then is the outgoing effect gated off. Inactive
+#     effects are cooked once at startup (Warmeffects) so their caches are hot.
+#   • Parameter presets: SavePreset snapshots every exposed fxCore parameter
+#     (fx_schema.ExposedNames) of an effect into the 'Presets' store on this COMP.
+#     RecallPreset writes them back in one pass (only values that differ), and
+#     MorphPreset interpolates all numeric values as one numpy vector per frame
+#     over N seconds (ints/toggles rounded, menus/strings switch at the halfway
+#     point). osc_router exposes them as /pose2art/preset/*.
+#   • Pose-driven modulation: each frame the active effect's mod_matrix table
+#     (source channel -> fxCore par, curve, ranges) is evaluated by mod_matrix.
+#     Pars of a running preset morph are held out of the matrix until it ends.
 # 
 # Expected nodes inside PoseEfxSwitch:
 #   - effects/                (Base COMP container for PoseEffect_* children)
-#   - out_switch              (Switch TOP)
+#   - out_switch              (Switch TOP)  ← incoming / active effect
+#   - out_prev                (Switch TOP, optional) ← outgoing effect during a fade
+#   - out_xfade               (Cross TOP, optional)  ← input0 = out_prev, input1 = out_switch;
+#                                                      use this as the output when fading
 #
 # UI parameters on PoseEfxSwitch (Customize Component…):
 #   - ActiveEffect       (Menu)     ← user-facing effect picker (values = OP names)
 #   - Activeindex        (Int)      ← internal index (hide if you like)
 #   - RebuildEffectsMenu (Pulse)    ← manual refresh
+#   - Preroll            (Toggle)   ← optional, off = hard cut (previous behavior)
+#   - Prerollframes      (Int)      ← frames the next effect cooks before the cut
+#   - Crossfadeframes    (Int)      ← fade length; needs out_prev + out_xfade
+#   - Warmeffects        (Toggle)   ← optional, default on: cook every effect once at start
 #
 # Initialization:
 #   - Put an Execute DAT *inside* PoseEfxSwitch with:
 #       def onStart(): op('.').ext.PoseEfxSwitchExt.Initialize()
+#       def onFrameStart(frame): op('.').ext.PoseEfxSwitchExt.OnFrameStart(frame)
+#     (OnFrameStart also advances preset morphs)
+#   - Put an OP Execute DAT watching ./effects (scripts/poseEfxSwitch_effectsExec.py)
+#     so child add/remove/rename invalidates the registry.
 # -----------------------------------------------------------------------------
 
 import os, csv, glob
 
+import numpy as np
+
+import fx_schema
+import mod_matrix
+
+PRESET_STORE = 'Presets'   # {effect OP name: {preset name: {'names', 'values', 'text'}}}
+
 class PoseEfxSwitchExt:
     """
     Manages the selection and activation of child "PoseEffect" components.
@@ -47,12 +82,24 @@ class PoseEfxSwitchExt:
         self._syncing = False  # Re-entrancy guard to prevent parameter feedback loops.
         # _mask_dispatch is a placeholder for future mask management logic.
         self._mask_dispatch = {}   # NEW: key -> absolute csv path
+        # Effect registry cache: {'list': [fx...], 'index': {name: i}, 'labels': {name: label}}
+        self._registry = None
+        # Effect currently allowed to cook; lets a switch touch only the outgoing and
+        # incoming effects. None forces a full gating pass over all effects.
+        self._active_fx = None
+        self._active_idx = None
+        # In-flight preroll/crossfade: {'from', 'from_idx', 'to', 'to_idx', 'preroll', 'fade', 'frame'}
+        self._transition = None
+        # In-flight preset morph: {'fx', 'pars', 'a', 'b', 'names', 'isint', 'last', 'text', 't0', 'dur'}
+        self._morph = None
 
     # ===== Lifecycle ==========================================================
     def Initialize(self):
         """Called by the embedded Execute DAT on project start."""
         debug("Initialize PoseEfxSwitchExt")
-        
+
+        # parameter schemas first: UI, OSC routes and presets read what they generate
+        fx_schema.GenerateAll(self.owner.op('effects'))
         self.BuildEffectsMenu()
 
         # Set initial active effect: keep current if valid, else use the first effect.
@@ -65,6 +112,28 @@ class PoseEfxSwitchExt:
         else:
             self.SetActiveIndex(0)
 
+        if bool(self._parVal('Warmeffects', True)):
+            self.WarmEffects()
+
+    def WarmEffects(self):
+        """
+        Cook every inactive effect once (and load its landmark filter) so the first
+        real activation does not cold-cook, then gate it off again.
+        """
+        debug("WarmEffects PoseEfxSwitchExt")
+        for fx in self._effects():
+            if fx is self._active_fx:
+                continue
+            fx.allowCooking = True
+            try:
+                if hasattr(fx.ext, 'PoseEffectMasterExt'):
+                    fx.ext.PoseEffectMasterExt.ApplyFilter()
+                fx.cook(force=True, recurse=True)
+            except Exception as e:
+                debug(f"WarmEffects {fx.name} error: {e}")
+            finally:
+                fx.allowCooking = False
+
     # ===== Effect menu (ActiveEffect) =========================================
     def BuildEffectsMenu(self):
         """
@@ -73,12 +142,11 @@ class PoseEfxSwitchExt:
         else derived from OP name ("PoseEffect_Dots2" -> "Dots 2").
         """
         debug("BuildEffectsMenu PoseEfxSwitchExt")
-        keys, labels = [], []
-        for fx in self._effects():
-            key = fx.name  # OP name is the stable key
-            lab = self._label_for_effect(fx)
-            keys.append(key)
-            labels.append(lab)
+        # Manual rebuild also refreshes labels (UiDisplayName may have been edited).
+        self.InvalidateEffects()
+        reg = self._reg()
+        keys = [fx.name for fx in reg['list']]  # OP name is the stable key
+        labels = [reg['labels'][k] for k in keys]
 
         # Stamp the UI menu
         self.owner.par.Activeeffect.menuNames  = keys
@@ -181,30 +249,284 @@ class PoseEfxSwitchExt:
         Activate exactly one PoseEffect_* and route out_switch to that index.
         """
         debug("SetActiveIndex PoseEfxSwitchExt", idx)
-        # Route output switch
-        sw = self.owner.op('out_switch')
-        if sw:
-            sw.par.index = int(idx)
+        idx = int(idx)
+        # A new request while fading: land the current transition first.
+        if self._transition:
+            self._finishTransition()
+
+        new_fx = self._effectAtIndex(idx)
+        prev_fx = self._active_fx
+        preroll, fade = 0, 0
+        if bool(self._parVal('Preroll', False)):
+            preroll = max(0, int(self._parVal('Prerollframes', 0)))
+            if self._canFade():
+                fade = max(0, int(self._parVal('Crossfadeframes', 0)))
+
+        if (new_fx is not None and prev_fx is not None and prev_fx.valid
+                and prev_fx is not new_fx and (preroll or fade)):
+            # Start cooking the incoming effect now (this also runs its ApplyFilter);
+            # the output stays on the outgoing effect until the preroll elapses.
+            self._gate(new_fx, True)
+            self._transition = {'from': prev_fx, 'from_idx': self._active_idx,
+                                'to': new_fx, 'to_idx': idx,
+                                'preroll': preroll, 'fade': fade, 'frame': 0}
+            self._active_fx, self._active_idx = new_fx, idx
+            if preroll == 0:
+                self._route(idx, self._transition['from_idx'], 0.0)
+            return
+
+        # Hard cut: route output switch
+        self._route(idx)
 
         # Gate cooking and notify each effect of its active state.
         # This ensures only the active effect consumes resources, and allows
         # the effect to run its own activation logic via its SetActive method.
-        for i, fx in enumerate(self._effects()):
-            is_active = (i == int(idx))
-            fx.allowCooking = is_active
-            if hasattr(fx.ext, 'PoseEffectMasterExt'):
-                fx.ext.PoseEffectMasterExt.SetActive(is_active)
+        # After the first full pass only the outgoing and incoming effects change.
+        if prev_fx is None or not prev_fx.valid:
+            for fx in self._effects():
+                self._gate(fx, fx is new_fx)
+        else:
+            if prev_fx is not new_fx:
+                self._gate(prev_fx, False)
+            if new_fx is not None:
+                self._gate(new_fx, True)
+        self._active_fx, self._active_idx = new_fx, idx
+
+    def OnFrameStart(self, frame):
+        """
+        Advance an in-flight preroll/crossfade and preset morph, then run the active
+        effect's modulation matrix (mod_matrix); cheap no-op otherwise.
+        """
+        hold = None
+        if self._morph:
+            if self._morph['fx'] is self._active_fx:
+                hold = self._morph['names']
+            self._stepMorph()
+        if self._active_fx is not None and self._active_fx.valid:
+            mod_matrix.Evaluate(self._active_fx, hold)
+        t = self._transition
+        if not t:
+            return
+        t['frame'] += 1
+        f = t['frame'] - t['preroll']
+        if f < 0:
+            return  # still prerolling: incoming effect cooks, output unchanged
+        if t['fade'] and f < t['fade']:
+            self._route(t['to_idx'], t['from_idx'], f / float(t['fade']))
+            return
+        self._finishTransition()
+
+    def _finishTransition(self):
+        """Show the incoming effect fully and gate the outgoing one off."""
+        t, self._transition = self._transition, None
+        if not t:
+            return
+        self._route(t['to_idx'])
+        if t['from'] is not None and t['from'].valid and t['from'] is not t['to']:
+            self._gate(t['from'], False)
+
+    def _canFade(self):
+        return self.owner.op('out_prev') is not None and self.owner.op('out_xfade') is not None
+
+    def _route(self, idx, from_idx=None, cross=1.0):
+        """
+        Point out_switch at idx. When fading, out_prev holds from_idx and out_xfade
+        blends toward out_switch; at rest out_prev mirrors out_switch so the
+        unused input is the same (already cooked) TOP.
+        """
+        sw = self.owner.op('out_switch')
+        if sw:
+            sw.par.index = int(idx)
+        prev = self.owner.op('out_prev')
+        xf = self.owner.op('out_xfade')
+        if prev and xf:
+            prev.par.index = int(idx if from_idx is None else from_idx)
+            xf.par.cross = float(cross)
+
+    def _parVal(self, name, default):
+        p = getattr(self.owner.par, name, None)
+        return p.eval() if p is not None else default
+
+    def _gate(self, fx, is_active):
+        fx.allowCooking = is_active
+        if hasattr(fx.ext, 'PoseEffectMasterExt'):
+            fx.ext.PoseEffectMasterExt.SetActive(is_active)
+
+    # ===== Presets =============================================================
+    def SavePreset(self, name: str, fx=None):
+        """Snapshot all exposed fxCore parameters of fx (default: active effect)."""
+        fx = fx or self._active_fx
+        pars = self._presetPars(fx)
+        if not name or pars is None:
+            return None
+        names, values, text = [], [], {}
+        for p in pars:
+            # toggles go in the numeric vector too, so a morph snaps them (rounded)
+            if p.isNumber or p.isToggle:
+                names.append(p.name)
+                values.append(float(p.eval()))
+            else:
+                text[p.name] = str(p.eval())
+        entry = {'names': names, 'values': values, 'text': text}
+        store = self._presets()
+        store.setdefault(fx.name, {})[name] = entry
+        self.owner.store(PRESET_STORE, store)
+        debug(f"SavePreset {fx.name}/{name}: {len(names)} numeric, {len(text)} text")
+        return entry
+
+    def DeletePreset(self, name: str, fx=None):
+        fx = fx or self._active_fx
+        store = self._presets()
+        if fx is None or store.get(fx.name, {}).pop(name, None) is None:
+            return False
+        self.owner.store(PRESET_STORE, store)
+        return True
+
+    def PresetNames(self, fx=None):
+        fx = fx or self._active_fx
+        return sorted(self._presets().get(fx.name, {})) if fx is not None else []
+
+    def RecallPreset(self, name: str, seconds=0.0, fx=None):
+        """Apply a preset now (one batched write) or morph to it over `seconds`."""
+        if seconds and float(seconds) > 0:
+            return self.MorphPreset(None, name, seconds, fx)
+        fx = fx or self._active_fx
+        m = self._morphSetup(fx, None, name)
+        if m is None:
+            return False
+        self._morph = None
+        self._writeVector(m['pars'], m['b'], m['isint'], None)
+        self._writeText(m['text'])
+        return True
+
+    def MorphPreset(self, from_name, to_name: str, seconds, fx=None):
+        """
+        Morph from preset `from_name` (None = current values) to `to_name` over
+        `seconds`, advanced by OnFrameStart. Replaces any morph in flight.
+        """
+        fx = fx or self._active_fx
+        m = self._morphSetup(fx, from_name, to_name)
+        if m is None:
+            return False
+        m['t0'] = absTime.seconds
+        m['dur'] = max(1e-3, float(seconds))
+        self._morph = m
+        return True
+
+    def _presets(self):
+        return self.owner.fetch(PRESET_STORE, {}, search=False)
+
+    def _presetPars(self, fx):
+        core = fx.op('fxCore') if fx is not None else None
+        if core is None:
+            return None
+        return [getattr(core.par, n) for n in fx_schema.ExposedNames(core)]
+
+    def _morphSetup(self, fx, from_name, to_name):
+        """Resolve pars once and build the start/end vectors for a recall or morph."""
+        presets = self._presets().get(fx.name, {}) if fx is not None else {}
+        to = presets.get(to_name)
+        if to is None:
+            debug(f"PoseEfxSwitchExt: no preset {to_name!r} for {fx.name if fx else None}")
+            return None
+        core = fx.op('fxCore')
+        pars, b = [], []
+        for n, v in zip(to['names'], to['values']):
+            p = getattr(core.par, n, None)
+            if p is not None:
+                pars.append(p)
+                b.append(v)
+        cur = np.array([float(p.eval()) for p in pars], dtype=np.float64)
+        a = cur.copy()
+        frm = presets.get(from_name) if from_name else None
+        if frm is not None:
+            idx = {n: i for i, n in enumerate(frm['names'])}
+            for i, p in enumerate(pars):
+                j = idx.get(p.name)
+                if j is not None:
+                    a[i] = frm['values'][j]
+        text = [(getattr(core.par, n), v) for n, v in to['text'].items()
+                if getattr(core.par, n, None) is not None]
+        return {'fx': fx, 'pars': pars, 'a': a, 'b': np.array(b, dtype=np.float64),
+                'names': {p.name for p in pars} | {p.name for p, _ in text},
+                'isint': np.array([p.isInt or p.isToggle for p in pars], dtype=bool),
+                'last': cur, 'text': text}
+
+    def _stepMorph(self):
+        m = self._morph
+        if not m['fx'].valid:
+            self._morph = None
+            return
+        t = min(1.0, max(0.0, (absTime.seconds - m['t0']) / m['dur']))
+        w = t * t * (3.0 - 2.0 * t)     # smoothstep
+        v = m['a'] + (m['b'] - m['a']) * w
+        m['last'] = self._writeVector(m['pars'], v, m['isint'], m['last'])
+        if m['text'] and t >= 0.5:
+            self._writeText(m['text'])
+            m['text'] = None
+        if t >= 1.0:
+            self._morph = None
+
+    def _writeVector(self, pars, v, isint, last):
+        """Write only the components that changed since `last` (None = compare to par)."""
+        v = np.where(isint, np.rint(v), v)
+        if last is None:
+            changed = range(len(pars))
+        else:
+            changed = np.flatnonzero(v != last)
+        for i in changed:
+            p = pars[i]
+            val = int(v[i]) if isint[i] else float(v[i])
+            if p.valid and p.eval() != val:
+                p.val = val
+        return v
+
+    def _writeText(self, text):
+        for p, val in text:
+            if p.valid and str(p.eval()) != val:
+                p.val = val
+
+    # ===== Effect registry =====================================================
+    def InvalidateEffects(self):
+        """Drop the cached registry; called when effects/ children change."""
+        self._registry = None
+        if self._transition:
+            self._finishTransition()
+        self._active_fx = None
+
+    def Effects(self):
+        """Ordered list of PoseEffect_* COMPs (cached)."""
+        return self._reg()['list']
+
+    def EffectLabel(self, name: str):
+        """Menu label for an effect OP name, or None if unknown."""
+        return self._reg()['labels'].get(name)
+
+    def IndexOf(self, name: str):
+        """Index of an effect OP name, or None if unknown."""
+        return self._indexForOpName(name)
+
+    def _reg(self):
+        if self._registry is None:
+            eff = self.owner.op('effects')
+            lst = []
+            if eff:
+                lst = [c for c in eff.children if c.isCOMP and c.name.startswith('PoseEffect_')]
+            self._registry = {
+                'list': lst,
+                'index': {fx.name: i for i, fx in enumerate(lst)},
+                'labels': {fx.name: self._label_for_effect(fx) for fx in lst},
+            }
+            debug(f"PoseEfxSwitchExt registry rebuilt: {len(lst)} effects")
+        return self._registry
 
 
     # ===== Helpers =============================================================
   
 
     def _effects(self):
-        """Return all PoseEffect_* COMPs under ./effects."""
-        eff = self.owner.op('effects')
-        if not eff:
-            return []
-        return [c for c in eff.children if c.isCOMP and c.name.startswith('PoseEffect_')]
+        """Return all PoseEffect_* COMPs under ./effects (from the registry)."""
+        return self._reg()['list']
 
     def _menuKeys(self):
         """Return menu values (OP names)."""
@@ -213,12 +535,14 @@ class PoseEfxSwitchExt:
     def _effectAtIndex(self, idx: int):
         effs = self._effects()
         if 0 <= idx < len(effs):
-            return effs[idx]
+            fx = effs[idx]
+            if fx.valid:
+                return fx
+            # deleted without the OP Execute DAT noticing; rebuild once
+            self.InvalidateEffects()
+            effs = self._effects()
+            return effs[idx] if 0 <= idx < len(effs) else None
         return None
 
     def _indexForOpName(self, name: str):
-        effs = self._effects()
-        for i, fx in enumerate(effs):
-            if fx.name == name:
-                return i
-        return None
+        return self._reg()['index'].get(name)
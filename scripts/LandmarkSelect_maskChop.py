@@ -0,0 +1,12 @@
+"""
+LandmarkSelect_maskChop.py
+
+Callbacks for the 'mask_gather' Script CHOP inside the LandmarkSelect component.
+Input 0 is the full landmark stream. The channel selection itself lives in
+LandmarkSelectExt, which keeps the mask compiled to a channel index array.
+"""
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    parent().ext.LandmarkSelectExt.GatherMasked(scriptOp, src)
+    return
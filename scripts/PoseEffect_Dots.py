@@ -2,11 +2,18 @@
 # Script CHOP for PoseEffect_Dots / fxCore
 # or it was.  no longer used. went for simpler implementation
 #
-# Input 0: single-person skeleton CHOP with channels like "<name>_x", "<name>_y" in UV [0..1]
+# Input 0: single-person skeleton CHOP with channels like "<name>_x", "<name>_y" in
+#          stage space (stage_xform output via PersonRouter); used as-is for tx/ty
+#          (optional "<name>_v" visibility; dots at or below VIS_MIN are culled)
+#          or a canvas_<name> CHOP (canvas_map_chop) carrying m_canvas_w / m_canvas_h
+# DotSize is in camera pixels and scaled by stage_px (stage units per pixel); on a
+# canvas input it is in canvas pixels (1 / m_canvas_h stage units each).
 # Optional meta sources (priority):
-#   1) inMeta Table DAT inside fxCore: rows: image_width|value, image_height|value, aspect|value
+#   1) inMeta Table DAT inside fxCore: rows: stage_px|value (guard_meta), image_width|value,
+#      image_height|value
 #   2) Input 1 CHOP with channels image_width, image_height
 #   3) CanvasW / CanvasH custom parameters on fxCore
+# Without stage_px the default stage space is assumed (1 / image_height per pixel).
 #
 # Visual params (fxCore custom parameters; 'Ui' prefix is fine too):
 #   - ColorType  (menu: 'solid' | 'random')    # also accepts ColorMode ('Fixed'|'RandomPerLandmark')
@@ -14,11 +21,12 @@
 #   - DotSize    (float, pixels)
 # Optional extras supported if present:
 #   - Opacity (float 0..1)   # if not present, alpha comes from Color[3] or defaults to 1
-#   - Origin  (menu UV_0_1 | NDC_-1_1), default UV_0_1
 #   - CanvasW / CanvasH (ints) used as fallback if meta missing
 
 import hashlib
 
+VIS_MIN = 0.5
+
 # ---------- helpers ----------
 
 def _fx():
@@ -65,6 +73,17 @@ def _meta_from_inMeta(row_name, fallback):
     except Exception:
         return int(fallback)
 
+def _meta_float(row_name):
+    """Float value of a row in the local inMeta Table DAT, or None."""
+    meta = op('inMeta')
+    if not meta or not meta.isDAT:
+        return None
+    cell = meta[row_name, 'value']
+    try:
+        return float(cell.val) if cell else None
+    except ValueError:
+        return None
+
 def _meta_from_input_chop(chop_input, chan_name, fallback):
     try:
         if chop_input:
@@ -91,10 +110,6 @@ def _image_dims(scriptOP):
     # 3) final guard
     return max(1, int(w)), max(1, int(h))
 
-def _uv_to_ndc(x, y):
-    """UV [0..1] → NDC [-1..1], Y up."""
-    return (x * 2.0 - 1.0, (1.0 - y) * 2.0 - 1.0)
-
 def _hash_color(name):
     """Deterministic pastel color per landmark base name."""
     h = hashlib.md5(name.encode('utf8')).digest()
@@ -114,11 +129,11 @@ def cook(scriptOP):
     if not skel or skel.numChans == 0:
         return
 
-    # Meta dims (from inMeta DAT / input1 CHOP / CanvasW,H)
-    img_w, img_h = _image_dims(scriptOP)
-
-    # Origin handling
-    origin = str(_eval_par_value('Origin', 'UV_0_1') or 'UV_0_1').upper()
+    # Stage units per pixel: canvas input, else guard_meta, else the default stage space
+    canvas_h = skel.chan('m_canvas_h')
+    stage_px = 1.0 / canvas_h[0] if canvas_h is not None and canvas_h[0] > 0 else _meta_float('stage_px')
+    if not stage_px or stage_px <= 0:
+        stage_px = 1.0 / _image_dims(scriptOP)[1]
 
     # Visual params (read both new + legacy names)
     color_type = str(_eval_par_value('ColorType', None) or _eval_par_value('ColorMode', 'solid')).strip().lower()
@@ -143,6 +158,9 @@ def cook(scriptOP):
             if skel.chan(base + '_y') is not None:
                 names.append(base)
     names.sort()
+    # cull invisible landmarks before instancing
+    vis = [skel.chan(base + '_v') for base in names]
+    names = [base for base, v in zip(names, vis) if v is None or v[0] > VIS_MIN]
     n = len(names)
     if n == 0:
         return
@@ -157,9 +175,7 @@ def cook(scriptOP):
     bc = scriptOP.appendChan('b')
     ac = scriptOP.appendChan('a')
 
-    # Pixel→NDC scale (ortho camera width=2)
-    pixel_to_ndc = 2.0 / float(max(1, img_h))
-    inst_scale   = float(dot_size) * pixel_to_ndc
+    inst_scale = float(dot_size) * stage_px
 
     # Unpack base color
     if isinstance(base_color, (tuple, list)):
@@ -170,16 +186,13 @@ def cook(scriptOP):
     else:
         br, bg, bb, ba = 1.0, 1.0, 1.0, opacity
 
+    # Positions are already in stage space
+    tx.vals = [skel[base + '_x'][0] for base in names]
+    ty.vals = [skel[base + '_y'][0] for base in names]
+
     # Emit per landmark
     for i, base in enumerate(names):
-        x = skel[base + '_x'][0] if skel.chan(base + '_x') else 0.5
-        y = skel[base + '_y'][0] if skel.chan(base + '_y') else 0.5
-        if origin.startswith('UV'):
-            X, Y = _uv_to_ndc(float(x), float(y))
-        else:
-            X, Y = float(x), float(y)
-
-        tx[i], ty[i], sc[i] = X, Y, inst_scale
+        sc[i] = inst_scale
 
         if color_type == 'random':
             r, g, b = _hash_color(base)
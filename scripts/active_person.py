@@ -1,32 +1,78 @@
 # td/scripts/active_person.py
-# Choose the active person based on Personmode and available p*_present channels.
+# Choose the active person once per frame with person_selector (bbox size, centre
+# distance, confidence, time on stage) instead of on every p*_present change.
+# Wiring: an Execute DAT (Frame Start on, File = td/scripts/active_person.py) inside
+# PersonRouter next to 'in1' / 'present_sel' / 'active_pid'. Older networks drive
+# this file from a CHOP Execute DAT on present_sel; its onValueChange is now a no-op,
+# so add the Execute DAT (the CHOP Execute can stay or go).
+#
+# Router parameters (all optional):
+#   Personmode     Specific | Closest | Highestscore
+#   Personid       wanted pid for Specific
+#   Switchmargin   score lead a challenger needs (0..1, default 0.1)
+#   Dwellseconds   how long the lead must hold before switching (default 0.5)
+#   Minholdseconds minimum time between switches (default 1.0)
+# 'active_pid' is only written when the choice changes.
 
-def onValueChange(channel, sampleIndex, val, prev):
+import os
+
+import pose_frame
+import person_selector
+
+POSE_CHOP = 'in1'
+PRESENT_CHOP = 'present_sel'
+NAMES_CSV = 'data/landmark_names.csv'
+
+_st = {}    # router path -> {'sel', 'order', 'layout', 'frame'}
+
+def _par(router, name, default):
+    return getattr(router.par, name).eval() if hasattr(router.par, name) else default
+
+def _state(router):
+    st = _st.get(router.path)
+    if st is None:
+        path = os.path.normpath(os.path.join(project.folder, NAMES_CSV))
+        st = _st[router.path] = {'sel': person_selector.PersonSelector(),
+                                 'order': pose_frame.load_landmark_names(path),
+                                 'layout': None, 'frame': None}
+    return st
+
+def Update():
     router = op('..')
-    present = []
-    src = op('present_sel')
-    if not src:
-        return
-    for c in src.chans:
-        if c.val >= 0.5:
-            n = c.name  # e.g., "p2_present"
-            try:
-                pid = int(n[1:n.find('_')])
-                present.append(pid)
-            except Exception:
-                pass
-
-    pid = -1
-    if present:
-        mode = router.par.Personmode.eval() if hasattr(router.par, 'Personmode') else 'Specific'
-        if mode == 'Specific':
-            want = int(router.par.Personid.eval()) if hasattr(router.par, 'Personid') else 1
-            pid = min(present, key=lambda p: abs(p - want))
-        elif mode == 'Closest':
-            pid = min(present)
-        elif mode == 'Highestscore':
-            pid = max(present)
-
-    if op('active_pid'):
-        op('active_pid')['v0'] = pid
+    st = _state(router)
+    sel = st['sel']
+    sel.configure(mode=_par(router, 'Personmode', 'Specific'),
+                  want=int(_par(router, 'Personid', 1)),
+                  margin=float(_par(router, 'Switchmargin', 0.1)),
+                  dwell=float(_par(router, 'Dwellseconds', 0.5)),
+                  min_hold=float(_par(router, 'Minholdseconds', 1.0)))
+
+    src = op(POSE_CHOP)
+    if src and src.numChans:
+        key = tuple(c.name for c in src.chans())
+        if st['layout'] is None or st['layout'].key != key:
+            st['layout'] = pose_frame.FrameLayout(key, st['order'])
+        layout = st['layout']
+        values = src.numpyArray()[:, -1].astype(float)
+        st['frame'] = frame = layout.pack(values, st['frame'])
+        pids, size, centre, conf = person_selector.frame_terms(layout, frame, layout.present(values, frame))
+    else:
+        # no landmark stream: fall back to the present flags alone
+        pres = op(PRESENT_CHOP)
+        pids = sorted(int(c.name[1:c.name.find('_')]) for c in (pres.chans('p*_present') if pres else [])
+                      if c[0] >= 0.5)
+        size = centre = conf = [0.0] * len(pids)
+
+    pid, changed = sel.update(pids, size, centre, conf, absTime.seconds)
+    out = op('active_pid')
+    if out and changed:
+        out['v0'] = pid
+    return pid
+
+def onFrameStart(frame):
+    Update()
+    return
+
+def onValueChange(channel, sampleIndex, val, prev):
+    # selection runs once per frame from onFrameStart; see the header for the wiring
     return
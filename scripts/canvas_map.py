@@ -0,0 +1,106 @@
+# scripts/canvas_map.py
+# Multi-output canvas mapping: the pose in the pixel space of every projector /
+# output at once, from one shared pose buffer.
+#
+# Canvases come from data/canvases.csv:
+#   name,width,height,fit,crop_u0,crop_v0,crop_u1,crop_v1,offset_x,offset_y
+#   main,1920,1080,fit,0,0,1,1,0,0
+#   floor,1280,800,fill,0.1,0.4,0.9,1,0,0
+#
+#   width/height   canvas resolution in pixels
+#   fit            fit (letterbox, whole image visible) | fill (crop to cover) | stretch
+#   crop_*         UV sub-rectangle of the camera image shown on this canvas
+#   offset_x/_y    pixel offset added after fitting (e.g. edge blend overlap)
+#
+# Each canvas is one 3x3 matrix (crop -> stage_calib.letterbox -> offset) mapping
+# camera UV to canvas pixels, origin bottom-left like a TOP. CanvasMap stacks them
+# into (K, 3, 3) and maps all landmarks for all canvases with a single einsum:
+# (K, 3, 3) x (N, 3) -> (K, N, 2). Matrices are rebuilt only when the camera
+# image size or the table changes.
+#
+# space='stage' appends canvas_to_stage(): the canvas in the effects' stage space
+# convention (centered, y up, canvas height = 1, x in +-width/height / 2), so an
+# effect draws on a canvas exactly as on pose_stage, with an ortho camera of
+# Ortho Width = width / height and 1 / height stage units per canvas pixel.
+# Put this in a Text DAT named 'canvas_map' in /local/modules.
+
+import csv
+
+import numpy as np
+
+import stage_calib
+
+FIT_MODES = ('fit', 'fill', 'stretch')
+SPACES = ('pixels', 'stage')
+
+
+def load_canvases(path):
+    """Parse canvases.csv into dicts."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    out = []
+    for r in rows:
+        r = {(k or '').strip().lower(): (v or '').strip() for k, v in r.items()}
+        if not r.get('name'):
+            continue
+        num = lambda k, d: float(r.get(k) or d)
+        fit = (r.get('fit') or 'fit').lower()
+        out.append({'name': r['name'],
+                    'width': max(1, int(num('width', 1280))), 'height': max(1, int(num('height', 720))),
+                    'fit': fit if fit in FIT_MODES else 'fit',
+                    'crop': (num('crop_u0', 0), num('crop_v0', 0), num('crop_u1', 1), num('crop_v1', 1)),
+                    'offset': (num('offset_x', 0), num('offset_y', 0))})
+    return out
+
+def canvas_to_stage(width, height):
+    """Canvas pixels (bottom-left origin) -> canvas stage space (centered, height 1)."""
+    s = 1.0 / max(1.0, float(height))
+    return np.array([[s, 0.0, -0.5 * width * s], [0.0, s, -0.5], [0.0, 0.0, 1.0]])
+
+def canvas_matrix(canvas, img_w, img_h, space='pixels'):
+    """Camera UV -> canvas pixels (bottom-left origin), or canvas stage space, for one canvas dict."""
+    u0, v0, u1, v1 = canvas['crop']
+    cw, ch = max(u1 - u0, 1e-6), max(v1 - v0, 1e-6)
+    crop = np.array([[1.0 / cw, 0.0, -u0 / cw], [0.0, 1.0 / ch, -v0 / ch], [0.0, 0.0, 1.0]])
+    fit = stage_calib.letterbox(img_w * cw, img_h * ch, canvas['width'], canvas['height'], canvas['fit'])
+    ox, oy = canvas['offset']
+    shift = np.array([[1.0, 0.0, ox], [0.0, 1.0, oy], [0.0, 0.0, 1.0]])
+    M = shift @ fit @ crop
+    return canvas_to_stage(canvas['width'], canvas['height']) @ M if space == 'stage' else M
+
+
+class CanvasMap:
+
+    def __init__(self, canvases, space='pixels'):
+        if space not in SPACES:
+            raise ValueError(f"canvas space must be one of {SPACES}, not {space!r}")
+        self.space = space
+        self.canvases = list(canvases)
+        self.names = [c['name'] for c in self.canvases]
+        self.index = {n: i for i, n in enumerate(self.names)}
+        self.sizes = np.array([(c['width'], c['height']) for c in self.canvases], dtype=np.float64).reshape(-1, 2)
+        self.img = None
+        self.M = np.zeros((0, 3, 3))
+
+    def set_image(self, img_w, img_h):
+        img = (float(img_w), float(img_h))
+        if img != self.img:
+            self.img = img
+            self.M = np.array([canvas_matrix(c, *img, self.space) for c in self.canvases]).reshape(-1, 3, 3)
+
+    def apply(self, xy):
+        """(N, 2) UV -> (K, N, 2) canvas pixels (or canvas stage space) for all canvases in one pass."""
+        h = np.einsum('kij,nj->kni', self.M, np.column_stack([xy, np.ones(len(xy))]))
+        return h[..., :2] / h[..., 2:]
+
+    def map_values(self, values, xi, yi):
+        """
+        Channel vector -> (K, C) channel vectors: the x/y channels at xi/yi mapped into
+        each canvas, every other channel copied.
+        """
+        out = np.repeat(values[None, :], len(self.canvases), axis=0)
+        if len(xi):
+            xy = self.apply(np.column_stack([values[xi], values[yi]]))
+            out[:, xi] = xy[..., 0]
+            out[:, yi] = xy[..., 1]
+        return out
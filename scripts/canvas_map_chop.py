@@ -0,0 +1,104 @@
+# scripts/canvas_map_chop.py
+# Script CHOP 'canvas_<name>' (one per output canvas, all wired to the same pose CHOP).
+#   Input 0: pose CHOP in camera UV (pose_fanout output, not stage_xform), m_img_w/m_img_h
+#   Output : the same channels with every x/y pair in this canvas's stage space
+#            (canvas_map.canvas_to_stage: centered, y up, canvas height = 1), plus
+#            m_canvas_w / m_canvas_h (canvas pixels)
+#
+# The canvas is the CHOP's 'Canvas' custom parameter (created on first cook, menu
+# from data/canvases.csv), else the name after 'canvas_'. All canvas CHOPs reading
+# the same input share one CanvasMap: the first one to cook in a frame checks
+# canvases.csv and maps every canvas in a single batched pass, the others just copy
+# their row out.
+#
+# Effects bind to a canvas by name instead of pose_stage, e.g. the fxCore input
+# Select CHOP:
+#   CHOP: /PoseCam/canvas_{parent().par.Canvas}
+# keeping m_canvas_w / m_canvas_h in the selection. The effects use the positions
+# as-is, take 1 / m_canvas_h as stage units per pixel for their pixel sizes and
+# render with an ortho camera of Ortho Width = m_canvas_w / m_canvas_h.
+# From Python: op('canvas_map_chop').module.Canvas('floor') -> (names, values).
+
+import os
+
+import numpy as np
+
+import canvas_map
+import pose_frame
+
+CANVASES_CSV = 'data/canvases.csv'
+PAGE = 'Canvas'
+SPACE = 'stage'     # canvas_map.SPACES; 'pixels' for raw canvas pixels
+
+_shared = {}    # input CHOP path -> {'map', 'sig', 'key', 'xi', 'yi', 'frame', 'out'}
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def _canvas_par(scriptOp, names):
+    p = getattr(scriptOp.par, PAGE, None)
+    if p is None:
+        page = next((pg for pg in scriptOp.customPages if pg.name == PAGE), None) or scriptOp.appendCustomPage(PAGE)
+        p = page.appendStrMenu(PAGE, label='Canvas')[0]
+        default = scriptOp.name[len('canvas_'):] if scriptOp.name.startswith('canvas_') else ''
+        p.val = default if default in names else (names[0] if names else '')
+    if list(p.menuNames) != list(names):
+        p.menuNames = p.menuLabels = names
+    return p.eval()
+
+def _shared_map(src):
+    """Shared state for src, reloading canvases.csv when its mtime changed."""
+    sh = _shared.get(src.path)
+    path = _data(CANVASES_CSV)
+    try:
+        sig = os.stat(path).st_mtime
+    except OSError:
+        sig = None
+    if sh is None or sh['sig'] != sig:
+        cmap = canvas_map.CanvasMap(canvas_map.load_canvases(path) if sig is not None else [], SPACE)
+        sh = _shared[src.path] = {'map': cmap, 'sig': sig, 'key': None, 'frame': None, 'out': None}
+    return sh
+
+def _mapped(src):
+    """(shared state) with sh['out'] = (K, C) for the current frame; computed once per frame."""
+    sh = _shared.get(src.path)
+    if sh is not None and sh['frame'] == absTime.frame and sh['out'] is not None:
+        return sh
+    sh = _shared_map(src)
+    key = [c.name for c in src.chans()]
+    if sh['key'] != key:
+        sh['key'] = key
+        sh['xi'], sh['yi'] = pose_frame.xy_channel_pairs(key)
+    cmap = sh['map']
+    cmap.set_image(_meta(src, 'm_img_w', 1280.0), _meta(src, 'm_img_h', 720.0))
+    values = src.numpyArray()[:, -1].astype(float)
+    sh['out'] = cmap.map_values(values, sh['xi'], sh['yi'])
+    sh['frame'] = absTime.frame
+    return sh
+
+def Canvas(name, src_path=None):
+    """(channel names, values) of the latest mapped frame for a canvas, or None."""
+    for path, sh in _shared.items():
+        if (src_path is None or path == src_path) and sh['out'] is not None and name in sh['map'].index:
+            return sh['key'], sh['out'][sh['map'].index[name]]
+    return None
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    sh = _mapped(src)
+    cmap = sh['map']
+    name = _canvas_par(scriptOp, cmap.names)
+    k = cmap.index.get(name)
+    if k is None:
+        scriptOp.clear()
+        return
+    names = sh['key'] + ['m_canvas_w', 'm_canvas_h']
+    pose_frame.WriteChannels(scriptOp, names, np.concatenate([sh['out'][k], cmap.sizes[k]]))
+    return
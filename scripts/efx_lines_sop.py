@@ -1,29 +1,96 @@
 # td/scripts/efx_lines_sop.py
 # Create poly lines between landmark pairs defined in td/data/skeleton_edges.csv
+#
+# Topology (two points + one open poly per edge, per person) is built only when
+# the edge table or the incoming channel layout changes (persons arriving/leaving,
+# landmarks appearing). Every other cook just gathers positions from the CHOP
+# as one NumPy array and writes them onto the existing points.
+#
+# Input channels follow pose_fanout: p{pid}_{name}_x / _y / _z (/ _v)
+# Segments with an endpoint at or below VIS_MIN visibility are collapsed onto their
+# first point (zero length) in the same vectorised pass; landmarks without a _v
+# channel count as visible.
+
+import re
+import numpy as np
+
+CACHE_KEY = 'lines_topology'
+VIS_MIN = 0.5
+
+_RE_AXIS = re.compile(r"^p(?P<pid>\d+)_(?P<name>.+)_(?P<axis>[xyzv])$")
+
+def _edge_list(edges):
+    """Edges CSV has headers: a,b (landmark names)."""
+    out = []
+    for r in range(1, edges.numRows):
+        a = edges[r, 'a'].val.strip(); b = edges[r, 'b'].val.strip()
+        if a and b:
+            out.append((a, b))
+    return tuple(out)
+
+def _build_topology(scriptOp, chan_names, edge_list):
+    """
+    Rebuild points/polys for every present person and return the gather index:
+    an int array (num_points, 4) of channel indices for x, y, z, v of each point
+    (v = -1 when there is no visibility channel).
+    """
+    # (pid, name) -> [ix, iy, iz, iv]
+    axes = {}
+    for i, n in enumerate(chan_names):
+        m = _RE_AXIS.match(n)
+        if not m:
+            continue
+        slot = axes.setdefault((int(m.group('pid')), m.group('name')), [-1, -1, -1, -1])
+        slot['xyzv'.index(m.group('axis'))] = i
+
+    pids = sorted({pid for pid, _ in axes})
+    rows = []
+    scriptOp.clear()
+    for pid in pids:
+        for a, b in edge_list:
+            ia = axes.get((pid, a)); ib = axes.get((pid, b))
+            if not ia or not ib or -1 in ia[:3] or -1 in ib[:3]:
+                continue
+            i0 = scriptOp.appendPoint((0, 0, 0)); i1 = scriptOp.appendPoint((0, 0, 0))
+            prim = scriptOp.appendPoly(2, closed=False, addPoints=False)
+            prim[0].point = i0; prim[1].point = i1
+            rows.append(ia); rows.append(ib)
+
+    return np.array(rows, dtype=np.int32).reshape(-1, 4), len(pids)
 
 def onCook(scriptOp):
     ch = op('in_chop'); edges = op('skeleton_edges')
-    scriptOp.clear()
-    if not ch or not edges or edges.numRows < 2:
+    if not ch or not edges or edges.numRows < 2 or ch.numChans == 0:
+        scriptOp.clear(); scriptOp.store(CACHE_KEY, None)
         return
 
-    # Build a quick name → (x,y,z) lookup for person 1
-    def get(a): return ch[a].eval() if a in ch else None
-    pos = {}
-    for c in ch.chans:
-        if c.name.startswith('p1_') and (c.name.endswith('_x') or c.name.endswith('_y') or c.name.endswith('_z')):
-            base = c.name[:-2]
-            if base not in pos:
-                x = get(base + 'x'); y = get(base + 'y'); z = get(base + 'z')
-                if x is not None and y is not None and z is not None:
-                    pos[base.replace('p1_', '')] = (x, y, z)
-
-    # Edges CSV has headers: a,b (landmark names)
-    for r in range(1, edges.numRows):
-        a = edges[r, 'a'].val; b = edges[r, 'b'].val
-        pa = pos.get(a); pb = pos.get(b)
-        if not pa or not pb: continue
-        i0 = scriptOp.appendPoint(pa); i1 = scriptOp.appendPoint(pb)
-        prim = scriptOp.appendPoly(2, closed=False, addPoints=False)
-        prim[0].point = i0; prim[1].point = i1
+    chan_names = tuple(c.name for c in ch.chans())
+    edge_list = _edge_list(edges)
+
+    cache = scriptOp.fetch(CACHE_KEY, None)
+    # Geometry can also be dropped behind our back (reset, reload), so check point count too.
+    if (cache is None or cache['chans'] != chan_names or cache['edges'] != edge_list
+            or len(scriptOp.points) != cache['index'].shape[0]):
+        index, npersons = _build_topology(scriptOp, chan_names, edge_list)
+        cache = {'chans': chan_names, 'edges': edge_list, 'index': index, 'persons': npersons}
+        scriptOp.store(CACHE_KEY, cache)
+
+    index = cache['index']
+    if index.shape[0] == 0:
+        return
+
+    # Bulk gather: (numChans,) sample 0 -> (num_points, 3)
+    vals = ch.numpyArray()[:, 0]
+    pos = vals[index[:, :3]]
+
+    # Cull: collapse segments whose endpoints are not both visible
+    vi = index[:, 3]
+    ok = np.ones(len(vi), dtype=bool)
+    ok[vi >= 0] = vals[vi[vi >= 0]] > VIS_MIN
+    hide = ~(ok[0::2] & ok[1::2])
+    if hide.any():
+        pos[1::2][hide] = pos[0::2][hide]
+
+    for pt, (x, y, z) in zip(scriptOp.points, pos.tolist()):
+        pt.P = (x, y, z)
     return
@@ -1,5 +1,8 @@
 # td/scripts/efx_points_sop.py
 # Build a SOP of points at selected landmark channels from incoming CHOP
+# Landmarks whose _v (visibility) channel is at or below VIS_MIN are skipped.
+
+VIS_MIN = 0.5
 
 def onCook(scriptOp):
     ch = op('in_chop')
@@ -19,6 +22,9 @@ def onCook(scriptOp):
         lname = base.split('_', 1)[1] if '_' in base else base
         if names and lname not in names:
             continue
+        cv = ch[base + 'v'] if base + 'v' in ch else None
+        if cv is not None and cv.eval() <= VIS_MIN:
+            continue
         x = cx.eval(); y = cy.eval() if cy else 0.0; z = cz.eval() if cz else 0.0
         scriptOp.appendPoint((x, y, z))
     return
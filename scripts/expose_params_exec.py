@@ -0,0 +1,8 @@
+# PoseEffect_* / fxCore / expose_params_exec (DAT Execute DAT watching expose_params)
+# Drops the ShowControlIO parameter schema for this fxCore when the exposed list changes.
+
+def onTableChange(dat):
+    router = op('/ShowControlIO/osc_router')
+    if router:
+        router.module.InvalidateSchema(parent().path)
+    return
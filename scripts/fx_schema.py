@@ -0,0 +1,301 @@
+# scripts/fx_schema.py
+# Declarative parameter schema for PoseEffect_* components.
+#
+# Each effect carries a Table DAT 'par_schema' next to its fxCore (File = data/par_schema_<Effect>.csv):
+#
+#   name,type,label,default,min,max,menu,group,osc
+#   Uidotsize,float,Dot Size,8,1,64,,Dots,1
+#   Uicolor,rgb,Color,1 1 1,0,1,,Dots,1
+#   Uicolortype,menu,Color Type,solid,,,solid|random,Dots,1
+#
+#   name   TD custom par name: first letter upper case, the rest lower case letters
+#          and digits. Other spellings are normalised (UiDotSize -> Uidotsize), and
+#          every lookup uses the normalised name.
+#   type   float | int | toggle | str | menu | rgb | rgba | pulse
+#   default  space separated for rgb/rgba
+#   menu   '|' separated menu names (labels = names)
+#   group  custom page on fxCore (default 'Fx')
+#   osc    1 = exposed to UI and OSC (/pose2art/fx/param/<name>)
+#
+# Generate(fx) does everything in one pass:
+#   - creates/updates the parameters on fxCore (type, range, default, menu)
+#   - mirrors them onto the PoseEffect's 'fxParm' page, bound to fxCore
+#     (menus also bind their menuSource so the items follow)
+#   - writes fxCore/expose_params (read by ui_builder and osc_router)
+#   - writes fxCore/osc_routes (address,param,type,min,max); osc_router reads it with
+#     RouteTable() and coerces/clamps incoming values with coerce()
+#   - stores the UI page spec (UiSpec()) that ui_builder syncs onto FX_Active
+# The result is stored on the effect with the schema hash; when the hash is unchanged
+# (restart, or a clone that copied its parent's pars and storage) nothing is redone.
+#
+# Generation is explicit: PoseEfxSwitchExt.Initialize runs GenerateAll() at startup
+# and effects_exec again when effects are added (clones); ensure_fx_pars* run one
+# effect. The query side (ExposedNames, UiSpec, RouteTable, SchemaHash) never creates
+# anything: an effect whose schema was not generated yet falls back to
+# expose_params, else the Ui* prefix.
+#
+# Put this in a Text DAT named 'fx_schema' in /local/modules.
+
+import hashlib
+import re
+
+SCHEMA_DAT = 'par_schema'
+STORE_KEY = 'fx_schema'
+BIND_PAGE = 'fxParm'
+DEFAULT_GROUP = 'Fx'
+OSC_PREFIX = '/pose2art/fx/param/'
+EXPOSE_PREFIXES = ('Ui', 'UI', 'ui')
+COLUMNS = ('name', 'type', 'label', 'default', 'min', 'max', 'menu', 'group', 'osc')
+
+_APPEND = {
+    'float': 'appendFloat', 'int': 'appendInt', 'toggle': 'appendToggle', 'str': 'appendStr',
+    'menu': 'appendMenu', 'rgb': 'appendRGB', 'rgba': 'appendRGBA', 'pulse': 'appendPulse',
+}
+_STYLE = {
+    'float': 'Float', 'int': 'Int', 'toggle': 'Toggle', 'str': 'Str',
+    'menu': 'Menu', 'rgb': 'RGB', 'rgba': 'RGBA', 'pulse': 'Pulse',
+}
+
+
+# --- schema parsing (no TD objects) -------------------------------------------
+def par_name(name):
+    """TD-valid custom par name: 'UiDotSize' -> 'Uidotsize', 'ui_color' -> 'Uicolor'."""
+    n = re.sub(r'[^A-Za-z0-9]', '', name)
+    return n[:1].upper() + n[1:].lower()
+
+def parse_rows(rows):
+    """rows: list of cell-string lists incl. header. Returns list of entry dicts."""
+    if not rows:
+        return []
+    header = [h.strip().lower() for h in rows[0]]
+    out = []
+    for r in rows[1:]:
+        cells = {header[i]: (r[i] if i < len(r) else '').strip() for i in range(len(header))}
+        raw = cells.get('name', '')
+        name = par_name(raw)
+        typ = cells.get('type', '').lower() or 'float'
+        if not name[:1].isalpha() or typ not in _APPEND:
+            continue
+        out.append({
+            'name': name,
+            'type': typ,
+            'label': cells.get('label') or raw,
+            'default': cells.get('default', ''),
+            'min': cells.get('min', ''),
+            'max': cells.get('max', ''),
+            'menu': [m.strip() for m in cells.get('menu', '').split('|') if m.strip()],
+            'group': cells.get('group') or DEFAULT_GROUP,
+            'osc': cells.get('osc', '1').lower() in ('1', 'true', 'yes', 'on'),
+        })
+    return out
+
+def schema_hash(entries):
+    h = hashlib.sha1()
+    for e in entries:
+        h.update(repr([e[c] if c != 'menu' else tuple(e[c]) for c in COLUMNS]).encode('utf-8'))
+    return h.hexdigest()
+
+def osc_routes(entries):
+    """[(address, param, type, min, max)] for exposed entries."""
+    return [(OSC_PREFIX + e['name'], e['name'], e['type'], e['min'], e['max'])
+            for e in entries if e['osc']]
+
+def _floats(s):
+    try:
+        return [float(v) for v in s.replace(',', ' ').split()]
+    except ValueError:
+        return []
+
+_SIZE = {'rgb': 3, 'rgba': 4}
+
+def coerce(typ, lo, hi, args):
+    """
+    OSC args -> values for one route: typed, clamped to min/max (strings from the
+    route table, '' = open). One value per tuplet component for rgb/rgba, none for
+    pulse. Raises ValueError/IndexError on unusable args.
+    """
+    if typ == 'pulse':
+        return []
+    if typ in ('str', 'menu'):
+        return [str(args[0]).strip()]
+    if typ == 'toggle':
+        v = str(args[0]).strip().lower()
+        return [1 if v in ('true', 'on', 'yes') else 0 if v in ('false', 'off', 'no') else int(float(v) >= 0.5)]
+    n = _SIZE.get(typ, 1)
+    if len(args) < n:
+        raise ValueError(f'{typ} needs {n} values, got {len(args)}')
+    vals = [float(a) for a in args[:n]]
+    lo, hi = _floats(lo), _floats(hi)
+    if lo:
+        vals = [max(v, lo[0]) for v in vals]
+    if hi:
+        vals = [min(v, hi[0]) for v in vals]
+    return [int(round(v)) for v in vals] if typ == 'int' else vals
+
+
+# --- TD side --------------------------------------------------------------------
+def _rows_of(dat):
+    return [[c.val for c in r] for r in dat.rows()]
+
+def _page(comp, name):
+    for p in comp.customPages:
+        if p.name == name:
+            return p
+    return comp.appendCustomPage(name)
+
+def _ensure_par(core, e):
+    """Create or update one parameter tuplet on fxCore from its schema entry."""
+    tup = getattr(core.parTuple, e['name'], None)
+    if tup is not None and tup[0].style != _STYLE[e['type']]:
+        tup[0].destroy()
+        tup = None
+    if tup is None:
+        page = _page(core, e['group'])
+        tup = getattr(page, _APPEND[e['type']])(e['name'], label=e['label'])
+    tup[0].label = e['label']
+
+    if e['type'] == 'menu':
+        tup[0].menuNames = e['menu']
+        tup[0].menuLabels = e['menu']
+        if e['default']:
+            tup[0].default = e['default']
+    elif e['type'] in ('float', 'int', 'rgb', 'rgba'):
+        lo, hi = _floats(e['min']), _floats(e['max'])
+        dflt = _floats(e['default'])
+        for i, p in enumerate(tup):
+            if lo:
+                p.normMin = p.min = lo[0]; p.clampMin = True
+            if hi:
+                p.normMax = p.max = hi[0]; p.clampMax = True
+            if i < len(dflt):
+                p.default = int(dflt[i]) if e['type'] == 'int' else dflt[i]
+    elif e['type'] in ('str', 'toggle') and e['default']:
+        tup[0].default = int(float(e['default'])) if e['type'] == 'toggle' else e['default']
+    return tup
+
+def _bind_on_effect(fx, core, e):
+    """Mirror the parameter onto the PoseEffect's fxParm page, bound to fxCore."""
+    page = _page(fx, BIND_PAGE)
+    src = getattr(core.parTuple, e['name'], None)
+    if src is None:
+        debug(f"fx_schema: {core.path} has no par {e['name']}, not bound on {fx.name}")
+        return
+    tup = getattr(fx.parTuple, e['name'], None)
+    if tup is not None and tup[0].style != src[0].style:
+        tup[0].destroy()
+        tup = None
+    if tup is None:
+        tup = page.appendPar(e['name'], par=src[0], label=e['label'])
+    for dst in tup:
+        dst.mode = ParMode.BIND
+        dst.bindExpr = f"op('fxCore').par.{dst.name}"
+    if e['type'] == 'menu':
+        tup[0].menuSource = f"op('fxCore').par.{e['name']}"
+
+def _write_table(dat, header, rows):
+    want = ([header] if header else []) + [[str(c) for c in r] for r in rows]
+    if _rows_of(dat) != want:
+        dat.clear()
+        for r in want:
+            dat.appendRow(r)
+
+def Generate(fx, force=False):
+    """
+    Build parameters, binds, expose_params and osc_routes for one PoseEffect from its
+    fx_schema DAT. Returns the stored result dict, or None when there is no schema.
+    """
+    schema_dat = fx.op(SCHEMA_DAT)
+    core = fx.op('fxCore')
+    if not schema_dat or not core:
+        debug(f"fx_schema: {fx.path} has no {SCHEMA_DAT} DAT or fxCore")
+        return None
+
+    entries = parse_rows(_rows_of(schema_dat))
+    h = schema_hash(entries)
+    cached = fx.fetch(STORE_KEY, None, search=False)
+    if not force and cached and cached.get('hash') == h:
+        return cached
+
+    for e in entries:
+        _ensure_par(core, e)
+        _bind_on_effect(fx, core, e)
+
+    exposed = [e['name'] for e in entries if e['osc']]
+    routes = osc_routes(entries)
+    expose = core.op('expose_params') or core.create(tableDAT, 'expose_params')
+    _write_table(expose, None, [[n] for n in exposed])
+    routes_dat = core.op('osc_routes') or core.create(tableDAT, 'osc_routes')
+    _write_table(routes_dat, ['address', 'param', 'type', 'min', 'max'], routes)
+    ui = [(e['name'], _STYLE[e['type']], e['label'], core.path,
+           tuple(p.name for p in getattr(core.parTuple, e['name'])))
+          for e in entries if e['osc'] and getattr(core.parTuple, e['name'], None) is not None]
+
+    result = {'hash': h, 'pars': [e['name'] for e in entries], 'exposed': exposed,
+              'routes': routes, 'ui': ui}
+    fx.store(STORE_KEY, result)
+    debug(f"fx_schema: generated {len(entries)} pars for {fx.name} ({h[:8]})")
+    return result
+
+def GenerateAll(effects_comp):
+    """Run Generate on every PoseEffect_* with a par_schema under the given effects container."""
+    if effects_comp is None:
+        return {}
+    return {fx.name: Generate(fx) for fx in effects_comp.children
+            if fx.isCOMP and fx.name.startswith('PoseEffect_') and fx.op(SCHEMA_DAT)}
+
+def _stored(core):
+    return core.parent().fetch(STORE_KEY, None, search=False)
+
+def ExposedNames(core):
+    """
+    Ordered exposed parameter names for an fxCore (generated schema > expose_params >
+    Ui* prefix). Tuplet names are expanded to their component pars
+    (Uicolor -> Uicolorr, Uicolorg, Uicolorb). Read-only: never runs Generate.
+    """
+    res = _stored(core)
+    if res is not None:
+        names = res['exposed']
+    else:
+        tab = core.op('expose_params')
+        if tab and tab.isDAT and tab.numRows > 0:
+            names = [r[0].val.strip() for r in tab.rows() if r and r[0].val.strip()]
+        else:
+            names = [p.name for p in core.customPars if p.name.startswith(EXPOSE_PREFIXES)]
+    out = []
+    for n in names:
+        if hasattr(core.par, n):
+            comps = [n]
+        else:
+            tup = getattr(core.parTuple, n, None)
+            comps = [p.name for p in tup] if tup is not None else []
+        out.extend(c for c in comps if c not in out)
+    return out
+
+def SchemaHash(core):
+    """Stored schema hash for an fxCore's effect, or None if it has no generated schema."""
+    res = _stored(core)
+    return res['hash'] if res else None
+
+def UiSpec(core):
+    """Generated UI page spec [(tuplet name, style, label, src path, src par names)], or None."""
+    res = _stored(core)
+    return res.get('ui') if res else None
+
+def RouteTable(core):
+    """
+    {name: (type, min, max)} from fxCore/osc_routes; rgb/rgba routes also map their
+    component pars (Uicolorr, ...) as float. {} when the effect has no route table.
+    """
+    t = core.op('osc_routes')
+    if not t or t.numRows < 2:
+        return {}
+    out = {}
+    for r in t.rows()[1:]:
+        if len(r) < 5:
+            continue
+        name, typ, lo, hi = r[1].val, r[2].val, r[3].val, r[4].val
+        out[name] = (typ, lo, hi)
+        if typ in _SIZE:
+            for p in getattr(core.parTuple, name, None) or ():
+                out[p.name] = ('float', lo, hi)
+    return out
@@ -0,0 +1,146 @@
+# scripts/gesture_chop.py
+# Script CHOP 'gestures' (e.g. /PoseCam/gestures, next to pose_fanout).
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, m_img_w/m_img_h
+#   Output : g{pid}_{gesture} confidence (0..1) per person, gesture_{name} = max over persons
+# Fired gestures go out through osc_router.Emit as /pose2art/gesture/<name> <pid> <confidence>.
+#
+# Templates are the .npz files in data/gestures (see gesture_engine). Record from the
+# live stream with
+#     op('gestures_callbacks').module.StartRecording('wave', pid=1)
+#     ... perform ...
+#     op('gestures_callbacks').module.StopRecording()       # saves data/gestures/wave.npz
+# or take what was just performed from the shared history ring
+#     op('gestures_callbacks').module.CaptureRecent('wave', seconds=1.5, pid=1)
+# or via OSC /pose2art/gestures/record <name> [pid], /pose2art/gestures/stop,
+# /pose2art/gestures/capture <name> <seconds> [pid], /pose2art/gestures/reload
+# (routed here by osc_router).
+#
+# Each cook pushes the engine's template-space vectors to the shared ring RING
+# (pose_frame.GetRing, keyed by the person ids) and steps the engine on them; a
+# reloaded engine is re-seeded from that ring.
+
+import os
+
+import numpy as np
+
+import gesture_engine
+import pose_frame
+import pose_normalize
+
+GESTURE_DIR = 'data/gestures'
+NAMES_CSV = 'data/landmark_names.csv'
+ROUTER_DAT = '/ShowControlIO/osc_router'
+RING = 'gesture'
+RING_FRAMES = 240       # at least the longest template window; sets the CaptureRecent limit
+
+_st = {}            # scriptOp path -> state
+_recorder = None
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def _engine():
+    return gesture_engine.GestureEngine(gesture_engine.load_templates(_data(GESTURE_DIR)),
+                                        fps=project.cookRate)
+
+def _state(scriptOp):
+    st = _st.get(scriptOp.path)
+    if st is None:
+        st = _st[scriptOp.path] = {'engine': _engine(), 'norm': pose_normalize.NormalizeStage(),
+                                   'order': pose_frame.load_landmark_names(_data(NAMES_CSV)),
+                                   'layout': None, 'frame': None}
+        debug(f"gestures: {len(st['engine'].names)} templates {st['engine'].names}")
+    return st
+
+def Reload():
+    for st in _st.values():
+        st['engine'] = _engine()
+
+def StartRecording(name, pid=None):
+    global _recorder
+    _recorder = gesture_engine.Recorder(str(name), pid, fps=project.cookRate)
+    debug(f"gestures: recording {name} (pid {pid})")
+
+def StopRecording(save=True):
+    global _recorder
+    rec, _recorder = _recorder, None
+    if rec is None:
+        return None
+    tmpl = rec.template()
+    if tmpl is None or not save:
+        return tmpl
+    path = tmpl.save(_data(GESTURE_DIR))
+    debug(f"gestures: saved {len(tmpl.seq)} frames to {path}")
+    Reload()
+    return tmpl
+
+def _ring():
+    eng = next(iter(_st.values()))['engine'] if _st else None
+    return pose_frame.GetRing(RING, max(RING_FRAMES, eng.history if eng else 1))
+
+def CaptureRecent(name, seconds=1.5, pid=None, save=True):
+    """Template from the last `seconds` of one person in the shared gesture ring."""
+    frames = max(2, int(round(float(seconds) * project.cookRate)))
+    tmpl = gesture_engine.template_from_ring(_ring(), str(name), pid, frames, fps=project.cookRate)
+    if tmpl is None:
+        debug(f"gestures: not enough history to capture {name}")
+        return None
+    if save:
+        path = tmpl.save(_data(GESTURE_DIR))
+        debug(f"gestures: captured {len(tmpl.seq)} frames to {path}")
+        Reload()
+    return tmpl
+
+def Dispatch(address, args):
+    """/pose2art/gestures/record <name> [pid] | stop | capture <name> <seconds> [pid] | reload"""
+    cmd = address.rsplit('/', 1)[-1]
+    if cmd == 'record' and args:
+        StartRecording(args[0], int(float(args[1])) if len(args) > 1 else None)
+    elif cmd == 'capture' and len(args) >= 2:
+        CaptureRecent(args[0], float(args[1]), int(float(args[2])) if len(args) > 2 else None)
+    elif cmd == 'stop':
+        StopRecording()
+    elif cmd == 'reload':
+        Reload()
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    st = _state(scriptOp)
+    key = tuple(c.name for c in src.chans())
+    if st['layout'] is None or st['layout'].key != key:
+        st['layout'] = pose_frame.FrameLayout(key, st['order'])
+    layout, eng = st['layout'], st['engine']
+
+    values = src.numpyArray()[:, -1].astype(float)
+    st['frame'] = frame = layout.pack(values, st['frame'])
+    aspect = _meta(src, 'm_img_w', 16.0) / _meta(src, 'm_img_h', 9.0)
+    norm, _, _ = st['norm'].compute(layout, frame, aspect)
+    x = eng.vectors(layout, norm)
+    pids = tuple(layout.pids)
+    ring = _ring()
+    if eng.pids is None and ring.key == pids:
+        eng.seed(ring)              # reloaded engine: replay recent history first
+    ring.push(x, pids)
+    if _recorder is not None:
+        _recorder.feed(pids, x)
+
+    events = eng.step(pids, x)
+    if events:
+        router = op(ROUTER_DAT)
+        for pid, name, conf in events:
+            if router:
+                router.module.Emit('/pose2art/gesture/' + name, pid, round(conf, 3))
+
+    names = [f'g{pid}_{g}' for pid in layout.pids for g in eng.names]
+    names += [f'gesture_{g}' for g in eng.names]
+    conf = eng.conf if eng.conf is not None and eng.conf.size else np.zeros((len(layout), len(eng.names)))
+    peak = conf.max(axis=0) if len(conf) else np.zeros(len(eng.names))
+    pose_frame.WriteChannels(scriptOp, names, np.concatenate([conf.ravel(), peak]))
+    return
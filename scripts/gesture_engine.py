@@ -0,0 +1,258 @@
+# scripts/gesture_engine.py
+# Real-time gesture recognition over the normalised pose stream.
+#
+# A template is a short sequence of body-scale-normalised landmark positions
+# (pose_normalize), e.g. both wrists and elbows over ~1 s, stored as
+# data/gestures/<name>.npz: seq (T, D), landmarks, threshold, fps.
+#
+# Matching is streaming subsequence DTW. For every person and template the engine
+# keeps one cost column over the template; each new frame updates it as
+#     D[i] = c[i] + min(D'[i], D'[i-1], D'[i-2])        (D' = previous frame)
+# i.e. the performer may hold (stay on a template step) or go up to 2x faster, and
+# a match may start on any frame (D[0] = c[0]). The step pattern has no same-frame
+# dependency, so one frame is a single vectorised update over (persons, templates,
+# template steps): O(templates x window) per frame, no recompute over history.
+# Paths longer than max_stretch x T are cut off (bounded warping window). The score
+# is the mean per-frame cost of the best path ending on the last template step;
+# confidence = clip(1 - cost / (2 * threshold)), so a gesture fires at 0.5.
+# After firing, that person/template is reset and held off for `refractory` frames.
+#
+# The engine is fed from a shared history ring (pose_frame.GetRing): gesture_chop
+# turns each frame into template-space vectors (vectors(): the template landmarks'
+# normalised x/y, (P, D)), pushes them to the ring keyed by the person ids and steps
+# the engine on them. DTW state is kept per person id, so landmark dropouts do not
+# reset it and a person entering or leaving keeps everyone else's progress. A fresh
+# engine (template reload) is re-seeded from the ring's recent frames (seed()).
+#
+# Templates are recorded from the live stream (Recorder, fed by gesture_chop), taken
+# from the last N frames of the ring (template_from_ring), or cut from pose
+# recordings (template_from_recording).
+# Put this in a Text DAT named 'gesture_engine' in /local/modules.
+
+import glob
+import os
+
+import numpy as np
+
+import pose_frame
+import pose_normalize
+
+DEFAULT_LANDMARKS = ('wrist_l', 'wrist_r', 'elbow_l', 'elbow_r')
+DEFAULT_THRESHOLD = 0.25     # mean per-frame distance (torso lengths) that counts as a match
+MAX_STRETCH = 2.0            # a match may take up to 2x the template duration
+MISSING_DIFF = 1.0           # per-coordinate penalty for invisible landmarks
+REFRACTORY = 30              # frames
+
+
+# --- templates ------------------------------------------------------------------
+class Template:
+    __slots__ = ('name', 'seq', 'landmarks', 'threshold', 'fps')
+
+    def __init__(self, name, seq, landmarks=DEFAULT_LANDMARKS, threshold=DEFAULT_THRESHOLD, fps=60.0):
+        self.name = name
+        self.seq = np.asarray(seq, dtype=np.float64)
+        self.landmarks = tuple(landmarks)
+        self.threshold = float(threshold)
+        self.fps = float(fps)
+
+    def save(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, self.name + '.npz')
+        np.savez_compressed(path, seq=self.seq, landmarks=np.array(self.landmarks),
+                            threshold=self.threshold, fps=self.fps)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            return cls(os.path.splitext(os.path.basename(path))[0], z['seq'],
+                       [str(n) for n in z['landmarks']], float(z['threshold']), float(z['fps']))
+
+def load_templates(folder):
+    return [Template.load(p) for p in sorted(glob.glob(os.path.join(folder, '*.npz')))]
+
+def _resample(seq, src_fps, dst_fps):
+    """Linear time resampling of a (T, D) sequence."""
+    if abs(src_fps - dst_fps) < 1e-6 or len(seq) < 2:
+        return seq
+    n = max(2, int(round(len(seq) * dst_fps / src_fps)))
+    t_src = np.linspace(0.0, 1.0, len(seq))
+    t_dst = np.linspace(0.0, 1.0, n)
+    return np.column_stack([np.interp(t_dst, t_src, seq[:, d]) for d in range(seq.shape[1])])
+
+def template_from_recording(path, name, pid=1, start=0, end=None, fps=60.0,
+                            landmarks=DEFAULT_LANDMARKS, threshold=DEFAULT_THRESHOLD,
+                            aspect=16.0 / 9.0):
+    """Cut frames [start:end] of person `pid` from a pose recording into a Template."""
+    names, values = pose_frame.load_recording(path)
+    layout = pose_frame.FrameLayout(names)
+    norm_stage = pose_normalize.NormalizeStage(scale_alpha=1.0)
+    row = layout.pids.index(pid)
+    lidx = layout.idx(landmarks)
+    seq = []
+    for v in values[start:end]:
+        norm, _, _ = norm_stage.compute(layout, layout.pack(v), aspect)
+        seq.append(norm[row, lidx, :2].ravel())
+    return Template(name, np.array(seq), landmarks, threshold, fps)
+
+
+def _finite_template(name, seq, landmarks, threshold, fps):
+    seq = np.asarray(seq, dtype=np.float64).reshape(len(seq), -1)
+    keep = np.isfinite(seq).all(axis=1)
+    return Template(name, seq[keep], landmarks, threshold, fps) if keep.sum() >= 2 else None
+
+def template_from_ring(ring, name, pid=None, frames=None, landmarks=DEFAULT_LANDMARKS,
+                       threshold=DEFAULT_THRESHOLD, fps=60.0):
+    """
+    Template from the last `frames` (default all) vectors of one person in a ring filled
+    with GestureEngine.vectors() (key = person ids). None when there is too little history.
+    """
+    pids = ring.key or ()
+    hist = ring.latest(frames or len(ring))
+    if hist is None or not pids:
+        return None
+    row = pids.index(pid) if pid in pids else 0
+    return _finite_template(name, hist[:, row], landmarks, threshold, fps)
+
+
+class Recorder:
+    """Collects one person's template-space vectors from the live stream."""
+
+    def __init__(self, name, pid=None, landmarks=DEFAULT_LANDMARKS, fps=60.0):
+        self.name, self.pid, self.landmarks, self.fps = name, pid, tuple(landmarks), float(fps)
+        self.frames = []
+
+    def feed(self, pids, x):
+        """pids: person ids in row order; x: (P, D) from GestureEngine.vectors()."""
+        if not len(pids):
+            return
+        pid = self.pid if self.pid in pids else pids[0]
+        self.frames.append(x[list(pids).index(pid)].copy())
+
+    def template(self, threshold=DEFAULT_THRESHOLD):
+        return _finite_template(self.name, self.frames, self.landmarks, threshold, self.fps) if self.frames else None
+
+
+# --- engine ---------------------------------------------------------------------
+class GestureEngine:
+
+    def __init__(self, templates, fps=60.0, max_stretch=MAX_STRETCH, refractory=REFRACTORY):
+        self.fps = float(fps)
+        self.max_stretch = float(max_stretch)
+        self.refractory = int(refractory)
+        self.set_templates(templates)
+
+    def set_templates(self, templates):
+        self.templates = [t for t in templates if len(t.seq) >= 2]
+        # all templates must use the same landmarks to share one feature vector
+        self.landmarks = self.templates[0].landmarks if self.templates else DEFAULT_LANDMARKS
+        self.templates = [t for t in self.templates if t.landmarks == self.landmarks]
+        self.names = [t.name for t in self.templates]
+        seqs = [_resample(t.seq, t.fps, self.fps) for t in self.templates]
+        K = len(seqs)
+        T = max((len(s) for s in seqs), default=1)
+        D = seqs[0].shape[1] if seqs else 2 * len(self.landmarks)
+        self.tmpl = np.zeros((K, T, D))
+        self.valid = np.zeros((K, T), dtype=bool)
+        for k, s in enumerate(seqs):
+            self.tmpl[k, :len(s)] = s
+            self.valid[k, :len(s)] = True
+        self.last = np.array([len(s) - 1 for s in seqs], dtype=np.intp)
+        self.window = np.array([len(s) * self.max_stretch for s in seqs])
+        self.threshold = np.array([t.threshold for t in self.templates])
+        self.layout_key = None
+        self.pids = None
+        self.cost = self.length = self.hold = self.conf = None
+
+    @property
+    def history(self):
+        """Frames of history the longest template window can use (ring capacity)."""
+        return int(np.ceil(self.window.max())) if len(self.window) else 1
+
+    def _remap(self, pids):
+        """Carry DTW state over a change of persons by pid; new persons start empty."""
+        K, T = self.valid.shape
+        cost = np.full((len(pids), K, T), np.inf)
+        length = np.zeros((len(pids), K, T))
+        hold = np.zeros((len(pids), K), dtype=np.intp)
+        conf = np.zeros((len(pids), K))
+        if self.pids is not None and self.cost is not None:
+            old = {pid: i for i, pid in enumerate(self.pids)}
+            for i, pid in enumerate(pids):
+                j = old.get(pid)
+                if j is not None:
+                    cost[i], length[i], hold[i], conf[i] = self.cost[j], self.length[j], self.hold[j], self.conf[j]
+        self.pids = pids
+        self.cost, self.length, self.hold, self.conf = cost, length, hold, conf
+
+    def vectors(self, layout, norm):
+        """(P, D) template-space vectors from normalised landmarks (P, L, 3); NaN where missing."""
+        if self.layout_key != layout.key:
+            self.layout_key = layout.key
+            self._lidx = np.array([layout.index.get(n, -1) for n in self.landmarks], dtype=np.intp)
+        x = np.full((len(layout), len(self._lidx), 2), np.nan)
+        ok = self._lidx >= 0
+        x[:, ok] = norm[:, self._lidx[ok], :2]
+        return x.reshape(len(layout), -1)
+
+    def seed(self, ring):
+        """
+        Replay a ring of vectors() frames (key = person ids), oldest first, so a fresh
+        engine picks up gestures already in progress. Matches completed in the replay
+        are not reported; they only start their refractory hold.
+        """
+        hist = ring.latest(self.history)
+        if hist is None or not ring.key or hist.shape[-1] != self.tmpl.shape[-1]:
+            return
+        for x in hist:
+            self.step(ring.key, x)
+
+    def step(self, pids, x):
+        """
+        Feed one frame: pids (person ids in row order) and x (P, D) from vectors().
+        Returns [(pid, name, confidence)] for gestures that fired on this frame;
+        self.conf holds (P, K) confidences.
+        """
+        K = len(self.templates)
+        pids = tuple(pids)
+        if self.pids != pids:
+            self._remap(pids)
+        if not K or not pids:
+            return []
+
+        x = x.reshape(len(pids), 1, 1, -1)
+
+        diff = x - self.tmpl[None]                               # (P, K, T, D)
+        diff = np.where(np.isfinite(diff), diff, MISSING_DIFF)
+        c = np.sqrt((diff * diff).sum(-1))                       # (P, K, T)
+
+        prev, plen = self.cost, self.length
+        inf = np.full(prev.shape[:2] + (1,), np.inf)
+        zero = np.zeros(prev.shape[:2] + (1,))
+        cand = np.stack([prev,
+                         np.concatenate([inf, prev[..., :-1]], -1),
+                         np.concatenate([inf, inf, prev[..., :-2]], -1)])
+        clen = np.stack([plen,
+                         np.concatenate([zero, plen[..., :-1]], -1),
+                         np.concatenate([zero, zero, plen[..., :-2]], -1)])
+        best = cand.argmin(0)
+        cost = np.take_along_axis(cand, best[None], 0)[0] + c
+        length = np.take_along_axis(clen, best[None], 0)[0] + 1.0
+        cost[..., 0] = c[..., 0]                                  # open begin
+        length[..., 0] = 1.0
+        cost[(length > self.window[None, :, None]) | ~self.valid[None]] = np.inf
+        self.cost, self.length = cost, length
+
+        end_cost = cost[:, np.arange(K), self.last]               # (P, K)
+        end_len = length[:, np.arange(K), self.last]
+        mean = end_cost / np.maximum(end_len, 1.0)
+        self.conf = np.clip(1.0 - mean / (2.0 * self.threshold[None]), 0.0, 1.0)
+        self.hold = np.maximum(self.hold - 1, 0)
+
+        fire = (self.conf >= 0.5) & (self.hold == 0)
+        events = []
+        for p, k in zip(*np.nonzero(fire)):
+            events.append((pids[p], self.names[k], float(self.conf[p, k])))
+            self.cost[p, k] = np.inf
+            self.hold[p, k] = self.refractory
+        return events
@@ -1,4 +1,10 @@
 # PoseEfxSwitch/guard_meta
+# Publishes the pose meta to the effects (guardedMeta): image size and aspect, every
+# upstream key (stage_matrix / stage_calib from stage_xform), and stage_px, the stage
+# units per camera pixel that effects use for sizes set in pixels. Without an
+# upstream stage_matrix the default stage space (stage_calib.uv_to_top) is published.
+import stage_calib
+
 TARGET_OP = 'guardedMeta'
 
 def _comp():
@@ -63,16 +69,6 @@ def _to_int(v, fallback=None):
     except Exception:
         return fallback
 
-def _safe_aspect(w, h):
-    w = _to_int(w, None)
-    h = _to_int(h, None)
-    if not w or not h:
-        return 1.0
-    try:
-        return round(float(w) / float(h), 6)
-    except Exception:
-        return 1.0
-
 def update_guard():
     """Merge upstream meta with defaults; ensure image_width, image_height, aspect."""
     #debug('db update_guard() called')
@@ -98,14 +94,24 @@ def update_guard():
     # 3) Aspect: prefer upstream if valid, else compute from resolved w/h.
     up_aspect = upstream.get('aspect', None)
     try:
-        aspect_val = float(up_aspect) if up_aspect is not None else _safe_aspect(w, h)
+        aspect_val = float(up_aspect) if up_aspect is not None else stage_calib.aspect(w, h)
     except Exception:
-        aspect_val = _safe_aspect(w, h)
+        aspect_val = stage_calib.aspect(w, h)
     _upsert(targetOp, 'aspect', aspect_val)
 
+    # 3b) Stage space for the effects: upstream matrix, else the default TOP mapping;
+    #     stage_px converts pixel sizes into it.
+    H = stage_calib.from_meta(upstream.get(stage_calib.META_MATRIX))
+    if H is None:
+        H = stage_calib.uv_to_top(aspect_val)
+        _upsert(targetOp, stage_calib.META_MATRIX, stage_calib.to_meta(H))
+    _upsert(targetOp, stage_calib.META_PIXEL,
+            round(stage_calib.pixel_scale(H, _to_int(w, dw), _to_int(h, dh)), 9))
+
     # 4) Mirror all other upstream keys (but don't overwrite the three we just set).
+    #    This carries stage_matrix / stage_calib (see stage_calib.py) through to the effects.
     for k, v in upstream.items():
-        if k in ('image_width', 'image_height', 'aspect'):
+        if k in ('image_width', 'image_height', 'aspect', stage_calib.META_PIXEL):
             continue
         _upsert(targetOp, k, v)
 
@@ -4,11 +4,42 @@
 # COMP has start/end landmark names  and radii parm
 # also image height/width, aspect, flipy param
 # does fancy manipulations 
+# inLandmarks are in stage space (stage_xform output via PersonRouter) and are used
+# as-is; nothing here converts coordinates. The *_px channel names are kept for the
+# existing instancing, but positions and lengths are stage units. Startradius /
+# Endradius stay in camera pixels and are scaled by stage_px from the nearest
+# 'inMeta' Table DAT (guard_meta), else 1 / Imageheight (default stage space).
+# When inLandmarks is a canvas_<name> CHOP (canvas_map_chop) the radii are canvas
+# pixels instead: stage_px = 1 / m_canvas_h.
+# Flipy is no longer used: stage space is always y up.
 # The results are output as new CHOP channels.
 
 
 import math
 
+META_DAT = 'inMeta'
+
+_meta_ops = {}      # owner path -> nearest inMeta DAT (or None)
+
+def _stage_px(owner_comp, source_chop):
+    """Stage units per pixel: canvas input, else the nearest inMeta up the parent chain."""
+    canvas_h = source_chop.chan('m_canvas_h')
+    if canvas_h is not None and canvas_h[0] > 0:
+        return 1.0 / canvas_h[0]
+    dat = _meta_ops.get(owner_comp.path)
+    if dat is None or not dat.valid:
+        dat, c = None, owner_comp
+        while c is not None and dat is None:
+            dat = c.op(META_DAT)
+            c = c.parent()
+        _meta_ops[owner_comp.path] = dat
+    cell = dat['stage_px', 'value'] if dat is not None and dat.isDAT else None
+    try:
+        v = float(cell.val) if cell else 0.0
+    except ValueError:
+        v = 0.0
+    return v if v > 0 else 1.0 / max(1, int(owner_comp.par.Imageheight))
+
 def cook(script_op):
     """
     This function is executed by the Script CHOP on every cook.
@@ -39,7 +70,8 @@ def cook(script_op):
         Handles virtual landmarks like 'hips_mid' and 'shoulders_mid' by
         first attempting to find pre-computed channels, and falling back to
         calculating them from their constituent parts if not found.
-        The 'z' channel is positional depth. Visibility is assumed to be 1.0.
+        The 'z' channel is positional depth. Visibility comes from the '_v'
+        channel when pose_fanout provides one, else 1.0.
         """
         # Handle virtual landmarks. Note: The landmark names for constituent parts
         # (e.g., 'hip_l') match the convention from landmark_names.csv.
@@ -52,10 +84,10 @@ def cook(script_op):
                 pass
             else:
                 # If not pre-computed, calculate it as a fallback.
-                left_x, left_y, left_z, _ = get_landmark_data('hip_l')
-                right_x, right_y, right_z, _ = get_landmark_data('hip_r')
-                # ignore Visibility for now, it is always 1.0.
-                return ((left_x + right_x) * 0.5, (left_y + right_y) * 0.5, (left_z + right_z) * 0.5, 1.0)
+                left_x, left_y, left_z, left_v = get_landmark_data('hip_l')
+                right_x, right_y, right_z, right_v = get_landmark_data('hip_r')
+                return ((left_x + right_x) * 0.5, (left_y + right_y) * 0.5, (left_z + right_z) * 0.5,
+                        min(left_v, right_v))
         
         if landmark_name == 'shoulder_mid':
             # First, check if a pre-computed version exists.
@@ -64,38 +96,25 @@ def cook(script_op):
                 pass
             else:
                 # Calculate as a fallback.
-                left_x, left_y, left_z, _ = get_landmark_data('shoulder_l')
-                right_x, right_y, right_z, _ = get_landmark_data('shoulder_r')
-                return ((left_x + right_x) * 0.5, (left_y + right_y) * 0.5, (left_z + right_z) * 0.5, 1.0)
+                left_x, left_y, left_z, left_v = get_landmark_data('shoulder_l')
+                right_x, right_y, right_z, right_v = get_landmark_data('shoulder_r')
+                return ((left_x + right_x) * 0.5, (left_y + right_y) * 0.5, (left_z + right_z) * 0.5,
+                        min(left_v, right_v))
 
         # For standard landmarks (or pre-computed virtual ones that fell through),
         # fetch their x, y, and z (visibility) channels.
         x = get_channel_value(f'{landmark_name}_x')
         y = get_channel_value(f'{landmark_name}_y')
         z = get_channel_value(f'{landmark_name}_z')
-        # Per request, visibility is not used from the data source.
-        # We return a 4-tuple to maintain a consistent function signature.
-        visibility = 1.0
+        # Visibility: '_v' channel if the sender provides it, else fully visible.
+        visibility = get_channel_value(f'{landmark_name}_v') if source_chop.chan(f'{landmark_name}_v') else 1.0
         return (x, y, z, visibility)
 
-    # Get image dimensions and flip settings from this component (owner_comp, the BoneUnit).
-    image_width = max(1, int(owner_comp.par.Imagewidth))
-    image_height = max(1, int(owner_comp.par.Imageheight))
-    flip_y = bool(owner_comp.par.Flipy)
-
-    # Get normalized coordinates [0,1] and visibility for start and end landmarks.
-    start_x_norm, start_y_norm, start_z_norm, _ = get_landmark_data(start_landmark_name)
-    end_x_norm, end_y_norm, end_z_norm, _ = get_landmark_data(end_landmark_name)
-
-    # Convert normalized [0,1] coordinates to pixel coordinates.
-    # using the parameters vs inMeta
-    start_x_px = start_x_norm * image_width
-    start_y_px = (1.0 - start_y_norm) * image_height if flip_y else start_y_norm * image_height
-    
-    end_x_px = end_x_norm * image_width
-    end_y_px = (1.0 - end_y_norm) * image_height if flip_y else end_y_norm * image_height
+    # Start and end landmarks (stage space) and visibility.
+    start_x_px, start_y_px, start_z, start_v = get_landmark_data(start_landmark_name)
+    end_x_px, end_y_px, end_z, end_v = get_landmark_data(end_landmark_name)
 
-    # --- Calculate segment properties in pixel space ---
+    # --- Calculate segment properties in stage space ---
 
     # 1. Center point of the segment.
     center_x_px = 0.5 * (start_x_px + end_x_px)
@@ -115,14 +134,14 @@ def cook(script_op):
     dir_x = math.cos(angle_rad)
     dir_y = math.sin(angle_rad)
 
-    # 4. Alpha, based on visibility.
-    # Per request, visibility is not used from the data source and alpha is
-    # always 1.0. The original logic is removed.
-    final_alpha = 1.0
+    # 4. Alpha, based on visibility: the less visible endpoint, clamped to 0..1
+    # (1.0 when the stream has no _v channels).
+    final_alpha = max(0.0, min(1.0, min(start_v, end_v)))
 
     # grab some parameters to stuff them into channels
-    r0 = float(owner_comp.par.Startradius)  # or your exact par names
-    r1 = float(owner_comp.par.Endradius)
+    px = _stage_px(owner_comp, source_chop)
+    r0 = float(owner_comp.par.Startradius) * px  # radii are set in camera pixels
+    r1 = float(owner_comp.par.Endradius) * px
     ravg = 0.5*(r0+r1)
     # scale attributes
     sx = ravg
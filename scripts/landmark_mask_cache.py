@@ -0,0 +1,179 @@
+# scripts/landmark_mask_cache.py
+# Process-wide cache of parsed landmark mask CSVs and the LandmarkFilterMenu manifest.
+#
+# Put this in a Text DAT named 'landmark_mask_cache' (File = scripts/landmark_mask_cache.py)
+# inside /local/modules so every LandmarkSelect imports the same module instance:
+#     import landmark_mask_cache
+#
+# Entries are keyed by absolute path and re-parsed only when the file's mtime/size
+# changes. Without the watcher, each lookup costs one os.stat(). With the watcher
+# running, lookups never touch the disk: a background thread stats the known files
+# and flags changes, and Poll() (called once per frame from an Execute DAT on the
+# main thread) re-parses them and notifies the registered LandmarkSelect COMPs.
+#
+#   Execute DAT (onFrameStart):
+#       def onFrameStart(frame):
+#           mod.landmark_mask_cache.Poll()
+
+import os
+import csv
+import threading
+
+HEADER_KEYS = ('key', 'name', 'landmark')
+WATCH_INTERVAL_S = 0.5
+
+_lock = threading.Lock()
+_entries = {}        # abs path -> {'sig': (mtime, size) | None, 'kind': 'mask'|'rows', 'data': ...}
+_changed = set()     # paths flagged by the watcher, drained by Poll()
+_listeners = set()   # COMP paths of LandmarkSelect instances to notify
+_watcher = None
+
+
+# --- parsing -----------------------------------------------------------------
+def _sig(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _parse_rows(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return [[c.strip() for c in row] for row in csv.reader(f)]
+
+def _parse_mask(path):
+    """First column of every non-empty row, header row ('key'/'name'/'landmark') skipped."""
+    rows = [r for r in _parse_rows(path) if r and r[0]]
+    if rows and rows[0][0].lower() in HEADER_KEYS:
+        rows = rows[1:]
+    return [r[0] for r in rows]
+
+_PARSERS = {'mask': _parse_mask, 'rows': _parse_rows}
+
+def _get(path, kind):
+    path = os.path.normpath(path)
+    with _lock:
+        ent = _entries.get(path)
+        trust = ent is not None and _watcher is not None and path not in _changed
+    if trust:
+        return ent['data']
+
+    sig = _sig(path)
+    if ent is not None and ent['sig'] == sig and ent['kind'] == kind:
+        return ent['data']
+
+    data = None
+    if sig is not None:
+        try:
+            data = _PARSERS[kind](path)
+        except Exception as e:
+            debug(f"landmark_mask_cache: failed to parse {path}: {e}")
+    with _lock:
+        _entries[path] = {'sig': sig, 'kind': kind, 'data': data}
+        _changed.discard(path)
+    return data
+
+
+# --- public API --------------------------------------------------------------
+def GetMask(path):
+    """Landmark names from a mask CSV, or None if missing/unreadable."""
+    return _get(path, 'mask')
+
+def GetRows(path):
+    """All rows of a CSV (cells stripped), e.g. the menu manifest; None if missing."""
+    return _get(path, 'rows')
+
+def Register(comp):
+    """Ask for OnMaskFilesChanged(paths) calls on comp's LandmarkSelectExt."""
+    with _lock:
+        _listeners.add(comp.path)
+
+def Unregister(comp):
+    _unregister_path(comp.path)
+
+def _unregister_path(cpath):
+    with _lock:
+        _listeners.discard(cpath)
+
+def Invalidate(path=None):
+    """Drop one cached file (or all) so the next lookup re-reads it."""
+    with _lock:
+        if path is None:
+            _entries.clear()
+        else:
+            _entries.pop(os.path.normpath(path), None)
+
+def Poll():
+    """
+    Main-thread hook, once per frame. Re-parses files the watcher flagged and
+    notifies listeners. Without a watcher this is a no-op.
+    """
+    with _lock:
+        if not _changed:
+            return []
+        paths = list(_changed)
+        _changed.clear()
+        listeners = list(_listeners)
+
+    reloaded = []
+    for path in paths:
+        ent = _entries.get(path)
+        if ent is None:
+            continue
+        sig = _sig(path)
+        data = None
+        if sig is not None:
+            try:
+                data = _PARSERS[ent['kind']](path)
+            except Exception as e:
+                debug(f"landmark_mask_cache: failed to parse {path}: {e}")
+        with _lock:
+            _entries[path] = {'sig': sig, 'kind': ent['kind'], 'data': data}
+        reloaded.append(path)
+
+    if reloaded:
+        debug(f"landmark_mask_cache: reloaded {reloaded}")
+        for cpath in listeners:
+            o = op(cpath)
+            if o is None:
+                _unregister_path(cpath)
+                continue
+            ext = getattr(o.ext, 'LandmarkSelectExt', None)
+            if ext:
+                ext.OnMaskFilesChanged(reloaded)
+    return reloaded
+
+
+# --- optional background watcher ---------------------------------------------
+class _Watcher(threading.Thread):
+    """Stats cached files off the main thread; never touches TD objects."""
+    def __init__(self, interval):
+        super().__init__(name='landmark_mask_cache', daemon=True)
+        self.interval = interval
+        self.stop_evt = threading.Event()
+
+    def run(self):
+        while not self.stop_evt.wait(self.interval):
+            with _lock:
+                snap = [(p, e['sig']) for p, e in _entries.items()]
+            for path, sig in snap:
+                if _sig(path) != sig:
+                    with _lock:
+                        _changed.add(path)
+
+def StartWatcher(interval=WATCH_INTERVAL_S):
+    """Start the background watcher (idempotent)."""
+    global _watcher
+    with _lock:
+        if _watcher is not None and _watcher.is_alive():
+            return
+        _watcher = _Watcher(interval)
+        _watcher.start()
+    debug(f"landmark_mask_cache: watcher started ({interval}s)")
+
+def StopWatcher():
+    global _watcher
+    with _lock:
+        w, _watcher = _watcher, None
+    if w is not None:
+        w.stop_evt.set()
@@ -0,0 +1,20 @@
+# landmark_mask_cache_exec
+# Execute DAT next to /local/modules/landmark_mask_cache.
+# Turn on the Start, Frame Start and Exit toggles.
+# Set WATCH = False to keep the mtime-checked cache without the background thread.
+
+WATCH = True
+
+def onStart():
+    if WATCH:
+        mod.landmark_mask_cache.StartWatcher()
+    return
+
+def onFrameStart(frame):
+    # Re-parses edited CSVs and notifies LandmarkSelect COMPs; no-op when nothing changed
+    mod.landmark_mask_cache.Poll()
+    return
+
+def onExit():
+    mod.landmark_mask_cache.StopWatcher()
+    return
@@ -0,0 +1,185 @@
+# scripts/mod_matrix.py
+# Pose-driven parameter modulation for PoseEffect_* components.
+#
+# Each effect may carry a Table DAT 'mod_matrix' (File = data/mod_matrix_<Effect>.csv)
+# and a CHOP 'mod_source' (Select/Null of the pose or feature channels):
+#
+#   source,target,curve,in_min,in_max,out_min,out_max,epsilon
+#   p1_wrist_r_y,Uidotsize,smooth,1,0,4,40,0.05
+#
+#   source   channel name in mod_source
+#   target   fxCore par name (tuplet components by full name: Uicolorr, Uicolorg, ...);
+#            schema-style spellings (UiDotSize) resolve through fx_schema.par_name
+#   curve    linear | smooth | ease_in | ease_out | step
+#   in_*     input range, normalised to 0..1 and clamped (in_min > in_max inverts)
+#   out_*    output range
+#   epsilon  optional; the par is written only when it moves more than this
+# Rows with the same target add up.
+#
+# The table is compiled into index/range arrays (recompiled when the table or the
+# source channel names change); Evaluate() then does one numpy pass per frame over
+# the source vector and writes only the targets that changed beyond epsilon.
+# PoseEfxSwitchExt.OnFrameStart calls Evaluate() for the active effect.
+# Unresolved targets and sources are logged once per effect and table.
+#
+# Precedence: a modulated par follows the pose. A preset recall or an OSC 'set' on it
+# holds only until its source moves again. A running preset morph wins: its pars are
+# passed as `hold` and left alone, then re-written from the pose when the morph ends.
+#
+# Put this in a Text DAT named 'mod_matrix' in /local/modules.
+
+import numpy as np
+
+import fx_schema
+
+MATRIX_DAT = 'mod_matrix'
+SOURCE_CHOP = 'mod_source'
+DEFAULT_EPSILON = 1e-4
+
+CURVES = ('linear', 'smooth', 'ease_in', 'ease_out', 'step')
+
+_state = {}     # effect path -> {'sig', 'm': ModMatrix, 'pars': [Par], 'names', 'isint', 'last'}
+_warned = set() # (effect path, message) already logged
+
+
+class ModMatrix:
+    """Compiled matrix: rows resolved against a list of source names and target names."""
+
+    def __init__(self, rows, source_names):
+        src_index = {n: i for i, n in enumerate(source_names)}
+        src, tgt, curve, lo, hi, olo, ohi, eps = [], [], [], [], [], [], [], []
+        self.targets = []
+        tindex = {}
+        self.missing = []
+        for r in rows:
+            s = r.get('source', '').strip()
+            t = r.get('target', '').strip()
+            if not s or not t:
+                continue
+            if s not in src_index:
+                self.missing.append(s)
+                continue
+            if t not in tindex:
+                tindex[t] = len(self.targets)
+                self.targets.append(t)
+            c = (r.get('curve') or 'linear').strip().lower()
+            src.append(src_index[s])
+            tgt.append(tindex[t])
+            curve.append(CURVES.index(c) if c in CURVES else 0)
+            lo.append(_num(r.get('in_min'), 0.0))
+            hi.append(_num(r.get('in_max'), 1.0))
+            olo.append(_num(r.get('out_min'), 0.0))
+            ohi.append(_num(r.get('out_max'), 1.0))
+            eps.append(_num(r.get('epsilon'), DEFAULT_EPSILON))
+        self.src = np.array(src, dtype=np.intp)
+        self.tgt = np.array(tgt, dtype=np.intp)
+        self.curve = np.array(curve, dtype=np.int8)
+        self.in_lo = np.array(lo, dtype=np.float64)
+        span = np.array(hi, dtype=np.float64) - self.in_lo
+        self.in_inv = np.where(span != 0.0, 1.0 / np.where(span != 0.0, span, 1.0), 0.0)
+        self.out_lo = np.array(olo, dtype=np.float64)
+        self.out_span = np.array(ohi, dtype=np.float64) - self.out_lo
+        # per target: smallest epsilon of its rows
+        self.eps = np.full(len(self.targets), np.inf)
+        np.minimum.at(self.eps, self.tgt, np.array(eps, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.src)
+
+    def evaluate(self, values):
+        """values: 1-D source vector. Returns one summed value per target."""
+        x = np.clip((values[self.src] - self.in_lo) * self.in_inv, 0.0, 1.0)
+        c = self.curve
+        y = np.select(
+            [c == 1, c == 2, c == 3, c == 4],
+            [x * x * (3.0 - 2.0 * x), x * x, 1.0 - (1.0 - x) * (1.0 - x), (x >= 0.5).astype(np.float64)],
+            default=x)
+        out = np.zeros(len(self.targets))
+        np.add.at(out, self.tgt, self.out_lo + y * self.out_span)
+        return out
+
+
+def _num(v, default):
+    try:
+        return float(v) if v is not None and str(v).strip() != '' else default
+    except ValueError:
+        return default
+
+def _rows(dat):
+    header = [c.val.strip().lower() for c in dat.row(0)]
+    return [{h: c.val for h, c in zip(header, r)} for r in dat.rows()[1:]]
+
+
+# --- TD side --------------------------------------------------------------------
+def Invalidate(fx_path=None):
+    if fx_path is None:
+        _state.clear()
+    else:
+        _state.pop(fx_path, None)
+
+def _warn_once(fx, msg):
+    key = (fx.path, msg)
+    if key not in _warned:
+        _warned.add(key)
+        debug(f"mod_matrix: {fx.name} {msg}")
+
+def _resolve(core, name):
+    """Par for a target name as written, else its TD-normalised spelling."""
+    if core is None:
+        return None
+    p = getattr(core.par, name, None)
+    return p if p is not None else getattr(core.par, fx_schema.par_name(name), None)
+
+def Evaluate(fx, hold=None):
+    """
+    One modulation pass for an effect; cheap no-op without mod_matrix/mod_source.
+    hold: par names owned by something else this frame (a preset morph); skipped.
+    """
+    mat = fx.op(MATRIX_DAT)
+    src = fx.op(SOURCE_CHOP)
+    if mat is None or src is None or mat.numRows < 2 or src.numChans == 0:
+        return 0
+
+    chans = tuple(c.name for c in src.chans())
+    sig = (mat.text, chans)
+    st = _state.get(fx.path)
+    if st is None or st['sig'] != sig:
+        st = _compile(fx, mat, chans, sig)
+
+    m = st['m']
+    if not len(m):
+        return 0
+    out = m.evaluate(src.numpyArray()[:, -1].astype(np.float64))
+    out = np.where(st['isint'], np.rint(out), out)
+    moved = ~(np.abs(out - st['last']) <= m.eps)    # NaN (first pass, after a hold) counts as moved
+    if hold:
+        held = np.fromiter((n in hold for n in st['names']), dtype=bool, count=len(st['names']))
+        st['last'][held] = np.nan
+        moved &= ~held
+    changed = np.flatnonzero(moved)
+    for i in changed:
+        p = st['pars'][i]
+        if not p.valid:
+            Invalidate(fx.path)
+            return 0
+        p.val = int(out[i]) if st['isint'][i] else float(out[i])
+    st['last'][changed] = out[changed]
+    return len(changed)
+
+def _compile(fx, mat, chans, sig):
+    core = fx.op('fxCore')
+    m = ModMatrix(_rows(mat), chans)
+    pars = [_resolve(core, t) for t in m.targets]
+    if any(p is None for p in pars):
+        bad = [t for t, p in zip(m.targets, pars) if p is None]
+        _warn_once(fx, f"unknown targets {bad} on {core.path if core else 'missing fxCore'}")
+        rows = [r for r in _rows(mat) if r.get('target', '').strip() not in bad]
+        m = ModMatrix(rows, chans)
+        pars = [p for p in pars if p is not None]
+    if m.missing:
+        _warn_once(fx, f"sources not in {SOURCE_CHOP}: {sorted(set(m.missing))}")
+    st = {'sig': sig, 'm': m, 'pars': pars, 'names': [p.name for p in pars],
+          'isint': np.array([p.isInt or p.isToggle for p in pars], dtype=bool),
+          'last': np.full(len(pars), np.nan)}
+    _state[fx.path] = st
+    return st
@@ -0,0 +1,127 @@
+# scripts/osc_codec.py
+# Minimal OSC 1.0 encoder/decoder (messages + bundles), pure Python.
+#
+# TD's OSC Out DAT sendOSC() sends one message at a time; to reply with many
+# values in a single packet we build the bundle here and send it with
+# oscOut.sendBytes(). Also used off the main thread by the ShowControlIO service,
+# so nothing in this module touches TouchDesigner objects.
+
+import struct
+
+IMMEDIATE = 1  # OSC timetag meaning "now"
+BUNDLE_TAG = b'#bundle\0'
+
+
+def _pad(b):
+    return b + b'\0' * (4 - len(b) % 4)
+
+def _pad_blob(b):
+    return b + b'\0' * (-len(b) % 4)
+
+def _str(s):
+    return _pad(s.encode('utf-8'))
+
+
+def encode_message(address, args=()):
+    """Encode one OSC message. ints -> i/h, floats -> f, str -> s, bool -> T/F, bytes -> b."""
+    tags = [',']
+    data = []
+    for a in args:
+        if a is True:
+            tags.append('T')
+        elif a is False:
+            tags.append('F')
+        elif a is None:
+            tags.append('N')
+        elif isinstance(a, int):
+            if -2**31 <= a < 2**31:
+                tags.append('i'); data.append(struct.pack('>i', a))
+            else:
+                tags.append('h'); data.append(struct.pack('>q', a))
+        elif isinstance(a, float):
+            tags.append('f'); data.append(struct.pack('>f', a))
+        elif isinstance(a, (bytes, bytearray)):
+            tags.append('b'); data.append(struct.pack('>i', len(a)) + _pad_blob(bytes(a)))
+        else:
+            tags.append('s'); data.append(_str(str(a)))
+    return _str(address) + _str(''.join(tags)) + b''.join(data)
+
+def encode_bundle(messages, timetag=IMMEDIATE):
+    """Wrap already-encoded messages (or bundles) into one bundle."""
+    parts = [BUNDLE_TAG, struct.pack('>Q', timetag)]
+    for m in messages:
+        parts.append(struct.pack('>i', len(m)))
+        parts.append(m)
+    return b''.join(parts)
+
+def encode_bundles(messages, max_bytes=8192, timetag=IMMEDIATE):
+    """Split encoded messages into as few bundles as fit within max_bytes each."""
+    out, cur, size = [], [], 16
+    for m in messages:
+        need = 4 + len(m)
+        if cur and size + need > max_bytes:
+            out.append(encode_bundle(cur, timetag))
+            cur, size = [], 16
+        cur.append(m); size += need
+    if cur:
+        out.append(encode_bundle(cur, timetag))
+    return out
+
+
+def _read_str(data, i):
+    end = data.index(b'\0', i)
+    s = data[i:end].decode('utf-8', 'replace')
+    return s, (end + 4) & ~3
+
+def decode_message(data):
+    """Return (address, [args]) for one encoded message. Raises ValueError if malformed."""
+    try:
+        addr, i = _read_str(data, 0)
+        if not addr.startswith('/'):
+            raise ValueError(f'bad OSC address {addr!r}')
+        if i >= len(data):
+            return addr, []
+        tags, i = _read_str(data, i)
+        if not tags.startswith(','):
+            raise ValueError('missing type tags')
+        args = []
+        for t in tags[1:]:
+            if t == 'i':
+                args.append(struct.unpack_from('>i', data, i)[0]); i += 4
+            elif t == 'f':
+                args.append(struct.unpack_from('>f', data, i)[0]); i += 4
+            elif t == 'h':
+                args.append(struct.unpack_from('>q', data, i)[0]); i += 8
+            elif t == 'd':
+                args.append(struct.unpack_from('>d', data, i)[0]); i += 8
+            elif t == 's' or t == 'S':
+                s, i = _read_str(data, i); args.append(s)
+            elif t == 'b':
+                n = struct.unpack_from('>i', data, i)[0]; i += 4
+                args.append(bytes(data[i:i + n])); i += (n + 3) & ~3
+            elif t == 'T':
+                args.append(True)
+            elif t == 'F':
+                args.append(False)
+            elif t == 'N':
+                args.append(None)
+            else:
+                raise ValueError(f'unsupported OSC type tag {t!r}')
+        return addr, args
+    except (struct.error, IndexError) as e:
+        raise ValueError(f'truncated OSC message: {e}')
+
+def decode_packet(data):
+    """Decode a packet (message or nested bundles) into a flat list of (address, args)."""
+    data = bytes(data)
+    if not data.startswith(BUNDLE_TAG):
+        return [decode_message(data)]
+    out = []
+    i = 16
+    while i + 4 <= len(data):
+        n = struct.unpack_from('>i', data, i)[0]; i += 4
+        if n <= 0 or i + n > len(data):
+            raise ValueError('bad bundle element size')
+        out.extend(decode_packet(data[i:i + n]))
+        i += n
+    return out
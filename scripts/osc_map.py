@@ -1,25 +1,161 @@
 # td/scripts/osc_map.py
 # Map show-control OSC messages to ui_panel custom parameters.
+#
+# The mapping lives in ui/osc_map.csv (header: address,param,type,action,step) and is
+# compiled into an address -> handler dict. Actions:
+#   set       value = args[0] coerced to type; continuous, last value per frame wins
+#   relative  par += step on a press: no arg, or a first arg > 0 (button release 0 is
+#             ignored); steps within a frame add up
+#   delta     par += args[0] * step, for encoders that send signed increments
+#   pulse     par.pulse()
+# Handlers only record intent. Flush() applies everything once per frame, so a fader
+# streaming at 200 Hz costs one parameter write per TD frame. Flush() also re-compiles
+# the table when the CSV changes on disk (checked at most every RELOAD_CHECK_S).
+#
+# Wiring: OSC In DAT Callbacks = this DAT; an Execute DAT (scripts/osc_map_exec.py)
+# calls op('osc_map').module.Flush() on frame start. When the ShowControlIO service
+# owns the control port, osc_router calls Dispatch() for /show/* instead.
 
+import os
+import csv
+import time
+
+OSC_MAP_CSV = 'ui/osc_map.csv'
+RELOAD_CHECK_S = 1.0
+
+_COERCE = {
+    'int':   lambda v: int(float(v)),
+    'float': float,
+    'str':   str,
+    'bool':  lambda v: 1 if str(v).strip().lower() in ('1', 'true', 'on', 'yes') else 0,
+    '':      lambda v: v,
+}
+
+_table = {}        # address -> handler(args)
+_sig = None        # (mtime, size) of the compiled CSV
+_last_check = 0.0
+
+_pending = {}      # par name -> value        (set)
+_deltas = {}       # par name -> accumulated  (relative, delta)
+_pulses = []       # par names, in arrival order (pulse)
+
+
+# --- compile -----------------------------------------------------------------
+def _csv_path():
+    return os.path.normpath(os.path.join(project.folder, OSC_MAP_CSV))
+
+def _make_handler(action, pname, conv, step):
+    if action == 'set':
+        def h(args):
+            _pending[pname] = conv(args[0])
+    elif action == 'relative':
+        def h(args):
+            if not args or float(args[0]) > 0:
+                _deltas[pname] = _deltas.get(pname, 0.0) + step
+    elif action == 'delta':
+        def h(args):
+            if args:
+                _deltas[pname] = _deltas.get(pname, 0.0) + float(args[0]) * step
+    elif action == 'pulse':
+        def h(args):
+            _pulses.append(pname)
+    else:
+        return None
+    return h
+
+def _compile(path):
+    table = {}
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+            addr, pname = row.get('address', ''), row.get('param', '')
+            if not addr or not pname:
+                continue
+            action = (row.get('action') or 'set').lower()
+            conv = _COERCE.get((row.get('type') or '').lower(), _COERCE[''])
+            try:
+                step = float(row.get('step') or 1.0)
+            except ValueError:
+                step = 1.0
+            h = _make_handler(action, pname, conv, step)
+            if h is None:
+                debug(f"osc_map: unknown action '{action}' for {addr}")
+                continue
+            table[addr] = h
+    return table
+
+def Reload(force=False):
+    """Re-compile ui/osc_map.csv if it changed (or always, with force)."""
+    global _table, _sig, _last_check
+    _last_check = time.monotonic()
+    path = _csv_path()
+    try:
+        st = os.stat(path)
+        sig = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        if _sig is not None:
+            debug(f"osc_map: {path} missing, keeping last table")
+        return False
+    if not force and sig == _sig:
+        return False
+    try:
+        _table = _compile(path)
+        _sig = sig
+        debug(f"osc_map: compiled {len(_table)} routes from {path}")
+        return True
+    except Exception as e:
+        debug(f"osc_map: failed to compile {path}: {e}")
+        return False
+
+
+# --- runtime -----------------------------------------------------------------
 def onReceiveOSC(dat, rowIndex, message, bytes, timeStamp, address, args, peer):
-    ui = parent()
+    Dispatch(address, args)
+    return
+
+def Dispatch(address, args):
+    """Record one /show/* command; applied by the next Flush()."""
+    if _sig is None:
+        Reload(force=True)
+    h = _table.get(address)
+    if h is None:
+        return
     try:
-        if address == '/show/efx/select':
-            ui.par.Activeeffect = int(args[0])
-        elif address == '/show/efx/next':
-            ui.par.Activeeffect = int(ui.par.Activeeffect) + 1
-        elif address == '/show/fader':
-            ui.par.Fader = float(args[0])
-        elif address == '/show/person/id':
-            ui.par.Personid = int(args[0])
-        elif address == '/show/mask':
-            ui.par.Mask = str(args[0])
-        elif address == '/show/posecam/start':
-            ui.par.Start.pulse()
-        elif address == '/show/posecam/stop':
-            ui.par.Stop.pulse()
-        elif address == '/show/blackout':
-            ui.par.Blackout = int(args[0])
-    except Exception:
-        pass
+        h(args)
+    except Exception as e:
+        debug(f"osc_map: bad args for {address} {args}: {e}")
+    return
+
+def Flush():
+    """Apply this frame's coalesced changes to ui_panel; called once per frame."""
+    if time.monotonic() - _last_check >= RELOAD_CHECK_S:
+        Reload()
+    if not (_pending or _deltas or _pulses):
+        return
+
+    ui = parent()
+    for pname, val in _pending.items():
+        p = getattr(ui.par, pname, None)
+        if p is None:
+            continue
+        try:
+            if p.eval() != val:
+                p.val = val
+        except Exception as e:
+            debug(f"osc_map: set {pname}={val} failed: {e}")
+    for pname, d in _deltas.items():
+        p = getattr(ui.par, pname, None)
+        if p is None:
+            continue
+        try:
+            v = p.eval() + d
+            p.val = int(round(v)) if p.isInt else v
+        except Exception as e:
+            debug(f"osc_map: {pname}+={d} failed: {e}")
+    for pname in _pulses:
+        p = getattr(ui.par, pname, None)
+        if p is not None:
+            p.pulse()
+
+    _pending.clear(); _deltas.clear(); del _pulses[:]
     return
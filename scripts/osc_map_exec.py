@@ -0,0 +1,10 @@
+# ui_panel / osc_map_exec (Execute DAT, Frame Start toggle on)
+# Applies the show-control OSC messages osc_map collected during the last frame.
+
+def onStart():
+    op('osc_map').module.Reload(force=True)
+    return
+
+def onFrameStart(frame):
+    op('osc_map').module.Flush()
+    return
@@ -1,10 +1,78 @@
 # /scripts/osc_router.py
 #
 # Attach as a Text DAT inside /ShowControlIO named "osc_router"
-# A DAT Execute DAT watches the OSC In DAT and calls route(dat,row)
+# A DAT Execute DAT watches the OSC In DAT and calls route(dat,row). route() does not
+# know the sender; to have it, call receive(address, args, (peer.address, peer.port))
+# from the OSC In DAT's onReceiveOSC callback instead.
+#
+# Exposed parameters are resolved once per effect into a schema (ordered names plus
+# Par handles). Its cheap signature (schema hash, custom page layout, expose_params
+# rows) is re-checked when the active effect changes, on every query / subscribe
+# snapshot, and every SCHEMA_CHECK_FRAMES frames while publishing, so pages added to
+# the current effect are picked up without /pose2art/fx/rescan. InvalidateSchema()
+# or /pose2art/fx/rescan still drop it explicitly. Query replies go out as OSC bundles
+# built by osc_codec (Text DAT in /local/modules) and sent with sendBytes().
+#
+# Clients can also subscribe instead of polling:
+#   /pose2art/subscribe <host> <port> [max_rate_hz]   (re-send as keepalive)
+#   /pose2art/keepalive <host> <port>
+#   /pose2art/unsubscribe <host> <port>
+# <host> <port> default to the sender. Naming another target is refused unless the
+# sender is on loopback or in SUB_ALLOW_HOSTS; when the sender is unknown (route()),
+# the target itself must be loopback or allow-listed (osc_subscriptions.resolve_target).
+# An Execute DAT (scripts/osc_router_exec.py) calls PublishChanges() each frame; changed
+# exposed values go to every subscriber as delta bundles via osc_subscriptions.
+#
+# Instead of the OSC In DAT, the asyncio ShowControlIO service (showcontrol_io) can own
+# the control port: StartServer() runs it on a thread, DrainServer() (frame start in
+# osc_router_exec) dispatches the validated, rate-limited, coalesced batch, and
+# /show/* commands are handed to the ui_panel osc_map. Handler errors are logged with
+# a traceback and counted instead of being swallowed. SERVER_PORT is CtlInPort, which
+# osc_ctl already listens on: it is off by default (USE_SERVER in osc_router_exec),
+# and osc_ctl must be turned off before switching it on.
+#
+# Presets of the active effect (stored on PoseEfxSwitch, see PoseEfxSwitchExt):
+#   /pose2art/preset/save <name>
+#   /pose2art/preset/recall <name> [seconds]      (seconds > 0 morphs)
+#   /pose2art/preset/morph <from> <to> <seconds>  (from '' = current values)
+#   /pose2art/preset/delete <name>
+#   /pose2art/preset/list                         -> bundle of /pose2art/preset/list <name>
+#
+# Emit(address, *args) sends pose-driven events (gestures, zones, contacts) to the
+# feedback OSC Out and queues them for subscribers. /pose2art/gestures/* (record,
+# stop, capture, reload) is handed to the gesture Script CHOP callbacks (GESTURE_DAT).
 
+import traceback
 from typing import Any
 
+import fx_schema
+import osc_codec
+import osc_subscriptions
+import showcontrol_io
+
+MAX_BUNDLE_BYTES = 8192
+
+_schemas = {}          # fxCore path -> {'sig', 'names': [...], 'pars': {name: Par}, 'routes'}
+_last_core_path = None
+SCHEMA_CHECK_FRAMES = 30
+_pub_frame = 0
+
+SUB_TTL_S = 10.0
+SUB_RATE_HZ = 30.0
+SUB_ALLOW_HOSTS = ()   # senders that may subscribe another host (loopback always may)
+_hub = None            # osc_subscriptions.SubscriptionHub, created on first subscribe
+_pub_core = None       # fxCore path the published values belong to
+_pub_values = {}       # par name -> last published value
+_MISSING = object()
+
+SERVER_PORT = 7500
+SHOW_MAP_DAT = '/ui_panel/osc_map'   # Dispatch() target for /show/* commands
+GESTURE_DAT = '/PoseCam/gestures_callbacks'   # Dispatch() target for /pose2art/gestures/*
+METRICS_DAT = 'io_metrics'           # optional Table DAT, refreshed about once a second
+_server = None
+_errors = 0
+_metrics_frame = 0
+
 def _fxswitch():
     return op('/EfxSwitch')
 
@@ -18,22 +86,56 @@ def _active_fxcore():
     return fx.op('fxCore') if fx else None
 
 def _discover_params(core):
+    """Exposed names via fx_schema (par_schema > expose_params > Ui* prefix), same as UI_Builder."""
+    return fx_schema.ExposedNames(core)
+
+def _schema_sig(core):
+    """Cheap layout signature: schema hash, custom pages with their par counts + expose_params rows."""
+    t = core.op('expose_params')
+    return (core.id, fx_schema.SchemaHash(core),
+            tuple((pg.name, len(pg.pars)) for pg in core.customPages),
+            t.numRows if t else -1)
+
+def _schema(core, verify=False):
     """
-    Discovery = Ui* parameters PLUS any in fxCore/expose_params (single column).
-    Same rule as UI_Builder.
+    Per-effect parameter schema; rebuilt only on first use, layout change or invalidation.
+    The layout signature is compared on an effect switch, or always with verify=True.
     """
-    names = set()
-    # A) Ui* prefix
-    for p in core.customPars:
-        if p.name.startswith(('Ui','UI','ui')):
-            names.add(p.name)
-    # B) expose_params DAT
-    t = core.op('expose_params')
-    if t:
-        for r in t.rows():
-            if r and r[0].val.strip():
-                names.add(r[0].val.strip())
-    return [n for n in sorted(names) if hasattr(core.par, n)]
+    global _last_core_path
+    s = _schemas.get(core.path)
+    if s is not None and (verify or _last_core_path != core.path):
+        if s['sig'] != _schema_sig(core):
+            s = None
+    _last_core_path = core.path
+    if s is None:
+        names = _discover_params(core)
+        s = {'sig': _schema_sig(core),
+             'names': names,
+             'pars': {n: getattr(core.par, n) for n in names},
+             'routes': fx_schema.RouteTable(core)}
+        _schemas[core.path] = s
+    return s
+
+def InvalidateSchema(core_path=None):
+    """Forget one effect's schema (by fxCore path) or all of them."""
+    if core_path is None:
+        _schemas.clear()
+    else:
+        _schemas.pop(core_path, None)
+
+def _resolve_par(core, pname):
+    """Pre-resolved Par handle for pname; non-exposed names are looked up once and cached."""
+    s = _schema(core)
+    p = s['pars'].get(pname)
+    if p is not None and not p.valid:
+        InvalidateSchema(core.path)
+        s = _schema(core)
+        p = s['pars'].get(pname)
+    if p is None:
+        p = getattr(core.par, pname, None)
+        if p is not None:
+            s['pars'][pname] = p
+    return p
 
 def _send_feedback(addr: str, *args: Any):
     """Send OSC reply out ShowControlIO/osc_out1"""
@@ -41,6 +143,15 @@ def _send_feedback(addr: str, *args: Any):
     if out:
         out.sendOSC(addr, list(args))
 
+def _send_bundle(messages):
+    """Send (addr, args) pairs as OSC bundle(s) out ShowControlIO/osc_out1."""
+    out = op('osc_out1')
+    if not out or not messages:
+        return
+    encoded = [osc_codec.encode_message(a, args) for a, args in messages]
+    for packet in osc_codec.encode_bundles(encoded, MAX_BUNDLE_BYTES):
+        out.sendBytes(packet)
+
 def route(dat, row):
     """Main entrypoint called by DAT Execute on OSC In"""
     try:
@@ -49,50 +160,82 @@ def route(dat, row):
     except Exception as e:
         debug("osc_router.route bad row", e)
         return
+    dispatch(addr, args)
 
+def receive(addr, args, peer):
+    """Entry from an OSC In DAT onReceiveOSC callback, with the sender (host, port)."""
+    dispatch(addr, list(args), peer)
+
+def dispatch(addr, args, peer=None):
+    """Run the handler for one command; errors are logged, counted and not re-raised."""
+    global _errors
+    try:
+        _dispatch(addr, args, peer)
+    except Exception:
+        _errors += 1
+        debug(f"osc_router: error handling {addr} {args}\n{traceback.format_exc()}")
+
+def _dispatch(addr, args, peer):
     if addr == '/pose2art/fx/list':
         _handle_list()
     elif addr == '/pose2art/fx/query':
         _handle_query()
+    elif addr == '/pose2art/fx/rescan':
+        InvalidateSchema()
+        _handle_query()
     elif addr.startswith('/pose2art/fx/param/'):
         _handle_param(addr, args)
+    elif addr.startswith('/pose2art/preset/'):
+        _handle_preset(addr, args)
+    elif addr in ('/pose2art/subscribe', '/pose2art/keepalive', '/pose2art/unsubscribe'):
+        _handle_subscription(addr, args, peer)
+    elif addr.startswith('/show/'):
+        m = op(SHOW_MAP_DAT)
+        if m:
+            m.module.Dispatch(addr, args)
+    elif addr.startswith('/pose2art/gestures/'):
+        g = op(GESTURE_DAT)
+        if g:
+            g.module.Dispatch(addr, args)
     else:
         debug("osc_router: unhandled", addr, args)
 
 def _handle_list():
-    sw = _fxswitch()
-    effs = [c for c in sw.op('effects').children if c.name.startswith('PoseEffect_')]
-    labels = []
-    for fx in effs:
-        # prefer UiDisplayName, else derive from OP name
-        disp = getattr(fx.par, 'Uidisplayname', None)
-        if disp:
-            val = (disp.eval() or '').strip()
-            if val and val.lower() != 'master':
-                labels.append(val)
-                continue
-        labels.append(fx.name.replace('PoseEffect_', '').replace('_',' ').title())
+    # Shared, cached registry on the switch (labels: UiDisplayName, else pretty OP name)
+    reg = _fxswitch().ext.PoseEfxSwitchExt
     # Send back as list of (opName,label) pairs
-    for fx,label in zip(effs, labels):
-        _send_feedback('/pose2art/fx/list', fx.name, label)
+    for fx in reg.Effects():
+        _send_feedback('/pose2art/fx/list', fx.name, reg.EffectLabel(fx.name))
 
 def _handle_query():
     core = _active_fxcore()
     if not core:
         return
-    for pname in _discover_params(core):
-        p = getattr(core.par, pname)
-        val = p.eval()
-        _send_feedback('/pose2art/fx/param', pname, str(val))
+    s = _schema(core, verify=True)
+    if not all(s['pars'][n].valid for n in s['names']):
+        # a parameter was deleted/renamed in place; rebuild once
+        InvalidateSchema(core.path)
+        s = _schema(core)
+    msgs = [('/pose2art/fx/param', (n, str(s['pars'][n].eval())))
+            for n in s['names'] if s['pars'][n].valid]
+    _send_bundle(msgs)
 
 def _handle_param(addr, args):
-    """OSC param set: /pose2art/fx/param/<ParamName> <val>"""
+    """
+    OSC param set: /pose2art/fx/param/<ParamName> <val...>
+    Effects with a generated schema only accept routed names, typed and clamped by
+    fx_schema.coerce from the osc_routes table; others get the plain coercion below.
+    """
     core = _active_fxcore()
     if not core:
         return
     try:
         pname = addr.split('/')[-1]
-        p = getattr(core.par, pname, None)
+        routes = _schema(core)['routes']
+        if routes:
+            _set_routed(core, pname, routes.get(pname), args)
+            return
+        p = _resolve_par(core, pname)
         if not p:
             debug("osc_router: no param", pname)
             return
@@ -109,3 +252,177 @@ def _handle_param(addr, args):
         _send_feedback('/pose2art/fx/param', pname, str(p.eval()))
     except Exception as e:
         debug("osc_router param err", e)
+
+def _set_routed(core, pname, route, args):
+    if route is None:
+        debug("osc_router: not an OSC route", pname)
+        return
+    typ, lo, hi = route
+    vals = fx_schema.coerce(typ, lo, hi, args)
+    if typ in ('rgb', 'rgba'):
+        pars = list(getattr(core.parTuple, pname, None) or ())
+    else:
+        p = _resolve_par(core, pname)
+        pars = [p] if p is not None else []
+    if not pars:
+        debug("osc_router: no param", pname)
+        return
+    if typ == 'pulse':
+        pars[0].pulse()
+        return
+    if typ == 'menu' and vals[0] not in pars[0].menuNames:
+        debug(f"osc_router: {pname} has no menu item {vals[0]!r}")
+        return
+    for p, v in zip(pars, vals):
+        p.val = v
+    _send_feedback('/pose2art/fx/param', pname, *[str(p.eval()) for p in pars])
+
+def _handle_preset(addr, args):
+    sw = _fxswitch().ext.PoseEfxSwitchExt
+    cmd = addr.rsplit('/', 1)[-1]
+    name = str(args[0]).strip() if args else ''
+    if cmd == 'list':
+        _send_bundle([('/pose2art/preset/list', (n,)) for n in sw.PresetNames()])
+    elif cmd == 'save' and name:
+        sw.SavePreset(name)
+    elif cmd == 'recall' and name:
+        sw.RecallPreset(name, float(args[1]) if len(args) > 1 else 0.0)
+    elif cmd == 'morph' and len(args) >= 3:
+        sw.MorphPreset(name or None, str(args[1]).strip(), float(args[2]))
+    elif cmd == 'delete' and name:
+        sw.DeletePreset(name)
+    else:
+        debug("osc_router: bad preset command", addr, args)
+
+def Emit(addr, *args):
+    """
+    Event out: feedback OSC Out now, subscribers on the next PublishChanges().
+    Events are queued per subscriber, not coalesced like parameter state.
+    """
+    _send_feedback(addr, *args)
+    if _hub is not None and len(_hub):
+        _hub.emit(addr, args)
+
+# ----- subscriptions ----------------------------------------------------------
+def _hub_get():
+    global _hub
+    if _hub is None:
+        _hub = osc_subscriptions.SubscriptionHub(ttl_s=SUB_TTL_S, default_rate_hz=SUB_RATE_HZ)
+    return _hub
+
+def _snapshot():
+    """Full state as publish() changes: active effect + every exposed value."""
+    snap = {}
+    core = _active_fxcore()
+    if core:
+        snap[('/pose2art/fx/active', '')] = (core.parent().name,)
+        if _pub_core == core.path:
+            values = _pub_values
+        else:
+            sch = _schema(core, verify=True)
+            values = {n: sch['pars'][n].eval() for n in sch['names'] if sch['pars'][n].valid}
+        for n, v in values.items():
+            snap[('/pose2art/fx/param', n)] = (n, str(v))
+    return snap
+
+def _handle_subscription(addr, args, peer=None):
+    """
+    /pose2art/subscribe|keepalive|unsubscribe [<host> <port>] [max_rate_hz]
+    Without host/port the target is the sender (peer). Explicit targets go through
+    osc_subscriptions.resolve_target, so a client cannot aim snapshots at a third party.
+    """
+    try:
+        target = osc_subscriptions.resolve_target(args, peer, SUB_ALLOW_HOSTS)
+    except (ValueError, IndexError) as e:
+        debug("osc_router: bad subscription args", addr, args, e)
+        return
+    if target is None:
+        debug(f"osc_router: refused {addr} {args} from {peer or 'unknown sender'}")
+        return
+    host, port, rate = target
+    hub = _hub_get()
+    if addr == '/pose2art/unsubscribe':
+        hub.unsubscribe(host, port)
+    elif addr == '/pose2art/keepalive':
+        if not hub.keepalive(host, port):
+            hub.subscribe(host, port, rate, snapshot=_snapshot())
+    else:
+        if hub.subscribe(host, port, rate, snapshot=_snapshot()):
+            debug(f"osc_router: subscriber {host}:{port} ({len(hub)} total)")
+
+def PublishChanges():
+    """Once per frame: diff exposed values of the active effect and push deltas."""
+    global _pub_core, _pub_values, _pub_frame
+    hub = _hub
+    if hub is None or not len(hub):
+        return
+    core = _active_fxcore()
+    changes = {}
+    if core:
+        if core.path != _pub_core:
+            # effect switch: subscribers get the new effect and all of its values
+            _pub_core, _pub_values = core.path, {}
+            changes[('/pose2art/fx/active', '')] = (core.parent().name,)
+        _pub_frame += 1
+        sch = _schema(core, verify=_pub_frame % SCHEMA_CHECK_FRAMES == 0)
+        for n in sch['names']:
+            p = sch['pars'][n]
+            if not p.valid:
+                continue
+            v = p.eval()
+            if _pub_values.get(n, _MISSING) != v:
+                _pub_values[n] = v
+                changes[('/pose2art/fx/param', n)] = (n, str(v))
+    hub.publish(changes)
+    hub.flush()
+
+# ----- ShowControlIO server -----------------------------------------------------
+def StartServer(port=SERVER_PORT):
+    """
+    Run the asyncio ShowControlIO service on a background thread (idempotent).
+    Returns False (and logs) if the port is already taken, e.g. by osc_ctl.
+    """
+    global _server
+    if _server is None:
+        srv = showcontrol_io.ShowControlServer(port=port)
+        try:
+            srv.start_in_thread()
+        except RuntimeError as e:
+            debug(f"osc_router: {e}; still receiving through the OSC In DAT")
+            return False
+        _server = srv
+        debug(f"osc_router: ShowControlIO listening on {_server.port}")
+    return True
+
+def StopServer():
+    global _server
+    if _server is not None:
+        _server.stop()
+        _server = None
+
+def DrainServer():
+    """Once per frame: dispatch everything the server accepted since the last frame."""
+    global _metrics_frame
+    if _server is None:
+        return
+    for peer, addr, args in _server.drain():
+        dispatch(addr, args, peer)
+    _metrics_frame += 1
+    if _metrics_frame % 60 == 0:
+        _write_metrics()
+
+def ServerMetrics():
+    m = _server.metrics() if _server else {}
+    m['handler_errors'] = _errors
+    return m
+
+def _write_metrics():
+    t = op(METRICS_DAT)
+    if not t:
+        return
+    m = ServerMetrics()
+    m.pop('per_client', None)
+    t.clear()
+    t.appendRow(['key', 'value'])
+    for k in sorted(m):
+        t.appendRow([k, m[k]])
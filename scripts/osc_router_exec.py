@@ -0,0 +1,26 @@
+# ShowControlIO / osc_router_exec (Execute DAT, Start, Frame Start, Frame End and Exit toggles on)
+# Drains the ShowControlIO service once per frame and pushes this frame's
+# parameter changes to /pose2art/subscribe clients.
+# USE_SERVER = True lets the ShowControlIO service own the control port (CtlInPort,
+# 7500) instead of the osc_ctl OSC In DAT. Both cannot bind it: turn osc_ctl off
+# (or move it to a free port) first. Off by default so the shipped network keeps
+# receiving through osc_ctl; a failed bind is logged and osc_ctl keeps working.
+
+USE_SERVER = False
+
+def onStart():
+    if USE_SERVER:
+        op('osc_router').module.StartServer()
+    return
+
+def onFrameStart(frame):
+    op('osc_router').module.DrainServer()
+    return
+
+def onFrameEnd(frame):
+    op('osc_router').module.PublishChanges()
+    return
+
+def onExit():
+    op('osc_router').module.StopServer()
+    return
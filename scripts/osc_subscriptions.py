@@ -0,0 +1,167 @@
+# scripts/osc_subscriptions.py
+# Push-style state sync for show-control clients (tablets, control surfaces).
+#
+# A client sends  /pose2art/subscribe <host> <port> [max_rate_hz]  and from then on
+# receives delta bundles whenever exposed parameter values change. Re-sending the
+# subscribe message (or /pose2art/keepalive <host> <port>) renews it; clients that go
+# quiet for longer than ttl_s are dropped. Each client has its own max send rate:
+# changes that arrive faster are coalesced, so the client always gets the latest value.
+# Events (emit(): gestures, zone enter/exit, contacts) are not state and are never
+# coalesced: each subscriber queues them in order (up to MAX_EVENTS, oldest dropped
+# first) and gets all of them with its next send.
+#
+# Who may be subscribed: resolve_target() makes a subscribe without <host> <port> mean
+# the sender. An explicit target other than the sender is only taken from a loopback
+# or allow-listed sender (or, when the transport does not report the sender, only for
+# a loopback/allow-listed target). Otherwise any client could point the snapshot and
+# the delta stream at a third party (UDP reflection/amplification).
+#
+# Pure Python over a plain UDP socket (no TouchDesigner objects), so it can be driven
+# and checked from outside TD with local UDP clients and an injected clock
+# (scripts/osc_subscriptions_loopback.py). osc_router owns one hub and calls
+# publish()/flush() once per frame.
+
+import collections
+import socket
+import time
+
+import osc_codec
+
+DEFAULT_TTL_S = 10.0
+DEFAULT_RATE_HZ = 30.0
+MAX_BUNDLE_BYTES = 8192
+MAX_EVENTS = 256            # queued events per subscriber between sends
+LOOPBACK_HOSTS = ('127.0.0.1', '::1', 'localhost')
+
+
+def _rate(args, i):
+    return float(args[i]) if len(args) > i and str(args[i]).strip() else None
+
+def resolve_target(args, peer=None, allow_hosts=()):
+    """
+    (host, port, max_rate) for subscribe/keepalive/unsubscribe args, or None if refused.
+
+    args   [max_rate_hz] (target = sender) or <host> <port> [max_rate_hz]
+    peer   (host, port) of the sender, or None when the transport does not report it
+    Raises ValueError on malformed args.
+    """
+    trusted = set(LOOPBACK_HOSTS).union(allow_hosts)
+    if peer is not None and len(args) < 2:
+        return str(peer[0]), int(peer[1]), _rate(args, 0)
+    if len(args) < 2:
+        raise ValueError('subscription needs <host> <port> when the sender is unknown')
+    host, port = str(args[0]).strip(), int(float(args[1]))
+    if peer is not None:
+        if (host, port) != (str(peer[0]), int(peer[1])) and str(peer[0]) not in trusted:
+            return None
+    elif host not in trusted:
+        return None
+    return host, port, _rate(args, 2)
+
+
+class Subscriber:
+    __slots__ = ('addr', 'max_rate', 'last_seen', 'last_sent', 'pending', 'events')
+
+    def __init__(self, addr, max_rate, now):
+        self.addr = addr            # (host, port)
+        self.max_rate = max_rate    # Hz; <= 0 means every flush
+        self.last_seen = now
+        self.last_sent = -1e9
+        self.pending = {}           # (osc address, key) -> args tuple; last write wins
+        self.events = collections.deque(maxlen=MAX_EVENTS)   # (osc address, args tuple), in order
+
+
+class SubscriptionHub:
+    """Subscriber registry with per-client coalescing, rate limit and keepalive expiry."""
+
+    def __init__(self, ttl_s=DEFAULT_TTL_S, default_rate_hz=DEFAULT_RATE_HZ, sock=None, clock=time.monotonic):
+        self.ttl_s = float(ttl_s)
+        self.default_rate_hz = float(default_rate_hz)
+        self.clock = clock
+        self.sock = sock or socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.subs = {}              # (host, port) -> Subscriber
+        self.sent_packets = 0
+        self.dropped = 0
+        self.dropped_events = 0
+
+    def __len__(self):
+        return len(self.subs)
+
+    def subscribe(self, host, port, max_rate=None, snapshot=None):
+        """
+        Add or renew a subscriber. New subscribers get `snapshot` (same shape as
+        publish()) as their first delta. Returns True when the client is new.
+        """
+        now = self.clock()
+        addr = (str(host), int(port))
+        sub = self.subs.get(addr)
+        is_new = sub is None
+        if is_new:
+            rate = self.default_rate_hz if max_rate is None else float(max_rate)
+            sub = self.subs[addr] = Subscriber(addr, rate, now)
+            if snapshot:
+                sub.pending.update(snapshot)
+        else:
+            sub.last_seen = now
+            if max_rate is not None:
+                sub.max_rate = float(max_rate)
+        return is_new
+
+    def keepalive(self, host, port):
+        sub = self.subs.get((str(host), int(port)))
+        if sub is not None:
+            sub.last_seen = self.clock()
+        return sub is not None
+
+    def unsubscribe(self, host, port):
+        return self.subs.pop((str(host), int(port)), None) is not None
+
+    def publish(self, changes):
+        """Queue changes for every subscriber. changes: {(osc address, key): args tuple}."""
+        if not changes or not self.subs:
+            return
+        for sub in self.subs.values():
+            sub.pending.update(changes)
+
+    def emit(self, address, args=()):
+        """Queue one event for every subscriber; delivered in order, never coalesced."""
+        if not self.subs:
+            return
+        ev = (address, tuple(args))
+        for sub in self.subs.values():
+            if len(sub.events) == MAX_EVENTS:
+                self.dropped_events += 1
+            sub.events.append(ev)
+
+    def flush(self):
+        """Expire silent clients and send due deltas. Returns number of packets sent."""
+        now = self.clock()
+        sent = 0
+        for addr in [a for a, s in self.subs.items() if now - s.last_seen > self.ttl_s]:
+            del self.subs[addr]
+        for sub in self.subs.values():
+            if not sub.pending and not sub.events:
+                continue
+            if sub.max_rate > 0 and now - sub.last_sent < 1.0 / sub.max_rate:
+                continue
+            msgs = [osc_codec.encode_message(a, args) for (a, _), args in sub.pending.items()]
+            msgs += [osc_codec.encode_message(a, args) for a, args in sub.events]
+            for packet in osc_codec.encode_bundles(msgs, MAX_BUNDLE_BYTES):
+                try:
+                    self.sock.sendto(packet, sub.addr)
+                    sent += 1
+                except OSError:
+                    self.dropped += 1
+            sub.pending.clear()
+            sub.events.clear()
+            sub.last_sent = now
+        self.sent_packets += sent
+        return sent
+
+    def close(self):
+        self.subs.clear()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
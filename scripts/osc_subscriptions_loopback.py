@@ -0,0 +1,140 @@
+# scripts/osc_subscriptions_loopback.py
+# Loopback check for osc_subscriptions.SubscriptionHub over real UDP sockets (run
+# outside TD):
+#
+#   python scripts/osc_subscriptions_loopback.py
+#
+# Binds local UDP clients on 127.0.0.1, drives the hub with a manual clock (so TTL
+# and rate limits are exact, no sleeps), and checks what each client actually
+# receives: snapshot on subscribe, delta delivery, per-client rate limit with
+# last-value coalescing, uncoalesced events, keepalive renewal, TTL expiry,
+# unsubscribe and the subscription target policy (resolve_target).
+# Prints one line per check; exits non-zero if any check fails.
+
+import socket
+import sys
+
+import osc_codec
+import osc_subscriptions
+
+RECV_TIMEOUT_S = 0.2
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, dt):
+        self.t += dt
+
+
+def _client():
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(('127.0.0.1', 0))
+    s.settimeout(RECV_TIMEOUT_S)
+    return s
+
+def _recv_all(sock):
+    """Every (address, args) that has arrived on sock, decoded from all packets."""
+    out = []
+    sock.settimeout(RECV_TIMEOUT_S)
+    while True:
+        try:
+            data, _ = sock.recvfrom(65536)
+        except socket.timeout:
+            return out
+        out.extend((a, list(args)) for a, args in osc_codec.decode_packet(data))
+        sock.settimeout(0.02)       # then drain whatever else is already queued
+
+def _values(msgs, addr):
+    return [args for a, args in msgs if a == addr]
+
+
+def main(argv=None):
+    clock = _Clock()
+    hub = osc_subscriptions.SubscriptionHub(ttl_s=5.0, default_rate_hz=0.0, clock=clock)
+    fast, slow = _client(), _client()
+    fast_addr, slow_addr = fast.getsockname(), slow.getsockname()
+    results = []
+
+    def check(name, ok, detail=''):
+        results.append(ok)
+        print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f"  ({detail})" if detail and not ok else ''))
+
+    P = '/pose2art/fx/param/Uidotsize'
+    snapshot = {(P, None): (4.0,)}
+
+    # subscribe: new client gets the snapshot on the next flush
+    check('subscribe returns new', hub.subscribe(*fast_addr, max_rate=0, snapshot=snapshot) is True)
+    check('re-subscribe returns renew', hub.subscribe(*fast_addr, max_rate=0) is False)
+    hub.subscribe(*slow_addr, max_rate=10.0, snapshot=snapshot)
+    hub.flush()
+    got_f, got_s = _recv_all(fast), _recv_all(slow)
+    check('snapshot delivered', _values(got_f, P) == [[4.0]] and _values(got_s, P) == [[4.0]],
+          f'{got_f} / {got_s}')
+
+    # deltas: unlimited client sees every flush, 10 Hz client only the latest value
+    for i in range(5):
+        clock.advance(0.02)
+        hub.publish({(P, None): (float(i),)})
+        hub.flush()
+    got_f, got_s = _recv_all(fast), _recv_all(slow)
+    check('unlimited client gets every change', _values(got_f, P) == [[0.0], [1.0], [2.0], [3.0], [4.0]],
+          str(got_f))
+    check('rate-limited client held back', _values(got_s, P) == [], str(got_s))
+    clock.advance(0.1)
+    hub.flush()
+    got_s = _recv_all(slow)
+    check('rate-limited client gets the last value only', _values(got_s, P) == [[4.0]], str(got_s))
+
+    # events are queued in order, not coalesced, even behind the rate limit
+    C = '/pose2art/contact/hands'
+    clock.advance(0.02)
+    hub.emit(C, (1, 2, 1))
+    hub.emit(C, (1, 3, 1))
+    hub.emit(C, (1, 2, 0))
+    hub.flush()
+    clock.advance(0.1)
+    hub.flush()
+    want = [[1, 2, 1], [1, 3, 1], [1, 2, 0]]
+    got_f, got_s = _values(_recv_all(fast), C), _values(_recv_all(slow), C)
+    check('events delivered in order, uncoalesced', got_f == want and got_s == want, f'{got_f} / {got_s}')
+
+    # keepalive renews; TTL drops silent clients
+    clock.advance(3.9)
+    check('keepalive known client', hub.keepalive(*fast_addr) is True)
+    clock.advance(2.0)
+    hub.publish({(P, None): (9.0,)})
+    hub.flush()
+    check('silent client expired after ttl', slow_addr not in hub.subs and len(hub) == 1)
+    check('renewed client still served', _values(_recv_all(fast), P) == [[9.0]])
+    check('expired client receives nothing', _recv_all(slow) == [])
+    check('keepalive unknown client', hub.keepalive(*slow_addr) is False)
+
+    # unsubscribe stops delivery
+    check('unsubscribe', hub.unsubscribe(*fast_addr) is True and len(hub) == 0)
+    hub.publish({(P, None): (1.0,)})
+    hub.flush()
+    check('no delivery after unsubscribe', _recv_all(fast) == [])
+
+    # target policy: no third-party targets from remote senders
+    rt = osc_subscriptions.resolve_target
+    remote, third = ('10.0.0.5', 9000), ['10.0.0.9', 9001]
+    check('bare subscribe targets the sender', rt(['15'], remote) == ('10.0.0.5', 9000, 15.0))
+    check('remote sender naming itself', rt(['10.0.0.5', 9000], remote) == ('10.0.0.5', 9000, None))
+    check('remote sender naming a third party refused', rt(third, remote) is None)
+    check('allow-listed sender may name a third party', rt(third, remote, ('10.0.0.5',)) is not None)
+    check('loopback sender may name a third party', rt(third, ('127.0.0.1', 5000)) is not None)
+    check('unknown sender: only trusted targets', rt(third) is None and rt(['127.0.0.1', 9001]) is not None)
+
+    hub.close()
+    fast.close()
+    slow.close()
+    print(f"{sum(results)}/{len(results)} checks passed, packets sent={hub.sent_packets} dropped={hub.dropped}")
+    return 0 if all(results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# scripts/person_selector.py
+# Active / primary person selection with real scoring, hysteresis and dwell time.
+#
+# Each candidate gets a score in 0..1 from four normalised terms:
+#   size        bbox diagonal of the visible landmarks (bigger = closer to camera)
+#   centre      1 - distance of the bbox centre from the image centre
+#   confidence  mean visibility over the person's landmarks (missing = 0)
+#   time        seconds on stage, saturating at TIME_FULL
+# weighted per mode (WEIGHTS): 'closest' leans on size, 'highestscore' balances all
+# four. 'specific' takes the wanted pid, else the nearest present id (the old
+# active_person behaviour).
+#
+# Switching is damped: a challenger must beat the current choice by `margin` for
+# `dwell` consecutive seconds, and after a switch the choice is held for at least
+# `min_hold` seconds. If the current person disappears the best candidate is taken
+# at once. update() returns (pid, changed) so callers only write on a change.
+# Run it once per frame (Execute DAT onFrameStart), not per channel change.
+# Put this in a Text DAT named 'person_selector' in /local/modules.
+
+import numpy as np
+
+import pose_frame
+
+TIME_FULL = 5.0      # seconds on stage for a full time score
+WEIGHTS = {
+    'closest':      {'size': 1.0, 'centre': 0.25, 'confidence': 0.25, 'time': 0.1},
+    'highestscore': {'size': 0.3, 'centre': 0.3, 'confidence': 0.3, 'time': 0.1},
+}
+MODE_ALIASES = {'auto-closest': 'closest', 'auto-highestconf': 'highestscore',
+                'highestconf': 'highestscore', 'fixed person id': 'specific', 'fixed': 'specific'}
+
+
+def normalise_mode(mode):
+    m = str(mode or '').strip().lower()
+    return MODE_ALIASES.get(m, m if m in WEIGHTS or m == 'specific' else 'closest')
+
+def frame_terms(layout, frame, present=None, min_visibility=0.5):
+    """(pids, size, centre, confidence) arrays from a (P, L, 4) frame; absent persons dropped."""
+    real = np.array([i for i, n in enumerate(layout.landmarks) if n not in pose_frame.VIRTUAL], dtype=np.intp)
+    ok = pose_frame.valid(frame, min_visibility)[:, real]
+    xy = np.where(ok[..., None], frame[:, real, :2], np.nan)
+    seen = ok.any(axis=1)
+    if present is not None:
+        seen &= present
+    size = np.zeros(len(layout))
+    centre = np.zeros(len(layout))
+    if seen.any():
+        lo = np.nanmin(xy[seen], axis=1)
+        hi = np.nanmax(xy[seen], axis=1)
+        size[seen] = np.clip(np.linalg.norm(hi - lo, axis=1), 0.0, 1.0)
+        mid = 0.5 * (lo + hi)
+        centre[seen] = 1.0 - np.clip(np.linalg.norm(mid - 0.5, axis=1) / np.sqrt(0.5), 0.0, 1.0)
+    conf = np.where(ok, frame[:, real, pose_frame.V], 0.0).mean(axis=1) if len(real) else np.zeros(len(layout))
+    pids = [pid for pid, s in zip(layout.pids, seen) if s]
+    return pids, size[seen], centre[seen], conf[seen]
+
+
+class PersonSelector:
+
+    def __init__(self, mode='closest', margin=0.1, dwell=0.5, min_hold=1.0, want=1):
+        self.mode = normalise_mode(mode)
+        self.margin = float(margin)
+        self.dwell = float(dwell)
+        self.min_hold = float(min_hold)
+        self.want = int(want)
+        self.pid = -1
+        self.since = {}          # pid -> first seen (s)
+        self.switched_at = -1e9
+        self.challenger = None
+        self.challenge_start = 0.0
+        self.last_scores = {}
+
+    def configure(self, mode=None, margin=None, dwell=None, min_hold=None, want=None):
+        if mode is not None:
+            self.mode = normalise_mode(mode)
+        if margin is not None:
+            self.margin = float(margin)
+        if dwell is not None:
+            self.dwell = float(dwell)
+        if min_hold is not None:
+            self.min_hold = float(min_hold)
+        if want is not None:
+            self.want = int(want)
+
+    def scores(self, pids, size, centre, confidence, now):
+        """Weighted score per pid (also tracks time on stage)."""
+        self.since = {pid: self.since.get(pid, now) for pid in pids}
+        t = np.array([min((now - self.since[pid]) / TIME_FULL, 1.0) for pid in pids])
+        w = WEIGHTS.get(self.mode, WEIGHTS['closest'])
+        total = sum(w.values())
+        s = (w['size'] * np.asarray(size) + w['centre'] * np.asarray(centre)
+             + w['confidence'] * np.asarray(confidence) + w['time'] * t) / total
+        self.last_scores = dict(zip(pids, s.tolist()))
+        return s
+
+    def update(self, pids, size, centre, confidence, now):
+        """Returns (pid or -1, changed)."""
+        pids = list(pids)
+        prev = self.pid
+        if not pids:
+            self.since, self.challenger = {}, None
+            self.pid = -1
+            return self.pid, self.pid != prev
+
+        if self.mode == 'specific':
+            self.scores(pids, size, centre, confidence, now)
+            self.pid = min(pids, key=lambda p: abs(p - self.want))
+            return self.pid, self.pid != prev
+
+        s = self.scores(pids, size, centre, confidence, now)
+        best = pids[int(np.argmax(s))]
+        if self.pid not in pids:
+            self._switch(best, now)
+        elif best != self.pid:
+            lead = s[pids.index(best)] - s[pids.index(self.pid)]
+            if lead <= self.margin:
+                self.challenger = None
+            elif best != self.challenger:
+                self.challenger, self.challenge_start = best, now
+            elif now - self.challenge_start >= self.dwell and now - self.switched_at >= self.min_hold:
+                self._switch(best, now)
+        else:
+            self.challenger = None
+        return self.pid, self.pid != prev
+
+    def _switch(self, pid, now):
+        self.pid = pid
+        self.switched_at = now
+        self.challenger = None
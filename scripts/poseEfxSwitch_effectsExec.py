@@ -0,0 +1,21 @@
+# PoseEfxSwitch / effects_exec (OP Execute DAT)
+# Operators: effects   Toggles: Num Children Change, Child Rename
+# Keeps PoseEfxSwitchExt's effect registry in step with the effects/ container, and
+# generates the parameter schema of added effects (clones); unchanged ones are cached.
+import fx_schema
+
+def _refresh():
+    fx_schema.GenerateAll(parent().op('effects'))
+    ext = parent().ext.PoseEfxSwitchExt
+    ext.InvalidateEffects()
+    ext.BuildEffectsMenu()
+
+def onNumChildrenChange(changeOp):
+    debug("effects_exec onNumChildrenChange", changeOp)
+    _refresh()
+    return
+
+def onChildRename(changeOp):
+    debug("effects_exec onChildRename", changeOp)
+    _refresh()
+    return
@@ -2,4 +2,9 @@
 def onStart():
     debug("poseEfxSwitch onStart")
     op('.').ext.PoseEfxSwitchExt.Initialize()
-    return
\ No newline at end of file
+    return
+
+def onFrameStart(frame):
+    # drives preroll/crossfade effect switches; no-op when idle
+    op('.').ext.PoseEfxSwitchExt.OnFrameStart(frame)
+    return
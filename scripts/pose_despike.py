@@ -0,0 +1,175 @@
+# scripts/pose_despike.py
+# Outlier / spike rejection for landmark streams (a wrist jumping across the frame
+# for one frame), before zones, bones and effects see it.
+#
+# Per landmark, every frame, in one vectorised pass over all persons:
+#   - velocity test: the displacement from the predicted position (previous
+#     accepted + previous velocity) must stay below  floor + k * typical speed,
+#     where typical speed is an EMA of the landmark's accepted per-frame motion,
+#     so fast-moving limbs get a looser threshold than a still head;
+#   - bone test (data/skeletonPairs.csv): a bone whose length leaves
+#     [len / (1 + bone_tol), len * (1 + bone_tol)] of its running length flags the
+#     endpoint that moved more (relative to its own threshold), which is then rejected
+#     at BONE_RATIO of its velocity threshold instead of the full threshold.
+# Rejected samples are replaced with the predicted value (mode 'predict') or the
+# previous accepted value (mode 'hold'). After max_reject consecutive rejections the
+# new position is accepted (a real fast move or re-acquisition, not a spike) and
+# seeds velocity and typical speed with the jump's per-frame rate.
+# Distances are in aspect-corrected UV (image height units). Rejection counts per
+# landmark are kept for tuning (counts, total). A layout change (person joining or
+# leaving) keeps the state of the persons and landmarks that stay (_remap).
+# Offline check: scripts/pose_despike_check.py.
+# Put this in a Text DAT named 'pose_despike' in /local/modules.
+
+import numpy as np
+
+import pose_frame
+
+K = 4.0              # threshold = FLOOR + K * typical per-frame speed
+FLOOR = 0.03         # minimum allowed jump per frame
+BONE_TOL = 0.5       # allowed relative bone length change
+MAX_REJECT = 3       # consecutive rejections before a jump is accepted
+SPEED_ALPHA = 0.2    # typical speed EMA
+LEN_ALPHA = 0.1      # bone length EMA
+BONE_RATIO = 0.5     # a bone-flagged endpoint is rejected above this fraction of its threshold
+
+
+class SpikeFilter:
+
+    def __init__(self, bones, k=K, floor=FLOOR, bone_tol=BONE_TOL, max_reject=MAX_REJECT,
+                 mode='predict', min_visibility=0.5):
+        self.bones = [(s, e) for _, s, e in bones]
+        self.k, self.floor, self.bone_tol = float(k), float(floor), float(bone_tol)
+        self.max_reject = int(max_reject)
+        self.mode = mode
+        self.min_visibility = float(min_visibility)
+        self.pids, self.names, self.use = [], [], []
+        self.total = 0
+        self.layout_key = None
+
+    def compile(self, layout):
+        """Resolve landmark / bone indices for a layout; state carries over (see _remap)."""
+        real = [i for i, n in enumerate(layout.landmarks) if n not in pose_frame.VIRTUAL]
+        names = [layout.landmarks[i] for i in real]
+        col = {n: j for j, n in enumerate(names)}
+        use = [(s, e) for s, e in self.bones if s in col and e in col]
+        self.real = np.array(real, dtype=np.intp)
+        self.bs = np.array([col[s] for s, _ in use], dtype=np.intp)
+        self.be = np.array([col[e] for _, e in use], dtype=np.intp)
+        self._remap(list(layout.pids), names, use)
+        self.layout_key = layout.key
+
+    def _remap(self, pids, names, use):
+        """
+        New state arrays for a layout, keeping the filter state of persons, landmarks
+        and bones that stay (a person joining or leaving does not reset everyone);
+        rejection counts carry over per landmark.
+        """
+        P, R, B = len(pids), len(names), len(use)
+        prev = np.full((P, R, 3), np.nan)
+        vel = np.zeros((P, R, 3))
+        speed = np.zeros((P, R))
+        streak = np.zeros((P, R), dtype=np.intp)
+        blen = np.full((P, B), np.nan)
+        counts = np.zeros(R, dtype=np.int64)
+
+        def pairs(new, old):
+            at = {k: i for i, k in enumerate(old)}
+            keep = [(j, at[k]) for j, k in enumerate(new) if k in at]
+            return tuple(np.array(v, dtype=np.intp) for v in zip(*keep)) if keep else None
+
+        rows, cols, bones = pairs(pids, self.pids), pairs(names, self.names), pairs(use, self.use)
+        if cols is not None:
+            counts[cols[0]] = self.counts[cols[1]]
+        if rows is not None and cols is not None:
+            new, old = np.ix_(rows[0], cols[0]), np.ix_(rows[1], cols[1])
+            prev[new], vel[new] = self.prev[old], self.vel[old]
+            speed[new], streak[new] = self.speed[old], self.streak[old]
+        if rows is not None and bones is not None:
+            blen[np.ix_(rows[0], bones[0])] = self.blen[np.ix_(rows[1], bones[1])]
+        self.pids, self.names, self.use = pids, names, use
+        self.prev, self.vel, self.speed, self.streak, self.blen = prev, vel, speed, streak, blen
+        self.counts = counts
+
+    def reset_counts(self):
+        if self.layout_key is not None:
+            self.counts[:] = 0
+            self.total = 0
+
+    def step(self, layout, frame, aspect=1.0):
+        """Filter a (P, L, 4) frame in place; returns (frame, rejected (P, R) bool)."""
+        if self.layout_key != layout.key:
+            self.compile(layout)
+        cur = frame[:, self.real, :3]
+        ok = pose_frame.valid(frame, self.min_visibility)[:, self.real]
+        known = ok & np.isfinite(self.prev[..., 0])
+        pred = self.prev + self.vel
+
+        # velocity-adaptive displacement test
+        d = cur[..., :2] - pred[..., :2]
+        d[..., 0] *= aspect
+        disp = np.linalg.norm(d, axis=-1)
+        thr = self.floor + self.k * self.speed
+        ratio = np.where(known, disp / thr, 0.0)
+        bad = ratio > 1.0
+
+        # bone length consistency: blame the endpoint that moved more
+        if len(self.bs):
+            b = cur[:, self.be, :2] - cur[:, self.bs, :2]
+            b[..., 0] *= aspect
+            ln = np.linalg.norm(b, axis=-1)
+            both = ok[:, self.bs] & ok[:, self.be]
+            off = both & np.isfinite(self.blen) & ((ln > self.blen * (1.0 + self.bone_tol))
+                                                   | (ln < self.blen / (1.0 + self.bone_tol)))
+            if off.any():
+                rs, re = ratio[:, self.bs], ratio[:, self.be]
+                blame = np.where(re >= rs, self.be[None, :], self.bs[None, :])
+                pr, pb = np.nonzero(off)
+                hit = np.zeros_like(bad)
+                hit[pr, blame[pr, pb]] = True
+                bad |= hit & known & (ratio > BONE_RATIO)
+
+        # escape hatch for sustained jumps
+        self.streak = np.where(bad, self.streak + 1, 0)
+        jumped = self.streak > self.max_reject
+        bad &= ~jumped
+        self.streak[~bad] = 0
+
+        repl = pred if self.mode == 'predict' else self.prev
+        out = np.where(bad[..., None], repl, cur)
+        frame[:, self.real, :3] = np.where(ok[..., None], out, cur)
+        for vi, va, vb in layout.virtual:
+            frame[:, vi, :3] = 0.5 * (frame[:, va, :3] + frame[:, vb, :3])
+
+        acc = ok & ~bad
+        step = out - self.prev
+        # an accepted jump spans the max_reject held frames as well: seed velocity and
+        # typical speed with its per-frame rate, so steady fast motion is tracked from
+        # here on instead of being held and jumped again every max_reject + 1 frames
+        drift = self.vel if self.mode == 'predict' else 0.0
+        seed = (step + self.max_reject * drift) / (self.max_reject + 1)
+        steady = acc & known & ~jumped
+        self.vel = np.where(steady[..., None], step,
+                            np.where(jumped[..., None], seed, np.where(acc[..., None], 0.0, self.vel)))
+        mv = self.vel[..., :2].copy()
+        mv[..., 0] *= aspect
+        mv = np.linalg.norm(mv, axis=-1)
+        self.speed = np.where(steady, self.speed + SPEED_ALPHA * (mv - self.speed),
+                              np.where(jumped, mv, self.speed))
+        self.prev = np.where(ok[..., None], out, self.prev)
+
+        if len(self.bs):
+            good = acc[:, self.bs] & acc[:, self.be]
+            self.blen = np.where(good, np.where(np.isfinite(self.blen),
+                                                self.blen + LEN_ALPHA * (ln - self.blen), ln), self.blen)
+            self.blen[jumped[:, self.bs] | jumped[:, self.be]] = np.nan    # relearn after a real jump
+
+        self.counts += bad.sum(axis=0)
+        self.total += int(bad.sum())
+        return frame, bad
+
+    def channel_names(self):
+        return [f'rej_{n}' for n in self.names] + ['rej_total']
+
+    def channel_values(self):
+        return np.concatenate([self.counts, [self.total]]).astype(float)
@@ -0,0 +1,117 @@
+# scripts/pose_despike_check.py
+# Offline check for pose_despike.SpikeFilter on synthetic motion (run outside TD):
+#
+#   python scripts/pose_despike_check.py
+#
+# Drives the filter with whole-body translations of a fixed random pose (so bone
+# lengths stay constant) and checks: a one-frame spike on a still person is
+# rejected; steady fast motion from rest (0.04 UV/frame, above FLOOR) is held only
+# for the first max_reject frames, then tracked without the hold / jump staircase;
+# a spike during that motion is still rejected; a person joining or leaving keeps
+# the other persons' filter state and rejection counts.
+# Prints one line per check; exits non-zero if any check fails.
+
+import os
+import sys
+
+import numpy as np
+
+import pose_despike
+import pose_frame
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(HERE, '..', 'data')
+
+FAST = 0.04          # UV per frame
+FRAMES = 40
+
+
+def _layout(names, pids):
+    chans = []
+    for pid in pids:
+        for n in names:
+            chans += [f'p{pid}_{n}_x', f'p{pid}_{n}_y', f'p{pid}_{n}_z']
+        chans.append(f'p{pid}_present')
+    return pose_frame.FrameLayout(chans, names)
+
+def _frame(layout, base, offsets):
+    """(P, L, 4) frame: base pose (L, 2) shifted by offsets[pid] (dx, dy), z = 0, v = 1."""
+    frame = np.zeros(layout.shape)
+    frame[..., 3] = 1.0
+    for r, pid in enumerate(layout.pids):
+        frame[r, :len(base), :2] = base + np.asarray(offsets[pid])
+    return frame
+
+
+def main(argv=None):
+    names = pose_frame.load_landmark_names(os.path.join(DATA, 'landmark_names.csv'))
+    bones = pose_frame.load_bones(os.path.join(DATA, 'skeletonPairs.csv'))
+    base = np.random.default_rng(1).uniform(0.3, 0.5, (len(names), 2))
+    wrist = names.index('wrist_l')
+    results = []
+
+    def check(name, ok, detail=''):
+        results.append(ok)
+        print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f"  ({detail})" if detail and not ok else ''))
+
+    one, two = _layout(names, [1]), _layout(names, [1, 2])
+    for mode in ('predict', 'hold'):
+        f = pose_despike.SpikeFilter(bones, mode=mode)
+
+        # still person, then a one-frame spike on the wrist
+        for _ in range(10):
+            _, bad = f.step(one, _frame(one, base, {1: (0.0, 0.0)}))
+        spike = _frame(one, base, {1: (0.0, 0.0)})
+        spike[0, wrist, 0] += 0.3
+        out, bad = f.step(one, spike)
+        col = f.names.index('wrist_l')
+        check(f'{mode}: one-frame spike rejected',
+              bad[0, col] and abs(out[0, wrist, 0] - base[wrist, 0]) < 1e-9, f'{out[0, wrist, 0]}')
+        f.step(one, _frame(one, base, {1: (0.0, 0.0)}))
+
+        # steady fast motion from rest: only the onset is held
+        held = []
+        for t in range(1, FRAMES + 1):
+            out, bad = f.step(one, _frame(one, base, {1: (FAST * t, 0.0)}))
+            held.append(bool(bad[0].any()))
+        onset = f.max_reject
+        check(f'{mode}: fast motion held for the first max_reject frames only',
+              all(held[:onset]) and not any(held[onset:]), ''.join('x' if h else '.' for h in held))
+        check(f'{mode}: fast motion tracked exactly after the onset',
+              np.allclose(out[0, :len(base), :2], base + (FAST * FRAMES, 0.0)))
+        check(f'{mode}: typical speed seeded from the accepted jump',
+              np.allclose(f.speed[0], FAST, atol=1e-6), f'{f.speed[0].min()}..{f.speed[0].max()}')
+
+        # spike while moving fast: still rejected, replaced by the prediction / hold
+        t = FRAMES + 1
+        spike = _frame(one, base, {1: (FAST * t, 0.0)})
+        spike[0, wrist, 1] += 0.5
+        out, bad = f.step(one, spike)
+        check(f'{mode}: spike during fast motion rejected', bad[0, col] and not bad[0].sum() > 1,
+              f'{np.flatnonzero(bad[0])}')
+
+        # a second person joins: person 1 keeps its state (no new onset) and counts
+        counts = f.counts.copy()
+        joined = []
+        for k in range(1, 6):
+            t += 1
+            out, bad = f.step(two, _frame(two, base, {1: (FAST * t, 0.0), 2: (0.0, 0.2)}))
+            joined.append(bool(bad[0].any()))
+        check(f'{mode}: person joining keeps the other filter state', not any(joined), str(joined))
+        check(f'{mode}: rejection counts survive a layout change', (f.counts >= counts).all()
+              and f.counts.sum() == counts.sum())
+
+        # person 1 leaves: person 2 keeps its state, so a spike is still caught
+        p2 = _layout(names, [2])
+        f.step(p2, _frame(p2, base, {2: (0.0, 0.2)}))
+        spike = _frame(p2, base, {2: (0.0, 0.2)})
+        spike[0, wrist, 0] += 0.3
+        out, bad = f.step(p2, spike)
+        check(f'{mode}: person leaving keeps the remaining filter state',
+              f.pids == [2] and bad[0, col] and bad[0].sum() == 1, f'{np.flatnonzero(bad[0])}')
+
+    print(f"{sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
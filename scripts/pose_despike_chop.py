@@ -0,0 +1,56 @@
+# scripts/pose_despike_chop.py
+# Script CHOP 'pose_despike' (after pose_gapfill, before zones / bones / effects).
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, m_img_w/m_img_h
+#   Output : the same channels with spikes replaced (see pose_despike.py), plus
+#            rej_{landmark} / rej_total rejection counts summed over persons, for tuning
+# Call op('pose_despike_callbacks').module.ResetCounts() to zero the counters.
+
+import os
+
+import numpy as np
+
+import pose_despike
+import pose_frame
+
+BONES_CSV = 'data/skeletonPairs.csv'
+NAMES_CSV = 'data/landmark_names.csv'
+
+_st = {}    # scriptOp path -> state
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def ResetCounts():
+    for st in _st.values():
+        st['filter'].reset_counts()
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    st = _st.get(scriptOp.path)
+    if st is None:
+        st = _st[scriptOp.path] = {
+            'filter': pose_despike.SpikeFilter(pose_frame.load_bones(_data(BONES_CSV))),
+            'order': pose_frame.load_landmark_names(_data(NAMES_CSV)),
+            'layout': None, 'frame': None}
+    key = tuple(c.name for c in src.chans())
+    if st['layout'] is None or st['layout'].key != key:
+        st['layout'] = pose_frame.FrameLayout(key, st['order'])
+    layout, filt = st['layout'], st['filter']
+
+    values = src.numpyArray()[:, -1].astype(float)
+    st['frame'] = frame = layout.pack(values, st['frame'])
+    aspect = _meta(src, 'm_img_w', 16.0) / _meta(src, 'm_img_h', 9.0)
+    filt.step(layout, frame, aspect)
+
+    # scatter the filtered frame back onto the input channels (inverse of pack)
+    values[layout.src] = frame.reshape(-1)[layout.dst]
+    pose_frame.WriteChannels(scriptOp, list(key) + filt.channel_names(),
+                             np.concatenate([values, filt.channel_values()]))
+    return
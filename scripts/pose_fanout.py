@@ -16,7 +16,7 @@ Recognized incoming OSC messages:
     /pose/timestamp_str     <string "YYYY.MM.DD.HH.MM.SS.ms"> (strings dont go into chop)
 
   Landmarks:
-    /pose/p{pid}/{lid}      <float x> <float y> <float z>
+    /pose/p{pid}/{lid}      <float x> <float y> <float z> [<float visibility>]
     /pose/p{pid}/{name}
     /p{pid}/{lid|name}      (short form accepted)
 Not recognized messages
@@ -26,6 +26,8 @@ Not recognized messages
     
 Outputs (CHOP channels):
   - p{pid}_{name}_x, p{pid}_{name}_y, p{pid}_{name}_z
+  - p{pid}_{name}_v        visibility 0..1, only when the sender provides a 4th arg
+                           (EMIT_VISIBILITY); consumers treat a missing _v as 1.0
   - p{pid}_present
   - pose_n_people
   - pose_frame_count
@@ -51,6 +53,7 @@ ID_MAP_DAT_NAME      = 'landmark_map'
 TS_STR_DAT_NAME      = 'pose_ts_str'
 POSE_META_DAT_NAME   = 'poseMetaDAT'   # NEW  (Table DAT with header: key,value)
 
+EMIT_VISIBILITY      = True    # emit p{pid}_{name}_v from the optional 4th landmark arg
 LOG_BUNDLES          = False
 LOG_FILE             = 'pose_fanout.log'
 LOG_TEXT_DAT_NAME    = 'pose_log'
@@ -328,8 +331,9 @@ def onCook(scriptOp):
                 x = _safe_float(a1); y = _safe_float(a2); z = _safe_float(a3)
                 if None in (x, y, z):
                     continue
+                v = _safe_float(a4) if (EMIT_VISIBILITY and a4 is not None) else None
                 lname = id_map.get(lid, f'id_{lid:02d}')
-                latest[(pid, lname)] = (x, y, z)
+                latest[(pid, lname)] = (x, y, z, v)
                 present.add(pid)
                 continue
             except Exception:
@@ -343,18 +347,22 @@ def onCook(scriptOp):
                 x = _safe_float(a1); y = _safe_float(a2); z = _safe_float(a3)
                 if None in (x, y, z):
                     continue
-                latest[(pid, lname)] = (x, y, z)
+                v = _safe_float(a4) if (EMIT_VISIBILITY and a4 is not None) else None
+                latest[(pid, lname)] = (x, y, z, v)
                 present.add(pid)
                 continue
             except Exception:
                 pass
 
     # output landmark channels, sorted by name
-    for (pid, lname), (x, y, z) in sorted(latest.items(), key=lambda kv: (kv[0][0], kv[0][1])):
+    for (pid, lname), (x, y, z, v) in sorted(latest.items(), key=lambda kv: (kv[0][0], kv[0][1])):
         _append_scalar(scriptOp, f'p{pid}_{lname}_x', x)
         _append_scalar(scriptOp, f'p{pid}_{lname}_y', y)
         _append_scalar(scriptOp, f'p{pid}_{lname}_z', z)
         count_chanAdds += 3
+        if v is not None:
+            _append_scalar(scriptOp, f'p{pid}_{lname}_v', min(1.0, max(0.0, v)))
+            count_chanAdds += 1
 
 
     # presence flags
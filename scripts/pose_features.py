@@ -0,0 +1,136 @@
+# scripts/pose_features.py
+# Vectorized pose feature stage: one numpy pass per frame over all persons.
+#
+# Features per person (channel = p{pid}_{feature}):
+#   ang_{a}_{b}_{c}   joint angle at b in degrees (0..180), one per pair of skeleton
+#                     edges sharing b (data/skeleton_edges.csv): elbows, knees, shoulders, hips
+#   len_{bone}        bone length (data/skeletonPairs.csv), aspect corrected, UV height units
+#   {lm}_vx/_vy       landmark velocity per second from the frame history
+#   {lm}_spd/_acc     speed and acceleration magnitude (per s, per s^2)
+#   bbox_x0/_y0/_x1/_y1/_w/_h, cx/cy (UV); bbox_diag, scale (torso length, else
+#                     bbox diag) in aspect-corrected units
+#
+# Angles, lengths and motion use UV with x scaled by `aspect` (image w/h), i.e.
+# units of image height, so they are isotropic. Invisible landmarks (v <= min_visibility) are NaN-masked.
+#
+# FeatureStage is pure numpy (benchmark: scripts/pose_features_bench.py);
+# pose_features_chop.py is the Script CHOP that feeds it from pose_fanout.
+# Put this in a Text DAT named 'pose_features' in /local/modules.
+
+import numpy as np
+
+import pose_frame
+
+HISTORY = 3          # frames read for motion (current + HISTORY - 1 from the ring); velocity
+                     # needs >= 2, acceleration >= 3, more frames are read but unused
+BBOX_FEATURES = ('bbox_x0', 'bbox_y0', 'bbox_x1', 'bbox_y1', 'bbox_w', 'bbox_h', 'bbox_diag',
+                 'cx', 'cy', 'scale')
+MOTION = ('vx', 'vy', 'spd', 'acc')
+
+
+def joints_from_edges(edges):
+    """[(a, b, c)]: every pair of edges meeting at b, in edge-file order."""
+    nbrs = {}
+    for a, b in edges:
+        nbrs.setdefault(a, []).append(b)
+        nbrs.setdefault(b, []).append(a)
+    out = []
+    for b, ns in nbrs.items():
+        for i in range(len(ns)):
+            for j in range(i + 1, len(ns)):
+                out.append((ns[i], b, ns[j]))
+    return out
+
+
+class FeatureStage:
+    """
+    Compiles joint/bone/landmark indices per FrameLayout, then computes all
+    features for a (P, L, 4) frame plus the shared history ring.
+    """
+
+    def __init__(self, edges, bones, min_visibility=0.5):
+        self.joints = joints_from_edges(edges)
+        self.bones = list(bones)
+        self.min_visibility = float(min_visibility)
+        self.layout_key = None
+
+    def compile(self, layout):
+        """Resolve names against a layout; features whose landmarks are missing are dropped."""
+        ix = layout.index
+        self.j = [(a, b, c) for a, b, c in self.joints if a in ix and b in ix and c in ix]
+        self.ja = layout.idx([a for a, _, _ in self.j])
+        self.jb = layout.idx([b for _, b, _ in self.j])
+        self.jc = layout.idx([c for _, _, c in self.j])
+        self.b = [(n, s, e) for n, s, e in self.bones if s in ix and e in ix]
+        self.bs = layout.idx([s for _, s, _ in self.b])
+        self.be = layout.idx([e for _, _, e in self.b])
+        self.real = np.array([i for i, n in enumerate(layout.landmarks)
+                              if n not in pose_frame.VIRTUAL], dtype=np.intp)
+        torso = [('shoulders_mid', 'hips_mid'), ('shoulder_mid', 'hip_mid')]
+        self.torso = next((layout.idx(t) for t in torso if all(n in ix for n in t)), None)
+
+        names = [f'ang_{a}_{b}_{c}' for a, b, c in self.j]
+        names += [f'len_{n}' for n, _, _ in self.b]
+        names += [f'{layout.landmarks[i]}_{m}' for i in self.real for m in MOTION]
+        names += list(BBOX_FEATURES)
+        self.feature_names = names
+        self.channel_names = [f'p{pid}_{n}' for pid in layout.pids for n in names]
+        self.layout_key = layout.key
+
+    def compute(self, layout, frame, ring=None, fps=60.0, aspect=1.0):
+        """Returns (P, K) features in feature_names order (NaN where undefined)."""
+        if ring is not None and ring.capacity < HISTORY - 1:
+            raise ValueError(f"pose_features needs a ring of at least {HISTORY - 1} frames")
+        if self.layout_key != layout.key:
+            self.compile(layout)
+        P = frame.shape[0]
+        xy = frame[:, :, :2].copy()
+        xy[:, :, 0] *= aspect
+        xy[~pose_frame.valid(frame, self.min_visibility)] = np.nan
+
+        # joint angles
+        u = xy[:, self.ja] - xy[:, self.jb]
+        w = xy[:, self.jc] - xy[:, self.jb]
+        dot = (u * w).sum(-1)
+        cross = u[..., 0] * w[..., 1] - u[..., 1] * w[..., 0]
+        ang = np.degrees(np.abs(np.arctan2(cross, dot)))
+
+        # bone lengths
+        lens = np.linalg.norm(xy[:, self.be] - xy[:, self.bs], axis=-1)
+
+        # motion from history (ring holds previous frames, newest first via get())
+        R = len(self.real)
+        motion = np.full((P, R, 4), np.nan)
+        same = ring is not None and ring.key == layout.key
+        prev = [ring.get(k) if same else None for k in range(HISTORY - 1)]
+        prev = [f if f is not None and f.shape == frame.shape else None for f in prev]
+        if len(prev) > 0 and prev[0] is not None:
+            p1 = prev[0][:, self.real, :2].copy(); p1[:, :, 0] *= aspect
+            cur = xy[:, self.real]
+            vel = (cur - p1) * fps
+            motion[:, :, 0:2] = vel
+            motion[:, :, 2] = np.linalg.norm(vel, axis=-1)
+            if len(prev) > 1 and prev[1] is not None:
+                p2 = prev[1][:, self.real, :2].copy(); p2[:, :, 0] *= aspect
+                acc = (cur - 2.0 * p1 + p2) * (fps * fps)
+                motion[:, :, 3] = np.linalg.norm(acc, axis=-1)
+
+        # bbox / centroid in UV; diag and scale in aspect-corrected units
+        raw = frame[:, self.real, :2].copy()
+        raw[~np.isfinite(xy[:, self.real, 0])] = np.nan
+        seen = np.isfinite(raw[:, :, 0]).any(axis=1)
+        lo = np.full((P, 2), np.nan); hi = lo.copy(); cen = lo.copy()
+        if seen.any():
+            lo[seen] = np.nanmin(raw[seen], axis=1)
+            hi[seen] = np.nanmax(raw[seen], axis=1)
+            cen[seen] = np.nanmean(raw[seen], axis=1)
+        wh = hi - lo
+        diag = np.hypot(wh[:, 0] * aspect, wh[:, 1])
+        if self.torso is not None:
+            scale = np.linalg.norm(xy[:, self.torso[0]] - xy[:, self.torso[1]], axis=-1)
+            scale = np.where(np.isfinite(scale) & (scale > 0), scale, diag)
+        else:
+            scale = diag
+        box = np.column_stack([lo, hi, wh, diag, cen, scale])
+
+        return np.concatenate([ang, lens, motion.reshape(P, -1), box], axis=1)
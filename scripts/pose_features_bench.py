@@ -0,0 +1,82 @@
+# scripts/pose_features_bench.py
+# Cost of the vectorized feature stage versus person count (run outside TD):
+#
+#   python scripts/pose_features_bench.py --persons 1 2 4 8 16 --frames 500
+#
+# Builds a synthetic pose_fanout channel layout (33 landmarks per person, x/y/z),
+# then times pack + FeatureStage.compute + ring push per frame. For reference it
+# also times a per-person Python loop computing only the joint angles with
+# math.atan2, as landmarkSampleByDat does per bone.
+
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+import pose_features
+import pose_frame
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(HERE, '..', 'data')
+
+
+def _channels(names, persons):
+    chans = []
+    for pid in range(1, persons + 1):
+        for n in names:
+            chans += [f'p{pid}_{n}_x', f'p{pid}_{n}_y', f'p{pid}_{n}_z']
+        chans.append(f'p{pid}_present')
+    return chans
+
+def _loop_angles(layout, frame, joints):
+    out = []
+    for p in range(frame.shape[0]):
+        for a, b, c in joints:
+            ax, ay = frame[p, layout.index[a], :2]
+            bx, by = frame[p, layout.index[b], :2]
+            cx, cy = frame[p, layout.index[c], :2]
+            a1 = math.atan2(ay - by, ax - bx)
+            a2 = math.atan2(cy - by, cx - bx)
+            d = abs(math.degrees(a1 - a2)) % 360.0
+            out.append(360.0 - d if d > 180.0 else d)
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--persons', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    ap.add_argument('--frames', type=int, default=500)
+    args = ap.parse_args(argv)
+
+    names = pose_frame.load_landmark_names(os.path.join(DATA, 'landmark_names.csv'))
+    edges = pose_frame.load_edges(os.path.join(DATA, 'skeleton_edges.csv'))
+    bones = pose_frame.load_bones(os.path.join(DATA, 'skeletonPairs.csv'))
+    rng = np.random.default_rng(1)
+
+    print(f"{'persons':>7} {'channels':>8} {'features':>8} {'stage ms':>9} {'per person':>10} {'loop ms*':>9}")
+    for P in args.persons:
+        chans = _channels(names, P)
+        layout = pose_frame.FrameLayout(chans, names)
+        stage = pose_features.FeatureStage(edges, bones)
+        ring = pose_frame.FrameRing(8)
+        base = rng.random(len(chans))
+        frame = None
+        t0 = time.perf_counter()
+        for i in range(args.frames):
+            values = base + 0.01 * math.sin(i * 0.1)
+            frame = layout.pack(values, frame)
+            feats = stage.compute(layout, frame, ring, fps=60.0, aspect=16 / 9)
+            ring.push(frame, layout.key)
+        ms = (time.perf_counter() - t0) * 1000.0 / args.frames
+
+        n_loop = max(1, args.frames // 5)
+        t0 = time.perf_counter()
+        for _ in range(n_loop):
+            _loop_angles(layout, frame, stage.j)
+        loop_ms = (time.perf_counter() - t0) * 1000.0 / n_loop
+        print(f"{P:>7} {len(chans):>8} {feats.size:>8} {ms:>9.3f} {ms / P:>10.3f} {loop_ms:>9.3f}")
+    print("* loop = per-person Python atan2 for the joint angles only")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# scripts/pose_features_chop.py
+# Script CHOP 'pose_features' (next to pose_fanout).
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, p{pid}_present, m_img_w/m_img_h
+#   Output : p{pid}_{feature} channels from pose_features.FeatureStage (one sample)
+#
+# The frame array is packed once per cook and pushed to the shared 'pose' ring
+# (pose_frame.GetRing) after the features are computed, so other stages can read
+# the same history. Joints/bones come from data/skeleton_edges.csv and
+# data/skeletonPairs.csv; the layout and indices are only rebuilt when the input
+# channel names change.
+
+import os
+
+import pose_features
+import pose_frame
+
+EDGES_CSV = 'data/skeleton_edges.csv'
+BONES_CSV = 'data/skeletonPairs.csv'
+NAMES_CSV = 'data/landmark_names.csv'
+RING = 'pose'
+RING_FRAMES = 64
+
+_st = {}    # scriptOp path -> {'stage', 'layout', 'frame'}
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def _state(scriptOp):
+    st = _st.get(scriptOp.path)
+    if st is None:
+        st = _st[scriptOp.path] = {
+            'stage': pose_features.FeatureStage(pose_frame.load_edges(_data(EDGES_CSV)),
+                                                pose_frame.load_bones(_data(BONES_CSV))),
+            'order': pose_frame.load_landmark_names(_data(NAMES_CSV)),
+            'layout': None, 'frame': None}
+    return st
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    st = _state(scriptOp)
+    names = tuple(c.name for c in src.chans())
+    if st['layout'] is None or st['layout'].key != names:
+        st['layout'] = pose_frame.FrameLayout(names, st['order'])
+    layout = st['layout']
+    if not len(layout):
+        scriptOp.clear()
+        return
+
+    values = src.numpyArray()[:, -1].astype(float)
+    st['frame'] = frame = layout.pack(values, st['frame'])
+    aspect = _meta(src, 'm_img_w', 16.0) / _meta(src, 'm_img_h', 9.0)
+    ring = pose_frame.GetRing(RING, max(RING_FRAMES, pose_features.HISTORY - 1))
+
+    feats = st['stage'].compute(layout, frame, ring, fps=project.cookRate, aspect=aspect)
+    ring.push(frame, layout.key)
+    pose_frame.WriteChannels(scriptOp, st['stage'].channel_names, feats.ravel())
+    return
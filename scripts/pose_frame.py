@@ -0,0 +1,255 @@
+# scripts/pose_frame.py
+# Shared pose frame array for the numpy pose stages (features, normalisation,
+# gestures, zones, filters, ...).
+#
+# pose_fanout emits one CHOP channel per coordinate: p{pid}_{landmark}_{x|y|z}
+# (plus _v for visibility when the sender provides it) and p{pid}_present.
+# FrameLayout parses those names once into gather indices; pack() then turns the
+# CHOP's value vector into a (persons, landmarks, 4) float array [x, y, z, v] with
+# NaN for missing coordinates. Virtual mid landmarks used by skeletonPairs.csv
+# (shoulder_mid, hips_mid, ...) are appended and filled as the mean of their parents.
+#
+# FrameRing keeps the last N frame arrays (velocity, gestures, gap filling);
+# rings are shared between stages by name via GetRing(). load_recording() reads
+# recorded pose streams (CSV or .npz) for offline template/library building.
+#
+# Pure numpy; no TouchDesigner objects except WriteChannels(scriptOp, ...).
+# Put this in a Text DAT named 'pose_frame' in /local/modules.
+
+import csv
+import re
+
+import numpy as np
+
+CHANNEL_RE = re.compile(r'^p(\d+)_(.+)_([xyzv])$')
+PRESENT_RE = re.compile(r'^p(\d+)_present$')
+PLANES = 'xyzv'
+X, Y, Z, V = 0, 1, 2, 3
+
+# virtual landmark -> parents (mean), spellings as used in data/skeletonPairs.csv
+VIRTUAL = {
+    'shoulder_mid': ('shoulder_l', 'shoulder_r'),
+    'shoulders_mid': ('shoulder_l', 'shoulder_r'),
+    'hip_mid': ('hip_l', 'hip_r'),
+    'hips_mid': ('hip_l', 'hip_r'),
+}
+
+
+# --- data files -------------------------------------------------------------------
+def load_landmark_names(path):
+    """'TD Name' column of data/landmark_names.csv, in id order."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    header = [h.strip().lower() for h in rows[0]]
+    col = header.index('td name') if 'td name' in header else 1
+    return [r[col].strip() for r in rows[1:] if len(r) > col and r[col].strip()]
+
+def load_edges(path):
+    """[(a, b)] from data/skeleton_edges.csv."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    return [(r[0].strip(), r[1].strip()) for r in rows[1:] if len(r) >= 2 and r[0].strip()]
+
+def load_bones(path):
+    """[(bone, start, end)] from data/skeletonPairs.csv."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    return [(r[0].strip(), r[1].strip(), r[2].strip()) for r in rows[1:]
+            if len(r) >= 3 and r[0].strip()]
+
+def load_recording(path):
+    """
+    Pose recording -> (channel names, values (frames, channels)). Either a CSV with a
+    header of pose_fanout channel names and one row per frame, or an .npz with
+    'names' and 'values' (as written by save_recording).
+    """
+    if path.lower().endswith('.npz'):
+        with np.load(path, allow_pickle=False) as z:
+            return [str(n) for n in z['names']], np.asarray(z['values'], dtype=np.float64)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    names = [h.strip() for h in rows[0]]
+    vals = np.array([[float(c) if c.strip() else np.nan for c in r] for r in rows[1:] if r],
+                    dtype=np.float64)
+    return names, vals.reshape(-1, len(names))
+
+def save_recording(path, names, values):
+    np.savez_compressed(path, names=np.array(names), values=np.asarray(values, dtype=np.float32))
+
+
+# --- layout ---------------------------------------------------------------------
+class FrameLayout:
+    """
+    Channel-name -> frame-array mapping for one CHOP layout.
+
+    pids        sorted person ids (row order of the frame array)
+    landmarks   landmark names (column order); known order first, then extras, then virtual
+    index       {landmark: column}
+    """
+
+    def __init__(self, chan_names, landmark_order=None):
+        self.key = tuple(chan_names)
+        found, pids, present = {}, set(), {}
+        for ci, name in enumerate(self.key):
+            m = CHANNEL_RE.match(name)
+            if m:
+                pid, lm, plane = int(m.group(1)), m.group(2), PLANES.index(m.group(3))
+                pids.add(pid)
+                found.setdefault(lm, []).append((ci, pid, plane))
+                continue
+            m = PRESENT_RE.match(name)
+            if m:
+                present[int(m.group(1))] = ci
+                pids.add(int(m.group(1)))
+
+        order = [n for n in (landmark_order or []) if n in found]
+        order += sorted(n for n in found if n not in set(order))
+        self.virtual = []
+        for vname, (a, b) in VIRTUAL.items():
+            if a in found and b in found and vname not in found:
+                order.append(vname)
+                self.virtual.append((len(order) - 1, order.index(a), order.index(b)))
+
+        self.pids = sorted(pids)
+        self.landmarks = order
+        self.index = {n: i for i, n in enumerate(order)}
+        prow = {pid: i for i, pid in enumerate(self.pids)}
+        L = len(order)
+        src, dst = [], []
+        has_v = np.zeros((len(self.pids), L), dtype=bool)
+        for lm, hits in found.items():
+            li = self.index[lm]
+            for ci, pid, plane in hits:
+                src.append(ci)
+                dst.append((prow[pid] * L + li) * 4 + plane)
+                if plane == V:
+                    has_v[prow[pid], li] = True
+        self.src = np.array(src, dtype=np.intp)
+        self.dst = np.array(dst, dtype=np.intp)
+        self.has_visibility = has_v
+        self.present_src = np.array([present.get(pid, -1) for pid in self.pids], dtype=np.intp)
+        self.shape = (len(self.pids), L, 4)
+
+    def __len__(self):
+        return len(self.pids)
+
+    def idx(self, names):
+        """Column indices for landmark names (KeyError on unknown)."""
+        return np.array([self.index[n] for n in names], dtype=np.intp)
+
+    def pack(self, values, out=None):
+        """
+        values: 1-D vector of the CHOP's channels (layout order). Returns the
+        (P, L, 4) frame array; v defaults to 1 where x/y exist and no _v channel came in.
+        """
+        if out is None or out.shape != self.shape:
+            out = np.empty(self.shape, dtype=np.float64)
+        flat = out.reshape(-1)
+        flat.fill(np.nan)
+        flat[self.dst] = values[self.src]
+        vis = out[:, :, V]
+        ok = np.isfinite(out[:, :, X]) & np.isfinite(out[:, :, Y])
+        vis[~self.has_visibility & ok] = 1.0
+        vis[~ok] = 0.0
+        for vi, a, b in self.virtual:
+            out[:, vi, :] = 0.5 * (out[:, a, :] + out[:, b, :])
+            out[:, vi, V] = np.minimum(out[:, a, V], out[:, b, V])
+        return out
+
+    def present(self, values, frame=None):
+        """(P,) bool: p{pid}_present > 0.5, else any finite landmark in frame."""
+        p = np.zeros(len(self.pids), dtype=bool)
+        has = self.present_src >= 0
+        p[has] = values[self.present_src[has]] > 0.5
+        if frame is not None and (~has).any():
+            p[~has] = np.isfinite(frame[~has, :, X]).any(axis=1)
+        return p
+
+    def channel_names(self, prefix='p', planes='xyz', landmarks=None):
+        """Names in (person, landmark, plane) order, e.g. n1_wrist_l_x for prefix='n'."""
+        lms = self.landmarks if landmarks is None else landmarks
+        return [f'{prefix}{pid}_{lm}_{pl}' for pid in self.pids for lm in lms for pl in planes]
+
+
+def valid(frame, min_visibility=0.5):
+    """(P, L) bool validity mask: finite x/y and visibility above the threshold."""
+    return (frame[:, :, V] > min_visibility) & np.isfinite(frame[:, :, X]) & np.isfinite(frame[:, :, Y])
+
+def xy_channel_pairs(names):
+    """Indices (xi, yi) of matching p{pid}_{landmark}_x / _y channels in a name list."""
+    pos = {n: i for i, n in enumerate(names)}
+    xi, yi = [], []
+    for i, n in enumerate(names):
+        m = CHANNEL_RE.match(n)
+        if m and m.group(3) == 'x':
+            j = pos.get(n[:-1] + 'y')
+            if j is not None:
+                xi.append(i)
+                yi.append(j)
+    return np.array(xi, dtype=np.intp), np.array(yi, dtype=np.intp)
+
+
+# --- history ----------------------------------------------------------------------
+class FrameRing:
+    """Fixed-capacity ring of frame arrays; reset when the layout key changes."""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.buf = None
+        self.key = None
+        self.head = 0       # next write slot
+        self.count = 0
+
+    def reset(self):
+        self.buf = None
+        self.key = None
+        self.head = self.count = 0
+
+    def push(self, frame, key=None):
+        if self.buf is None or key != self.key or self.buf.shape[1:] != frame.shape:
+            self.buf = np.full((self.capacity,) + frame.shape, np.nan)
+            self.key = key
+            self.head = self.count = 0
+        self.buf[self.head] = frame
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def __len__(self):
+        return self.count
+
+    def get(self, age=0):
+        """Frame `age` steps back (0 = newest), or None."""
+        if age >= self.count:
+            return None
+        return self.buf[(self.head - 1 - age) % self.capacity]
+
+    def latest(self, k):
+        """Up to k newest frames, oldest first: (k, P, L, 4)."""
+        k = min(int(k), self.count)
+        if k <= 0:
+            return None
+        idx = (self.head - k + np.arange(k)) % self.capacity
+        return self.buf[idx]
+
+
+_rings = {}
+
+def GetRing(name, capacity=64):
+    """Process-wide shared ring by name (grown if a stage asks for more capacity)."""
+    r = _rings.get(name)
+    if r is None or r.capacity < capacity:
+        r = _rings[name] = FrameRing(capacity)
+    return r
+
+
+# --- CHOP output --------------------------------------------------------------------
+def WriteChannels(scriptOp, names, values):
+    """Single-sample Script CHOP output; channels are only re-created when names change."""
+    if scriptOp.numChans != len(names) or scriptOp.fetch('_pf_names', None, search=False) != names:
+        scriptOp.clear()
+        scriptOp.numSamples = 1
+        if names:
+            scriptOp.appendChan(names)
+        scriptOp.store('_pf_names', names)
+    for ch, v in zip(scriptOp.chans(), values):
+        ch[0] = v
@@ -0,0 +1,175 @@
+# scripts/pose_gapfill.py
+# Occlusion gap filling for dropped landmarks.
+#
+# When a limb is briefly occluded MediaPipe omits the landmark (pose_fanout then
+# drops its channels, which changes the CHOP layout) or reports it as not visible.
+# GapFiller keeps its own stable (persons, landmarks) space that only grows, maps
+# every incoming layout into it, and fills the holes:
+#   - velocity extrapolation: a missing landmark keeps moving with its last
+#     per-frame velocity, decayed by vel_decay each frame;
+#   - bone-length constraint: if the bone's parent joint (skeletonPairs.csv start)
+#     is known, the filled point is put back at the last measured bone length from
+#     the parent, along the extrapolated direction (aspect-corrected).
+# Filled samples are marked, and their visibility is the last real visibility for
+# up to max_gap frames, then fades linearly to 0 over `fade` frames, after which
+# the landmark is dropped (NaN). A person whose landmarks have all expired is
+# removed. Everything is one vectorised pass over all persons and landmarks.
+#
+# The filled frames are pushed to the shared 'pose_filled' ring
+# (pose_frame.GetRing) so later stages can read the history.
+# Put this in a Text DAT named 'pose_gapfill' in /local/modules.
+
+import numpy as np
+
+import pose_frame
+
+MAX_GAP = 6          # frames a landmark is held at full visibility
+FADE = 6             # frames to fade out after that
+VEL_DECAY = 0.8      # per-frame velocity damping while extrapolating
+LEN_ALPHA = 0.2      # bone length EMA
+
+
+class GapFiller:
+
+    def __init__(self, bones, max_gap=MAX_GAP, fade=FADE, vel_decay=VEL_DECAY,
+                 min_visibility=0.5, len_alpha=LEN_ALPHA):
+        self.bones = [(s, e) for _, s, e in bones]
+        self.max_gap = int(max_gap)
+        self.fade = max(0, int(fade))
+        self.vel_decay = float(vel_decay)
+        self.min_visibility = float(min_visibility)
+        self.len_alpha = float(len_alpha)
+        self.pids, self.landmarks = [], []
+        self.pos = np.zeros((0, 0, 3))
+        self.vel = np.zeros((0, 0, 3))
+        self.vis = np.zeros((0, 0))
+        self.age = np.zeros((0, 0), dtype=np.intp)
+        self.blen = np.zeros((0, 0))
+        self.filled = np.zeros((0, 0), dtype=bool)
+        self._maps = {}
+        self._compile_bones()
+
+    # --- state space --------------------------------------------------------------
+    def _grow(self, pids, landmarks):
+        """Extend the state with new persons / landmarks, keeping existing rows."""
+        new_p = [p for p in pids if p not in self.pids]
+        new_l = [n for n in landmarks if n not in self.landmarks]
+        if not new_p and not new_l:
+            return
+        L0 = len(self.landmarks)
+        self.pids = sorted(self.pids + new_p)
+        self.landmarks = self.landmarks + new_l
+        rows = np.array([self.pids.index(p) for p in self.pids if p not in new_p], dtype=np.intp)
+        self._reshape(rows, np.arange(L0))
+        self._compile_bones()
+
+    def _reshape(self, rows, cols):
+        """Re-lay state arrays to the current pids/landmarks; rows/cols give where old entries go."""
+        P, L = len(self.pids), len(self.landmarks)
+        def put(a, fill, dtype=None):
+            out = np.full((P, L) + a.shape[2:], fill, dtype=dtype or a.dtype)
+            if len(rows) and len(cols):
+                out[np.ix_(rows, cols)] = a[:len(rows), :len(cols)]
+            return out
+        self.pos = put(self.pos, np.nan)
+        self.vel = put(self.vel, 0.0)
+        self.vis = put(self.vis, 0.0)
+        self.age = put(self.age, np.iinfo(np.intp).max // 2)
+        self.filled = put(self.filled, False)
+        blen = np.full((P, len(self.bones)), np.nan)
+        if self.blen.size and len(rows):
+            blen[rows, :self.blen.shape[1]] = self.blen[:len(rows)]
+        self.blen = blen
+        self._maps.clear()
+
+    def _compile_bones(self):
+        ix = {n: i for i, n in enumerate(self.landmarks)}
+        use = [(i, ix[s], ix[e]) for i, (s, e) in enumerate(self.bones) if s in ix and e in ix]
+        self.b_id = np.array([u[0] for u in use], dtype=np.intp)
+        self.b_start = np.array([u[1] for u in use], dtype=np.intp)
+        self.b_end = np.array([u[2] for u in use], dtype=np.intp)
+
+    def _map(self, layout):
+        """(state rows, state cols, layout cols) for an incoming layout; cached per layout key."""
+        m = self._maps.get(layout.key)
+        if m is None:
+            real = [i for i, n in enumerate(layout.landmarks) if n not in pose_frame.VIRTUAL]
+            self._grow(layout.pids, [layout.landmarks[i] for i in real])
+            rows = np.array([self.pids.index(p) for p in layout.pids], dtype=np.intp)
+            cols = np.array([self.landmarks.index(layout.landmarks[i]) for i in real], dtype=np.intp)
+            m = self._maps[layout.key] = (rows, cols, np.array(real, dtype=np.intp))
+        return m
+
+    def _keep_rows(self, rows):
+        """Drop persons not in rows (all landmarks expired)."""
+        for name in ('pos', 'vel', 'vis', 'age', 'filled', 'blen'):
+            setattr(self, name, getattr(self, name)[rows])
+        self.pids = [self.pids[r] for r in rows]
+        self._maps.clear()
+
+    # --- per frame ------------------------------------------------------------------
+    def step(self, layout, frame, aspect=1.0):
+        """
+        Feed one (P, L, 4) frame. Returns (out (Ps, Ls, 4), filled (Ps, Ls) bool) in the
+        filler's own space (self.pids x self.landmarks); NaN where nothing is known.
+        """
+        rows, cols, src = self._map(layout)
+        P, L = len(self.pids), len(self.landmarks)
+        cur = np.full((P, L, 4), np.nan)
+        cur[:, :, pose_frame.V] = 0.0
+        if len(rows) and len(cols):
+            cur[np.ix_(rows, cols)] = frame[:, src]
+        ok = pose_frame.valid(cur, self.min_visibility)
+        okx = ok[..., None]
+
+        # velocity: measured between consecutive real samples, decayed while filling
+        was_real = self.age == 0
+        self.vel = np.where(okx & was_real[..., None], cur[..., :3] - self.pos,
+                            np.where(okx, 0.0, self.vel))
+        pred = self.pos + self.vel
+        self.vel = np.where(okx, self.vel, self.vel * self.vel_decay)
+        self.age = np.where(ok, 0, self.age + 1)
+        self.vis = np.where(ok, cur[..., pose_frame.V], self.vis)
+        pos = np.where(okx, cur[..., :3], pred)
+
+        # bone lengths (aspect-corrected xy) and the parent constraint for filled ends
+        if len(self.b_id):
+            s, e = self.b_start, self.b_end
+            d = pos[:, e, :2] - pos[:, s, :2]
+            d[..., 0] *= aspect
+            ln = np.linalg.norm(d, axis=-1)
+            both = ok[:, s] & ok[:, e]
+            bl = self.blen[:, self.b_id]
+            bl = np.where(both, np.where(np.isfinite(bl), bl + self.len_alpha * (ln - bl), ln), bl)
+            self.blen[:, self.b_id] = bl
+            fix = ~ok[:, e] & np.isfinite(pos[:, s, 0]) & np.isfinite(bl) & (ln > 1e-9)
+            if fix.any():
+                scale = np.where(fix, bl / np.maximum(ln, 1e-9), 1.0)
+                fixed = pos[:, s, :2] + (pos[:, e, :2] - pos[:, s, :2]) * scale[..., None]
+                pr, pb = np.nonzero(fix)
+                pos[pr, e[pb], :2] = fixed[pr, pb]
+
+        limit = self.max_gap + self.fade
+        alive = (self.age <= limit) & np.isfinite(pos[..., 0])
+        fade = np.clip((limit - self.age) / self.fade, 0.0, 1.0) if self.fade else (self.age <= self.max_gap)
+        v = np.where(ok, self.vis, self.vis * np.where(self.age <= self.max_gap, 1.0, fade))
+        self.pos = np.where(alive[..., None], pos, np.nan)
+        self.filled = alive & ~ok
+
+        out = np.concatenate([self.pos, np.where(alive, v, 0.0)[..., None]], axis=-1)
+        keep = alive.any(axis=1)
+        if not keep.all():
+            self._keep_rows(np.flatnonzero(keep))
+            out = out[keep]
+        return out, self.filled
+
+    def channel_names(self):
+        """p{pid}_{lm}_{x,y,z,v} in state order, then p{pid}_{lm}_f (filled flag) and p{pid}_present."""
+        names = [f'p{pid}_{lm}_{pl}' for pid in self.pids for lm in self.landmarks for pl in 'xyzv']
+        names += [f'p{pid}_{lm}_f' for pid in self.pids for lm in self.landmarks]
+        return names + [f'p{pid}_present' for pid in self.pids]
+
+    def channel_values(self, out, filled):
+        present = (out[..., pose_frame.V] > 0).any(axis=1)
+        return np.concatenate([np.nan_to_num(out, nan=0.0).ravel(), filled.ravel().astype(float),
+                               present.astype(float)])
@@ -0,0 +1,57 @@
+# scripts/pose_gapfill_chop.py
+# Script CHOP 'pose_gapfill' (directly after pose_fanout, before the other stages).
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, p{pid}_present, m_*
+#   Output : p{pid}_{landmark}_{x|y|z|v} for every landmark seen recently (layout stays
+#            stable while landmarks drop out), p{pid}_{landmark}_f = 1 on filled
+#            samples, p{pid}_present, and the m_* channels passed through.
+#
+# See pose_gapfill.py for the filling rules. Bones come from data/skeletonPairs.csv.
+
+import os
+
+import numpy as np
+
+import pose_frame
+import pose_gapfill
+
+BONES_CSV = 'data/skeletonPairs.csv'
+NAMES_CSV = 'data/landmark_names.csv'
+RING = 'pose_filled'
+RING_FRAMES = 64
+
+_st = {}    # scriptOp path -> state
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    st = _st.get(scriptOp.path)
+    if st is None:
+        st = _st[scriptOp.path] = {
+            'filler': pose_gapfill.GapFiller(pose_frame.load_bones(_data(BONES_CSV))),
+            'order': pose_frame.load_landmark_names(_data(NAMES_CSV)),
+            'layout': None, 'frame': None}
+    key = tuple(c.name for c in src.chans())
+    if st['layout'] is None or st['layout'].key != key:
+        st['layout'] = pose_frame.FrameLayout(key, st['order'])
+        st['meta'] = np.array([i for i, n in enumerate(key) if n.startswith('m_')], dtype=np.intp)
+    layout, filler = st['layout'], st['filler']
+
+    values = src.numpyArray()[:, -1].astype(float)
+    st['frame'] = frame = layout.pack(values, st['frame'])
+    aspect = _meta(src, 'm_img_w', 16.0) / _meta(src, 'm_img_h', 9.0)
+    out, filled = filler.step(layout, frame, aspect)
+
+    names = filler.channel_names()
+    pose_frame.GetRing(RING, RING_FRAMES).push(out, (tuple(filler.pids), tuple(filler.landmarks)))
+    pose_frame.WriteChannels(scriptOp, names + [key[i] for i in st['meta']],
+                             np.concatenate([filler.channel_values(out, filled), values[st['meta']]]))
+    return
@@ -0,0 +1,169 @@
+# scripts/pose_interaction.py
+# Person-to-person interaction metrics: "hands touching", "hand on someone's head",
+# "who is near whom".
+#
+# Landmark pairs come from data/interaction_pairs.csv:
+#   name,a,b,contact,release
+#   hands,wrist_l|wrist_r,wrist_l|wrist_r,0.04,0.06
+#   hand_head,wrist_l|wrist_r,nose|ear_l|ear_r,0.05,0.08
+# For every pair config and every two persons (pa, pb), dist is the nearest distance
+# between any `a` landmark of pa and any `b` landmark of pb (symmetrised, so it does
+# not matter who touches whom). Distances are in aspect-corrected UV (image height
+# units, like pose_features). A contact starts below `contact` and ends above
+# `release` (hysteresis). The contact state is kept per pid pair, not per layout: a
+# landmark dropping out or a person entering keeps ongoing contacts, and a person
+# leaving releases (0 event) every contact they were in.
+#
+# Instead of testing all persons x landmarks against each other, every frame the
+# `b` landmarks of all persons are binned into a spatial hash with cell size =
+# the largest release radius (sorted cell keys), and each `a` landmark only looks
+# at its 3x3 neighbourhood via searchsorted. Candidates are expanded and reduced
+# with numpy, so the cost is near-linear in the number of landmarks. Pairs further
+# apart than the radius report dist = radius (nothing closer found).
+# Put this in a Text DAT named 'pose_interaction' in /local/modules.
+
+import csv
+
+import numpy as np
+
+import pose_frame
+
+_OFFSETS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+_KEY = 1 << 20
+
+
+def load_pairs(path):
+    """Parse interaction_pairs.csv into dicts."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    pairs = []
+    for r in rows:
+        r = {(k or '').strip().lower(): (v or '').strip() for k, v in r.items()}
+        if not r.get('name'):
+            continue
+        contact = float(r.get('contact') or 0.05)
+        pairs.append({'name': r['name'],
+                      'a': [n.strip() for n in r.get('a', '').split('|') if n.strip()],
+                      'b': [n.strip() for n in r.get('b', '').split('|') if n.strip()],
+                      'contact': contact,
+                      'release': max(float(r.get('release') or contact), contact)})
+    return pairs
+
+
+class InteractionStage:
+
+    def __init__(self, pairs, min_visibility=0.5):
+        self.pairs = list(pairs)
+        self.names = [p['name'] for p in self.pairs]
+        self.contact = np.array([p['contact'] for p in self.pairs])
+        self.release = np.array([p['release'] for p in self.pairs])
+        self.radius = float(self.release.max()) if self.pairs else 0.1
+        self.min_visibility = float(min_visibility)
+        self.layout_key = None
+        self.pids = []
+        self.state = np.zeros((len(self.pairs), 0, 0), dtype=bool)
+
+    def compile(self, layout):
+        """Resolve landmark names; (C, La, Lb) mask of which (a, b) landmarks each config uses."""
+        ix = layout.index
+        a = sorted({n for p in self.pairs for n in p['a'] if n in ix}, key=ix.get)
+        b = sorted({n for p in self.pairs for n in p['b'] if n in ix}, key=ix.get)
+        self.a_idx, self.b_idx = layout.idx(a), layout.idx(b)
+        self.cfg = np.array([[[(na in p['a']) and (nb in p['b']) for nb in b] for na in a]
+                             for p in self.pairs], dtype=bool).reshape(len(self.pairs), len(a), len(b))
+        self.iu = np.triu_indices(len(layout), 1)
+        self.layout_key = layout.key
+
+    def _remap(self, pids):
+        """Carry contact state over for pid pairs that stay; pairs with a person gone release."""
+        old = {pid: i for i, pid in enumerate(self.pids)}
+        keep = [(r, old[pid]) for r, pid in enumerate(pids) if pid in old]
+        state = np.zeros((len(self.pairs), len(pids), len(pids)), dtype=bool)
+        if keep:
+            new_rows, old_rows = (np.array(v, dtype=np.intp) for v in zip(*keep))
+            state[:, new_rows[:, None], new_rows[None, :]] = self.state[:, old_rows[:, None], old_rows[None, :]]
+        stay = set(pids)
+        released = [(self.names[c], self.pids[i], self.pids[j], 0)
+                    for c, i, j in zip(*np.nonzero(self.state))
+                    if i < j and (self.pids[i] not in stay or self.pids[j] not in stay)]
+        self.pids, self.state = list(pids), state
+        return released
+
+    def _points(self, frame, idx, aspect):
+        """Visible landmarks of all persons flattened: xy (N, 2), person row, landmark slot."""
+        P, M = frame.shape[0], len(idx)
+        xy = frame[:, idx, :2].copy()
+        xy[..., 0] *= aspect
+        ok = pose_frame.valid(frame, self.min_visibility)[:, idx]
+        rows = np.broadcast_to(np.arange(P)[:, None], (P, M))
+        slots = np.broadcast_to(np.arange(M)[None, :], (P, M))
+        return xy[ok], rows[ok], slots[ok]
+
+    def compute(self, layout, frame, aspect=1.0):
+        """
+        Returns (dist (C, P, P), contact (C, P, P) bool, events [(name, pid_a, pid_b, 0|1)]).
+        dist is symmetric with the radius where nothing is closer (diagonal included).
+        """
+        if self.layout_key != layout.key:
+            self.compile(layout)
+        events = self._remap(layout.pids) if list(layout.pids) != self.pids else []
+        C, P = len(self.pairs), len(layout)
+        dist = np.full((C, P, P), self.radius)
+        if C and P > 1 and len(self.a_idx) and len(self.b_idx):
+            axy, arow, aslot = self._points(frame, self.a_idx, aspect)
+            bxy, brow, bslot = self._points(frame, self.b_idx, aspect)
+            if len(axy) and len(bxy):
+                self._nearest(dist, axy, arow, aslot, bxy, brow, bslot)
+        dist = np.minimum(dist, dist.transpose(0, 2, 1))
+
+        on = dist < self.contact[:, None, None]
+        off = dist > self.release[:, None, None]
+        new = (self.state | on) & ~off
+        for c, i, j in zip(*np.nonzero(new != self.state)):
+            if i < j:
+                events.append((self.names[c], layout.pids[i], layout.pids[j], int(new[c, i, j])))
+        self.state = new
+        return dist, new, events
+
+    def _nearest(self, dist, axy, arow, aslot, bxy, brow, bslot):
+        r = self.radius
+        bcell = np.floor(bxy / r).astype(np.int64)
+        bkey = bcell[:, 0] * _KEY + bcell[:, 1]
+        order = np.argsort(bkey, kind='stable')
+        bkey, bxy, brow, bslot = bkey[order], bxy[order], brow[order], bslot[order]
+
+        acell = np.floor(axy / r).astype(np.int64)
+        nkey = ((acell[:, None, 0] + _OFFSETS[None, :, 0]) * _KEY
+                + acell[:, None, 1] + _OFFSETS[None, :, 1]).ravel()          # (Na * 9,)
+        lo = np.searchsorted(bkey, nkey, 'left')
+        cnt = np.searchsorted(bkey, nkey, 'right') - lo
+        total = int(cnt.sum())
+        if not total:
+            return
+        ai = np.repeat(np.arange(len(nkey)) // len(_OFFSETS), cnt)
+        bi = np.repeat(lo, cnt) + np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        other = arow[ai] != brow[bi]
+        ai, bi = ai[other], bi[other]
+        d = np.linalg.norm(axy[ai] - bxy[bi], axis=1)
+        pa, pb = arow[ai], brow[bi]
+        use = self.cfg[:, aslot[ai], bslot[bi]]                                 # (C, n)
+        for c in range(len(self.pairs)):
+            m = use[c]
+            np.minimum.at(dist[c], (pa[m], pb[m]), d[m])
+
+    def proximity(self, dist):
+        """(P, P) 0..1: 1 - nearest distance / radius over all pair configs."""
+        if not len(dist):
+            return np.zeros(dist.shape[1:])
+        return np.clip(1.0 - dist.min(axis=0) / self.radius, 0.0, 1.0)
+
+    def channel_names(self, layout):
+        """d_{pair}_p{i}_p{j}, contact_{pair}_p{i}_p{j} for i < j, then prox_p{i}_p{j}."""
+        ij = [(layout.pids[i], layout.pids[j]) for i, j in zip(*self.iu)]
+        names = [f'{k}_{n}_p{a}_p{b}' for n in self.names for k in ('d', 'contact') for a, b in ij]
+        return names + [f'prox_p{a}_p{b}' for a, b in ij]
+
+    def channel_values(self, dist, contact):
+        i, j = self.iu
+        per = np.stack([dist[:, i, j], contact[:, i, j].astype(float)], axis=1)    # (C, 2, pairs)
+        return np.concatenate([per.ravel(), self.proximity(dist)[i, j]])
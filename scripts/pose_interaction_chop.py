@@ -0,0 +1,57 @@
+# scripts/pose_interaction_chop.py
+# Script CHOP 'pose_interaction' (next to pose_fanout).
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, m_img_w/m_img_h
+#   Output : d_{pair}_p{i}_p{j}        nearest distance (capped at the hash radius)
+#            contact_{pair}_p{i}_p{j}  0/1 with contact/release hysteresis
+#            prox_p{i}_p{j}            proximity matrix 0..1 (upper triangle, i < j)
+# Events through osc_router.Emit:
+#   /pose2art/contact/<pair> <pid_a> <pid_b> <1|0>
+#
+# Pair configs come from data/interaction_pairs.csv (see pose_interaction.py).
+
+import os
+
+import pose_frame
+import pose_interaction
+
+PAIRS_CSV = 'data/interaction_pairs.csv'
+NAMES_CSV = 'data/landmark_names.csv'
+ROUTER_DAT = '/ShowControlIO/osc_router'
+
+_st = {}    # scriptOp path -> state
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    st = _st.get(scriptOp.path)
+    if st is None:
+        st = _st[scriptOp.path] = {
+            'stage': pose_interaction.InteractionStage(pose_interaction.load_pairs(_data(PAIRS_CSV))),
+            'order': pose_frame.load_landmark_names(_data(NAMES_CSV)),
+            'layout': None, 'frame': None}
+    key = tuple(c.name for c in src.chans())
+    if st['layout'] is None or st['layout'].key != key:
+        st['layout'] = pose_frame.FrameLayout(key, st['order'])
+    layout, stage = st['layout'], st['stage']
+
+    values = src.numpyArray()[:, -1].astype(float)
+    st['frame'] = frame = layout.pack(values, st['frame'])
+    aspect = _meta(src, 'm_img_w', 16.0) / _meta(src, 'm_img_h', 9.0)
+    dist, contact, events = stage.compute(layout, frame, aspect)
+
+    router = op(ROUTER_DAT)
+    if router:
+        for name, pa, pb, on in events:
+            router.module.Emit(f'/pose2art/contact/{name}', pa, pb, on)
+
+    pose_frame.WriteChannels(scriptOp, stage.channel_names(layout), stage.channel_values(dist, contact))
+    return
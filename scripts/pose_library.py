@@ -0,0 +1,136 @@
+# scripts/pose_library.py
+# Nearest-pose search over a library of recorded reference poses.
+#
+# Each library entry is one body-scale-normalised pose (pose_normalize) flattened
+# to a vector over LIBRARY_LANDMARKS (x, y), with a label (e.g. the recording name).
+# The library is saved as data/pose_library.npz: vectors (N, D) float32,
+# labels (N,), landmarks.
+#
+# query() returns the top-k entries and distances for every live person in one
+# batch. Distances are RMS over the coordinates visible in the query, computed
+# with BLAS:  |q|^2 - 2 q.R^T + mask.(R^2)^T,  so invisible landmarks are ignored
+# instead of counting as zero. For large libraries with fully visible queries, a
+# scipy cKDTree is used when scipy is importable (TD does not ship it; the
+# brute-force matmul is the default and is faster at this dimensionality up to
+# tens of thousands of poses anyway, see scripts/pose_library_bench.py).
+# Put this in a Text DAT named 'pose_library' in /local/modules.
+
+import glob
+import os
+
+import numpy as np
+
+import pose_frame
+import pose_normalize
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+LIBRARY_LANDMARKS = ('shoulder_l', 'shoulder_r', 'elbow_l', 'elbow_r', 'wrist_l', 'wrist_r',
+                     'hip_l', 'hip_r', 'knee_l', 'knee_r', 'ankle_l', 'ankle_r')
+KDTREE_MIN = 50000       # use a KD-tree (if available) from this many entries
+
+
+class PoseLibrary:
+
+    def __init__(self, vectors, labels, landmarks=LIBRARY_LANDMARKS, use_tree=None):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.labels = [str(l) for l in labels]
+        self.landmarks = tuple(landmarks)
+        self.label_names = sorted(set(self.labels))
+        lid = {l: i for i, l in enumerate(self.label_names)}
+        self.label_ids = np.array([lid[l] for l in self.labels], dtype=np.intp)
+        self.sq = (self.vectors.astype(np.float64) ** 2)          # (N, D) for masked norms
+        self.norm2 = self.sq.sum(axis=1)
+        if use_tree is None:
+            use_tree = cKDTree is not None and len(self.vectors) >= KDTREE_MIN
+        self.tree = cKDTree(self.vectors) if use_tree and cKDTree is not None and len(self.vectors) else None
+
+    def __len__(self):
+        return len(self.vectors)
+
+    # --- io --------------------------------------------------------------------
+    def save(self, path):
+        np.savez_compressed(path, vectors=self.vectors, labels=np.array(self.labels),
+                            landmarks=np.array(self.landmarks))
+
+    @classmethod
+    def load(cls, path, **kw):
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z['vectors'], [str(l) for l in z['labels']],
+                       [str(n) for n in z['landmarks']], **kw)
+
+    @classmethod
+    def from_recordings(cls, paths, landmarks=LIBRARY_LANDMARKS, every=1, aspect=16.0 / 9.0, **kw):
+        """One entry per (recording frame, person); label = recording file name."""
+        vecs, labels = [], []
+        for path in paths:
+            names, values = pose_frame.load_recording(path)
+            layout = pose_frame.FrameLayout(names)
+            if not all(n in layout.index for n in landmarks):
+                continue
+            lidx = layout.idx(landmarks)
+            norm_stage = pose_normalize.NormalizeStage(scale_alpha=1.0)
+            label = os.path.splitext(os.path.basename(path))[0]
+            for v in values[::max(1, int(every))]:
+                norm, _, _ = norm_stage.compute(layout, layout.pack(v), aspect)
+                x = norm[:, lidx, :2].reshape(len(layout), -1)
+                ok = np.isfinite(x).all(axis=1)
+                vecs.extend(x[ok])
+                labels.extend([label] * int(ok.sum()))
+        D = 2 * len(landmarks)
+        return cls(np.array(vecs).reshape(-1, D), labels, landmarks, **kw)
+
+    @classmethod
+    def from_folder(cls, folder, **kw):
+        paths = sorted(glob.glob(os.path.join(folder, '*.npz')) + glob.glob(os.path.join(folder, '*.csv')))
+        return cls.from_recordings(paths, **kw)
+
+    # --- search ----------------------------------------------------------------
+    def vectors_from(self, layout, norm):
+        """(P, D) query vectors from a normalised frame; NaN where not visible."""
+        idx = np.array([layout.index.get(n, -1) for n in self.landmarks], dtype=np.intp)
+        q = np.full((len(layout), len(idx), 2), np.nan)
+        ok = idx >= 0
+        q[:, ok] = norm[:, idx[ok], :2]
+        return q.reshape(len(layout), -1)
+
+    def query(self, q, k=3):
+        """
+        q: (P, D) with NaN for unknown coordinates. Returns (idx (P, k), dist (P, k)),
+        dist = RMS distance over the visible coordinates; rows with nothing visible get
+        idx -1 / dist inf.
+        """
+        q = np.atleast_2d(np.asarray(q, dtype=np.float64))
+        P, N = len(q), len(self.vectors)
+        k = min(int(k), N)
+        idx = np.full((P, max(k, 0)), -1, dtype=np.intp)
+        dist = np.full((P, max(k, 0)), np.inf)
+        if not N or not k:
+            return idx, dist
+        mask = np.isfinite(q)
+        nvis = mask.sum(axis=1)
+        full = nvis == q.shape[1]
+        if self.tree is not None and full.any():
+            d, i = self.tree.query(q[full], k=k)
+            d, i = np.asarray(d).reshape(-1, k), np.asarray(i).reshape(-1, k)
+            idx[full], dist[full] = i, d / np.sqrt(q.shape[1])
+            rows = np.flatnonzero(~full & (nvis > 0))
+        else:
+            rows = np.flatnonzero(nvis > 0)
+        if len(rows):
+            qz = np.where(mask[rows], q[rows], 0.0)
+            m = mask[rows].astype(np.float64)
+            d2 = (qz * qz).sum(1)[:, None] - 2.0 * (qz @ self.vectors.T) + m @ self.sq.T
+            d2 = np.maximum(d2, 0.0) / nvis[rows][:, None]
+            if k < N:
+                part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            else:
+                part = np.broadcast_to(np.arange(N), (len(rows), N))
+            pd = np.take_along_axis(d2, part, 1)
+            order = np.argsort(pd, axis=1)
+            idx[rows] = np.take_along_axis(part, order, 1)
+            dist[rows] = np.sqrt(np.take_along_axis(pd, order, 1))
+        return idx, dist
@@ -0,0 +1,65 @@
+# scripts/pose_library_bench.py
+# Build time and query latency of pose_library.PoseLibrary (run outside TD):
+#
+#   python scripts/pose_library_bench.py --sizes 100 1000 10000 100000 --persons 4 --k 3
+#
+# Uses random normalised pose vectors (12 landmarks x 2 = 24 dims). Reports the
+# brute-force BLAS path, and the scipy cKDTree path when scipy is installed, plus a
+# Python-loop baseline on the smallest size for reference.
+
+import argparse
+import time
+
+import numpy as np
+
+import pose_library
+
+
+def _time(fn, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        out = fn()
+    return (time.perf_counter() - t0) * 1000.0 / reps, out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    ap.add_argument('--persons', type=int, default=4)
+    ap.add_argument('--k', type=int, default=3)
+    ap.add_argument('--reps', type=int, default=50)
+    args = ap.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    D = 2 * len(pose_library.LIBRARY_LANDMARKS)
+    q = rng.normal(0, 0.5, (args.persons, D))
+    q_occluded = q.copy()
+    q_occluded[:, :4] = np.nan            # one arm hidden
+
+    modes = [('brute', False)] + ([('kdtree', True)] if pose_library.cKDTree is not None else [])
+    print(f"persons={args.persons} k={args.k} dims={D} scipy={'yes' if pose_library.cKDTree else 'no'}")
+    print(f"{'size':>7} {'mode':>7} {'build ms':>9} {'query ms':>9} {'occluded ms':>11}")
+    for n in args.sizes:
+        vecs = rng.normal(0, 0.5, (n, D)).astype(np.float32)
+        labels = [f'pose{i % 50}' for i in range(n)]
+        for mode, tree in modes:
+            t0 = time.perf_counter()
+            lib = pose_library.PoseLibrary(vecs, labels, use_tree=tree)
+            build = (time.perf_counter() - t0) * 1000.0
+            reps = max(3, args.reps if n <= 10000 else args.reps // 10)
+            qms, (idx, dist) = _time(lambda: lib.query(q, args.k), reps)
+            oms, _ = _time(lambda: lib.query(q_occluded, args.k), reps)
+            print(f"{n:>7} {mode:>7} {build:>9.2f} {qms:>9.3f} {oms:>11.3f}")
+
+    n = args.sizes[0]
+    vecs = rng.normal(0, 0.5, (n, D))
+    def loop():
+        out = []
+        for p in q:
+            d = [float(np.sqrt(((p - v) ** 2).mean())) for v in vecs]
+            out.append(sorted(range(n), key=d.__getitem__)[:args.k])
+        return out
+    lms, _ = _time(loop, 3)
+    print(f"python loop baseline, size {n}: {lms:.3f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# scripts/pose_library_chop.py
+# Script CHOP 'pose_match' (next to pose_fanout): live "strike the pose" matching.
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, m_img_w/m_img_h
+#   Output : p{pid}_match{j}_label (index into the library's sorted label names) and
+#            p{pid}_match{j}_dist (RMS, torso lengths) for j = 1..TOP_K
+#   Table DAT 'pose_matches' (optional, next to this CHOP): pid, rank, label, dist,
+#            rewritten only when a person's top-1 label changes.
+#
+# The library is data/pose_library.npz; if missing it is built once from the
+# recordings in data/pose_recordings (CSV/npz, label = file name) and saved.
+# Call op('pose_match_callbacks').module.Rebuild() after adding recordings.
+
+import os
+
+import numpy as np
+
+import pose_frame
+import pose_library
+import pose_normalize
+
+LIBRARY_NPZ = 'data/pose_library.npz'
+RECORDINGS_DIR = 'data/pose_recordings'
+NAMES_CSV = 'data/landmark_names.csv'
+MATCH_TABLE = 'pose_matches'
+TOP_K = 3
+
+_st = {}    # scriptOp path -> state
+_lib = None
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def Library():
+    global _lib
+    if _lib is None:
+        path = _data(LIBRARY_NPZ)
+        if os.path.isfile(path):
+            _lib = pose_library.PoseLibrary.load(path)
+        else:
+            _lib = pose_library.PoseLibrary.from_folder(_data(RECORDINGS_DIR))
+            if len(_lib):
+                _lib.save(path)
+        debug(f"pose_match: library {len(_lib)} poses, {len(_lib.label_names)} labels")
+    return _lib
+
+def Rebuild():
+    global _lib
+    _lib = pose_library.PoseLibrary.from_folder(_data(RECORDINGS_DIR))
+    _lib.save(_data(LIBRARY_NPZ))
+    for st in _st.values():
+        st['top1'] = None
+    return len(_lib)
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def _write_table(scriptOp, layout, lib, idx, dist):
+    t = scriptOp.parent().op(MATCH_TABLE)
+    if not t:
+        return
+    t.clear()
+    t.appendRow(['pid', 'rank', 'label', 'dist'])
+    for p, pid in enumerate(layout.pids):
+        for j in range(idx.shape[1]):
+            if idx[p, j] >= 0:
+                t.appendRow([pid, j + 1, lib.labels[idx[p, j]], f'{dist[p, j]:.4f}'])
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    lib = Library()
+    if src is None or src.numChans == 0 or not len(lib):
+        scriptOp.clear()
+        return
+    st = _st.get(scriptOp.path)
+    if st is None:
+        st = _st[scriptOp.path] = {'norm': pose_normalize.NormalizeStage(),
+                                   'order': pose_frame.load_landmark_names(_data(NAMES_CSV)),
+                                   'layout': None, 'frame': None, 'top1': None}
+    key = tuple(c.name for c in src.chans())
+    if st['layout'] is None or st['layout'].key != key:
+        st['layout'] = pose_frame.FrameLayout(key, st['order'])
+        st['top1'] = None
+    layout = st['layout']
+
+    values = src.numpyArray()[:, -1].astype(float)
+    st['frame'] = frame = layout.pack(values, st['frame'])
+    aspect = _meta(src, 'm_img_w', 16.0) / _meta(src, 'm_img_h', 9.0)
+    norm, _, _ = st['norm'].compute(layout, frame, aspect)
+
+    idx, dist = lib.query(lib.vectors_from(layout, norm), TOP_K)
+    label = np.where(idx >= 0, lib.label_ids[np.maximum(idx, 0)], -1)
+
+    top1 = tuple(label[:, 0]) if label.size else ()
+    if top1 != st['top1']:
+        st['top1'] = top1
+        _write_table(scriptOp, layout, lib, idx, dist)
+
+    k = idx.shape[1]
+    names = [f'p{pid}_match{j + 1}_{f}' for pid in layout.pids for j in range(k) for f in ('label', 'dist')]
+    vals = np.stack([label, np.where(np.isfinite(dist), dist, -1.0)], axis=-1)
+    pose_frame.WriteChannels(scriptOp, names, vals.ravel())
+    return
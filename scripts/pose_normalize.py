@@ -0,0 +1,98 @@
+# scripts/pose_normalize.py
+# Body-scale normalisation of the pose frame array.
+#
+# Each person's landmarks are re-expressed relative to the hips midpoint (falls back
+# to the shoulders midpoint for upper-body framing) and divided by the torso length
+# (shoulders_mid -> hips_mid; falls back to shoulder width * SHOULDER_TO_TORSO, then
+# to the bbox diagonal). x is aspect corrected first, so the result is isotropic and
+# independent of how far the performer stands from the camera: a T-pose is the same
+# vector at 1 m or at 6 m. Gestures, pose library matching and person selection
+# compare these with plain Euclidean distances.
+#
+# The per-person scale is smoothed with an EMA (scale_alpha) so a flickering hip
+# does not make the whole normalised skeleton pump.
+#
+# Pure numpy over pose_frame arrays. pose_normalize_chop.py outputs the result as
+# n{pid}_{landmark}_{x|y|z} channels (merge them with the raw p{pid}_* channels).
+# Put this in a Text DAT named 'pose_normalize' in /local/modules.
+
+import numpy as np
+
+import pose_frame
+
+SHOULDER_TO_TORSO = 1.6     # typical torso length / shoulder width
+MIN_SCALE = 1e-3
+
+
+class NormalizeStage:
+
+    def __init__(self, scale_alpha=0.3, min_visibility=0.5):
+        self.scale_alpha = float(scale_alpha)
+        self.min_visibility = float(min_visibility)
+        self.layout_key = None
+        self.scale = None       # (P,) smoothed torso length
+
+    def compile(self, layout):
+        ix = layout.index
+        def one(*names):
+            for n in names:
+                if n in ix:
+                    return ix[n]
+            return -1
+        self.hips = one('hips_mid', 'hip_mid')
+        self.shoulders = one('shoulders_mid', 'shoulder_mid')
+        self.sh_l, self.sh_r = one('shoulder_l'), one('shoulder_r')
+        self.real = np.array([i for i, n in enumerate(layout.landmarks)
+                              if n not in pose_frame.VIRTUAL], dtype=np.intp)
+        self.scale = np.full(len(layout), np.nan)
+        self.layout_key = layout.key
+
+    def compute(self, layout, frame, aspect=1.0):
+        """
+        Returns (norm, origin, scale): norm is (P, L, 3) normalised x/y/z (NaN where the
+        landmark is missing/invisible), origin (P, 3) and scale (P,) in aspect-corrected UV.
+        """
+        if self.layout_key != layout.key:
+            self.compile(layout)
+        P = frame.shape[0]
+        pts = frame[:, :, :3].copy()
+        pts[:, :, 0] *= aspect
+        pts[~pose_frame.valid(frame, self.min_visibility)] = np.nan
+
+        nan3 = np.full((P, 3), np.nan)
+        hips = pts[:, self.hips] if self.hips >= 0 else nan3
+        shoulders = pts[:, self.shoulders] if self.shoulders >= 0 else nan3
+        origin = np.where(np.isfinite(hips[:, :1]), hips, shoulders)
+
+        torso = np.linalg.norm(shoulders[:, :2] - hips[:, :2], axis=1)
+        if self.sh_l >= 0 and self.sh_r >= 0:
+            width = np.linalg.norm(pts[:, self.sh_l, :2] - pts[:, self.sh_r, :2], axis=1)
+            torso = np.where(np.isfinite(torso), torso, width * SHOULDER_TO_TORSO)
+        real = pts[:, self.real, :2]
+        seen = np.isfinite(real[:, :, 0]).any(axis=1)
+        diag = np.full(P, np.nan)
+        if seen.any():
+            span = np.nanmax(real[seen], axis=1) - np.nanmin(real[seen], axis=1)
+            diag[seen] = np.hypot(span[:, 0], span[:, 1])
+        torso = np.where(np.isfinite(torso), torso, diag)
+        if not np.isfinite(origin[:, 0]).all() and seen.any():
+            cen = np.full((P, 3), np.nan)
+            cen[seen] = np.nanmean(pts[seen][:, self.real], axis=1)
+            origin = np.where(np.isfinite(origin[:, :1]), origin, cen)
+
+        # EMA per person; restart where there was no previous scale
+        prev = self.scale
+        a = self.scale_alpha
+        smooth = np.where(np.isfinite(prev), prev + a * (torso - prev), torso)
+        smooth = np.where(np.isfinite(torso), smooth, prev)
+        self.scale = smooth
+        s = np.maximum(smooth, MIN_SCALE)
+
+        norm = (pts - origin[:, None, :]) / s[:, None, None]
+        return norm, origin, smooth
+
+
+def flatten(norm, landmark_idx=None, planes=2):
+    """(P, L, 3) -> (P, L' * planes) vectors for distance matching (NaN kept)."""
+    sel = norm if landmark_idx is None else norm[:, landmark_idx]
+    return sel[:, :, :planes].reshape(sel.shape[0], -1)
@@ -0,0 +1,59 @@
+# scripts/pose_normalize_chop.py
+# Script CHOP 'pose_normalize' (next to pose_fanout / pose_features).
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, m_img_w/m_img_h
+#   Output : n{pid}_{landmark}_{x|y|z} body-scale-normalised coordinates, plus
+#            n{pid}_scale and n{pid}_origin_x/_y (aspect-corrected UV)
+# Merge CHOP the output with the raw channels to keep both sets side by side.
+
+import os
+
+import numpy as np
+
+import pose_frame
+import pose_normalize
+
+NAMES_CSV = 'data/landmark_names.csv'
+
+_st = {}    # scriptOp path -> {'stage', 'order', 'layout', 'frame', 'names'}
+
+def _state(scriptOp):
+    st = _st.get(scriptOp.path)
+    if st is None:
+        path = os.path.normpath(os.path.join(project.folder, NAMES_CSV))
+        st = _st[scriptOp.path] = {'stage': pose_normalize.NormalizeStage(),
+                                   'order': pose_frame.load_landmark_names(path),
+                                   'layout': None, 'frame': None, 'names': None}
+    return st
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    st = _state(scriptOp)
+    key = tuple(c.name for c in src.chans())
+    if st['layout'] is None or st['layout'].key != key:
+        layout = st['layout'] = pose_frame.FrameLayout(key, st['order'])
+        real = [n for n in layout.landmarks if n not in pose_frame.VIRTUAL]
+        st['real'] = layout.idx(real)
+        names = layout.channel_names('n', 'xyz', real)
+        names += [f'n{pid}_{s}' for pid in layout.pids for s in ('scale', 'origin_x', 'origin_y')]
+        st['names'] = names
+    layout = st['layout']
+    if not len(layout):
+        scriptOp.clear()
+        return
+
+    values = src.numpyArray()[:, -1].astype(float)
+    st['frame'] = frame = layout.pack(values, st['frame'])
+    aspect = _meta(src, 'm_img_w', 16.0) / _meta(src, 'm_img_h', 9.0)
+    norm, origin, scale = st['stage'].compute(layout, frame, aspect)
+
+    extra = np.column_stack([scale, origin[:, 0], origin[:, 1]]).ravel()
+    pose_frame.WriteChannels(scriptOp, st['names'],
+                             np.concatenate([norm[:, st['real']].ravel(), extra]))
+    return
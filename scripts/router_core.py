@@ -1,9 +1,12 @@
 # router_core.py
 # Stateless helpers + state container stored on the COMP
+# Primary selection goes through person_selector (scored, with hysteresis/dwell).
 
 import re
 import time
 
+import person_selector
+
 ADDR_RE = re.compile(r"^/p(?P<pid>\d+)/(?P<name>[A-Za-z0-9_:-]+)$")
 FRAME_KEYS = {"/image-width": "image_width",
               "/image-height": "image_height",
@@ -22,6 +25,9 @@ def get_cfg(comp):
         "primary_mode": (comp.par.Primaryselection.eval() if hasattr(comp.par,'Primaryselection') else "Auto-Closest"),
         "fixed_pid": int(comp.par.Fixedpersonid.eval() if hasattr(comp.par,'Fixedpersonid') else 1),
         "enable_smoothing": bool(comp.par.Enablesmoothing.eval() if hasattr(comp.par,'Enablesmoothing') else False),
+        "switch_margin": float(comp.par.Switchmargin.eval() if hasattr(comp.par,'Switchmargin') else 0.1),
+        "dwell_s": float(comp.par.Dwellseconds.eval() if hasattr(comp.par,'Dwellseconds') else 0.5),
+        "min_hold_s": float(comp.par.Minholdseconds.eval() if hasattr(comp.par,'Minholdseconds') else 1.0),
     }
 
     # landmarks table
@@ -101,10 +107,13 @@ def update_from_dat_row(comp, addr, args):
         # unrecognized landmark, optionally log
         return
 
-    # prefer 3-arg [u, v, conf] flavor
+    # [u, v, conf] or pose_fanout's [x, y, z, visibility] flavor
     if not args or len(args) < 3:
         return
-    u, v, conf = float(args[0]), float(args[1]), float(args[2])
+    if len(args) >= 4:
+        u, v, conf = float(args[0]), float(args[1]), max(0.0, min(1.0, float(args[3])))
+    else:
+        u, v, conf = float(args[0]), float(args[1]), float(args[2])
 
     # clamp conf from rough Mediapipe z/conf to [0..1] if desired (optional)
     # Here we map z in [-5..5] -> conf in [0..1], else keep if already 0..1
@@ -141,31 +150,41 @@ def _diag(bbox):
     return (du**2 + dv**2) ** 0.5
 
 def _choose_primary(comp, cfg, st):
+    """
+    Score persons (bbox size, centre distance, avg confidence, time on stage) with
+    person_selector and switch with hysteresis/dwell. Returns True when primary_pid changed.
+    """
     persons = st["persons"]
+    sel = st.get("selector")
+    if sel is None:
+        sel = st["selector"] = person_selector.PersonSelector()
+    prev = st["primary_pid"]
     if not persons:
+        sel.update([], [], [], [], _now_ms() / 1000.0)
         st["primary_pid"] = None
-        return
+        return prev is not None
 
     mode = cfg["primary_mode"]
     if mode == "Fixed Person ID":
         pid = cfg["fixed_pid"]
         if pid in persons:
             st["primary_pid"] = pid
-            return
+            return pid != prev
         # fall through to auto if fixed isn't present
-
-    # Build candidates
-    cand = []
-    for pid, p in persons.items():
-        cand.append((pid, p["avg_conf"], _diag(p["bbox"])))
-    # Highest conf wins; for "Auto-Closest" we invert diag
-    if mode == "Auto-Closest":
-        # smallest diagonal
-        cand.sort(key=lambda t: (t[2], -t[1]))
-    else:
-        # Auto-HighestConf
-        cand.sort(key=lambda t: (-t[1], t[2]))
-    st["primary_pid"] = cand[0][0]
+        mode = "Auto-Closest"
+
+    pids = sorted(persons)
+    size = [min(_diag(persons[pid]["bbox"]), 1.0) for pid in pids]
+    centre = []
+    for pid in pids:
+        b = persons[pid]["bbox"]
+        du, dv = 0.5 * (b[0] + b[2]) - 0.5, 0.5 * (b[1] + b[3]) - 0.5
+        centre.append(1.0 - min((du * du + dv * dv) ** 0.5 / 0.5 ** 0.5, 1.0))
+    conf = [persons[pid]["avg_conf"] for pid in pids]
+    sel.configure(mode=mode, margin=cfg["switch_margin"], dwell=cfg["dwell_s"], min_hold=cfg["min_hold_s"])
+    pid, _ = sel.update(pids, size, centre, conf, _now_ms() / 1000.0)
+    st["primary_pid"] = pid
+    return pid != prev
 
 def gc_and_select(comp):
     """Drop timed out persons, choose primary, and update Persons_OUT/FrameInfo_OUT/Landmarks_OUT."""
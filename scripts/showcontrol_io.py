@@ -0,0 +1,336 @@
+# scripts/showcontrol_io.py
+# Asyncio UDP service for show-control OSC (ShowControlIO).
+#
+# Owns the control socket, decodes and validates OSC off the TouchDesigner main
+# thread, rate-limits each client with a token bucket and hands accepted commands
+# to TD through a bounded, thread-safe queue that TD drains once per frame.
+#
+# Two ways to run it:
+#   In-process (inside TD), from /ShowControlIO/osc_router:
+#       srv = showcontrol_io.ShowControlServer(port=7500)
+#       srv.start_in_thread()
+#       ... each frame: for peer, addr, args in srv.drain(): dispatch(...)
+#   Sidecar (separate Python process), forwarding validated batches as OSC bundles
+#   to TD's OSC In DAT (Split Bundles into Messages = ON):
+#       python scripts/showcontrol_io.py --port 7500 --forward 127.0.0.1:7510
+#
+# Either way the service takes over the control port (CtlInPort, 7500), which the
+# /ShowControlIO/osc_ctl OSC In DAT normally listens on. In-process: turn osc_ctl
+# off (or move it to a free port) before enabling the server. Sidecar: set
+# osc_ctl's Network Port to the forward port (FORWARD_PORT, 7510). 7501 is the
+# controller feedback port (CtlOutPort) and must not be used for either.
+# TD sees the sidecar, not the client, as the sender, so when forwarding the sidecar
+# resolves subscribe / keepalive / unsubscribe targets itself
+# (osc_subscriptions.resolve_target): without <host> <port> the target is the
+# client; an explicit other target is only forwarded from loopback or --allow-subscribe
+# hosts, and dropped otherwise.
+#
+# No TouchDesigner objects are used here; only osc_codec and osc_subscriptions.
+
+import argparse
+import asyncio
+import collections
+import socket
+import threading
+import time
+
+import osc_codec
+import osc_subscriptions
+
+DEFAULT_PORT = 7500
+FORWARD_PORT = 7510         # sidecar -> TD OSC In DAT; not CtlOutPort (7501)
+DEFAULT_RATE_HZ = 120.0     # sustained messages/s per client
+DEFAULT_BURST = 240         # token bucket size per client
+MAX_QUEUE = 10000
+CLIENT_IDLE_S = 60.0
+MAX_ADDRESS_LEN = 256
+
+# Accepted commands: (address or prefix ending in '/', min args, max args)
+COMMANDS = (
+    ('/pose2art/fx/list', 0, 0),
+    ('/pose2art/fx/query', 0, 0),
+    ('/pose2art/fx/rescan', 0, 0),
+    ('/pose2art/fx/param/', 1, 4),
+    ('/pose2art/preset/', 0, 3),
+    ('/pose2art/gestures/', 0, 3),
+    ('/pose2art/subscribe', 0, 3),
+    ('/pose2art/keepalive', 0, 2),
+    ('/pose2art/unsubscribe', 0, 2),
+    ('/show/', 0, 4),
+)
+
+# Commands that may omit <host> <port> and then mean "the sender"
+PEER_COMMANDS = ('/pose2art/subscribe', '/pose2art/keepalive', '/pose2art/unsubscribe')
+
+# Continuous controls: within one drain only the last message per address is kept
+COALESCE_PREFIXES = ('/pose2art/fx/param/', '/show/fader')
+
+
+def _compile_commands(commands):
+    exact, prefixes = {}, []
+    for addr, lo, hi in commands:
+        if addr.endswith('/'):
+            prefixes.append((addr, lo, hi))
+        else:
+            exact[addr] = (lo, hi)
+    return exact, tuple(prefixes)
+
+
+class ClientStats:
+    __slots__ = ('tokens', 'stamp', 'received', 'accepted', 'limited', 'invalid', 'last_seen')
+
+    def __init__(self, burst, now):
+        self.tokens = float(burst)
+        self.stamp = now
+        self.received = self.accepted = self.limited = self.invalid = 0
+        self.last_seen = now
+
+
+class ShowControlServer(asyncio.DatagramProtocol):
+    """
+    UDP OSC endpoint. Everything except drain()/metrics()/stop() runs on the
+    server's own event loop thread.
+    """
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_PORT, rate_hz=DEFAULT_RATE_HZ,
+                 burst=DEFAULT_BURST, max_queue=MAX_QUEUE, commands=COMMANDS,
+                 coalesce_prefixes=COALESCE_PREFIXES, clock=time.monotonic):
+        self.host, self.port = host, int(port)
+        self.rate_hz, self.burst = float(rate_hz), float(burst)
+        self.max_queue = int(max_queue)
+        self.coalesce_prefixes = tuple(coalesce_prefixes)
+        self.clock = clock
+        self._exact, self._prefixes = _compile_commands(commands)
+        self._queue = collections.deque()
+        self._clients = {}      # (host, port) -> ClientStats
+        self._counts = collections.Counter()
+        self._loop = None
+        self._thread = None
+        self._transport = None
+        self._stopped = None
+        self.bound = threading.Event()
+        self.bind_error = None
+
+    # --- validation ------------------------------------------------------------
+    def _validate(self, addr, args):
+        if len(addr) > MAX_ADDRESS_LEN or not addr.isprintable() or ' ' in addr:
+            return False
+        spec = self._exact.get(addr)
+        if spec is None:
+            for prefix, lo, hi in self._prefixes:
+                if addr.startswith(prefix) and len(addr) > len(prefix):
+                    spec = (lo, hi)
+                    break
+        if spec is None:
+            return False
+        return spec[0] <= len(args) <= spec[1]
+
+    def _take_token(self, st, now):
+        st.tokens = min(self.burst, st.tokens + (now - st.stamp) * self.rate_hz)
+        st.stamp = now
+        if st.tokens < 1.0:
+            return False
+        st.tokens -= 1.0
+        return True
+
+    # --- asyncio protocol ------------------------------------------------------
+    def connection_made(self, transport):
+        self._transport = transport
+        self.port = transport.get_extra_info('sockname')[1]
+        self.bound.set()
+
+    def datagram_received(self, data, peer):
+        now = self.clock()
+        peer = (peer[0], peer[1])
+        st = self._clients.get(peer)
+        if st is None:
+            st = self._clients[peer] = ClientStats(self.burst, now)
+        st.last_seen = now
+        self._counts['packets'] += 1
+        try:
+            msgs = osc_codec.decode_packet(data)
+        except ValueError:
+            st.invalid += 1
+            self._counts['malformed'] += 1
+            return
+        for addr, args in msgs:
+            st.received += 1
+            if not self._validate(addr, args):
+                st.invalid += 1
+                self._counts['invalid'] += 1
+                continue
+            if not self._take_token(st, now):
+                st.limited += 1
+                self._counts['rate_limited'] += 1
+                continue
+            if len(self._queue) >= self.max_queue:
+                self._counts['queue_overflow'] += 1
+                continue
+            self._queue.append((peer, addr, args, now))
+            st.accepted += 1
+            self._counts['accepted'] += 1
+
+    def error_received(self, exc):
+        self._counts['socket_errors'] += 1
+
+    async def _gc_clients(self):
+        while True:
+            await asyncio.sleep(CLIENT_IDLE_S / 4)
+            cutoff = self.clock() - CLIENT_IDLE_S
+            for peer in [p for p, s in self._clients.items() if s.last_seen < cutoff]:
+                del self._clients[peer]
+
+    async def serve(self):
+        """Run until stop(); usable directly from an existing event loop (sidecar)."""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        try:
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: self, local_addr=(self.host, self.port))
+        except OSError as e:
+            # port taken: wake start_in_thread() at once instead of letting it time out
+            self.bind_error = e
+            self.bound.set()
+            raise
+        gc = asyncio.ensure_future(self._gc_clients())
+        try:
+            await self._stopped.wait()
+        finally:
+            gc.cancel()
+            transport.close()
+
+    # --- thread mode -----------------------------------------------------------
+    def start_in_thread(self, timeout=2.0):
+        """
+        Start the event loop on a daemon thread; returns once the socket is bound.
+        Raises RuntimeError right away if the port is taken.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.bound.clear()
+        self.bind_error = None
+        self._thread = threading.Thread(target=self._run_thread, name='ShowControlIO', daemon=True)
+        self._thread.start()
+        if not self.bound.wait(timeout) or self.bind_error is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            raise RuntimeError(f'ShowControlIO could not bind {self.host}:{self.port}: {self.bind_error}')
+
+    def _run_thread(self):
+        try:
+            asyncio.run(self.serve())
+        except OSError:
+            pass    # reported through bind_error
+
+    def stop(self):
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    # --- main-thread API -------------------------------------------------------
+    def drain(self, max_items=None):
+        """
+        Pop queued commands as [(peer, address, args)], oldest first. Continuous
+        controls (coalesce_prefixes) keep only their last value, in its last position.
+        """
+        items = []
+        q = self._queue
+        n = len(q) if max_items is None else min(len(q), max_items)
+        now = self.clock()
+        for _ in range(n):
+            peer, addr, args, t = q.popleft()
+            items.append((peer, addr, args))
+            lag = now - t
+            if lag > self._counts['max_queue_lag_us'] / 1e6:
+                self._counts['max_queue_lag_us'] = int(lag * 1e6)
+        self._counts['drained'] += len(items)
+        if not self.coalesce_prefixes or len(items) < 2:
+            return items
+        last = {}
+        for i, (_, addr, _) in enumerate(items):
+            if addr.startswith(self.coalesce_prefixes):
+                last[addr] = i
+        out = [it for i, it in enumerate(items)
+               if not it[1].startswith(self.coalesce_prefixes) or last[it[1]] == i]
+        self._counts['coalesced'] += len(items) - len(out)
+        return out
+
+    def metrics(self):
+        """Snapshot of global counters plus per-client stats."""
+        m = dict(self._counts)
+        m['queue_depth'] = len(self._queue)
+        m['clients'] = len(self._clients)
+        m['per_client'] = {f'{h}:{p}': {'received': s.received, 'accepted': s.accepted,
+                                        'limited': s.limited, 'invalid': s.invalid}
+                           for (h, p), s in list(self._clients.items())}
+        return m
+
+
+# --- sidecar -------------------------------------------------------------------
+def _with_peer(peer, addr, args, allow_hosts=()):
+    """
+    Subscription commands get an explicit, checked <host> <port> (the sender's unless
+    it may name another target); None drops a refused or malformed one.
+    """
+    if addr not in PEER_COMMANDS:
+        return args
+    try:
+        target = osc_subscriptions.resolve_target(args, peer, allow_hosts)
+    except ValueError:
+        return None
+    if target is None:
+        return None
+    host, port, rate = target
+    return [host, port] + ([rate] if rate is not None else [])
+
+async def _forward_loop(server, dest, fps, report_s, allow_hosts=()):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    period = 1.0 / fps
+    next_report = time.monotonic() + report_s
+    refused = 0
+    while True:
+        await asyncio.sleep(period)
+        batch = server.drain()
+        if batch:
+            msgs = []
+            for peer, addr, args in batch:
+                fwd = _with_peer(peer, addr, args, allow_hosts)
+                if fwd is None:
+                    refused += 1
+                    continue
+                msgs.append(osc_codec.encode_message(addr, fwd))
+            for packet in osc_codec.encode_bundles(msgs):
+                sock.sendto(packet, dest)
+        if report_s and time.monotonic() >= next_report:
+            m = server.metrics(); m.pop('per_client')
+            m['subscriptions_refused'] = refused
+            print('ShowControlIO', m, flush=True)
+            next_report += report_s
+
+async def _sidecar(args):
+    server = ShowControlServer(args.host, args.port, args.rate, args.burst)
+    host, port = args.forward.rsplit(':', 1)
+    fwd = asyncio.ensure_future(_forward_loop(server, (host, int(port)), args.fps, args.report,
+                                             tuple(args.allow_subscribe)))
+    try:
+        await server.serve()
+    finally:
+        fwd.cancel()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='ShowControlIO OSC sidecar')
+    ap.add_argument('--host', default='0.0.0.0')
+    ap.add_argument('--port', type=int, default=DEFAULT_PORT)
+    ap.add_argument('--forward', default=f'127.0.0.1:{FORWARD_PORT}', help='TD OSC In DAT host:port')
+    ap.add_argument('--fps', type=float, default=60.0, help='forward batches per second')
+    ap.add_argument('--rate', type=float, default=DEFAULT_RATE_HZ)
+    ap.add_argument('--burst', type=float, default=DEFAULT_BURST)
+    ap.add_argument('--report', type=float, default=5.0, help='metrics print interval, 0 = off')
+    ap.add_argument('--allow-subscribe', action='append', default=[], metavar='HOST',
+                    help='sender that may subscribe another host:port (repeatable; loopback always may)')
+    asyncio.run(_sidecar(ap.parse_args(argv)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# scripts/showcontrol_loadtest.py
+# Loopback load test for showcontrol_io.ShowControlServer (run outside TD):
+#
+#   python scripts/showcontrol_loadtest.py --clients 300 --seconds 5
+#
+# Starts the server on a thread (as TD would), opens N simulated UDP clients that
+# stream fader/param messages at --rate Hz each, adds one flooding client and a few
+# malformed/unknown packets, and drains the queue at --fps like TD's frame loop.
+# Prints throughput, drain cost, queue lag and the server's rate-limit/validation
+# counters.
+
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+
+import osc_codec
+import showcontrol_io
+
+
+class _Client(asyncio.DatagramProtocol):
+    pass
+
+async def _client(idx, dest, rate, seconds, stats):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(_Client, remote_addr=dest)
+    period = 1.0 / rate
+    end = loop.time() + seconds
+    await asyncio.sleep(random.random() * period)
+    fader = osc_codec.encode_message
+    while loop.time() < end:
+        v = random.random()
+        if idx % 3 == 0:
+            pkt = fader('/show/fader', [v])
+        else:
+            pkt = fader('/pose2art/fx/param/Uidotsize', [v * 20.0])
+        transport.sendto(pkt)
+        stats['sent'] += 1
+        await asyncio.sleep(period)
+    transport.close()
+
+async def _flooder(dest, seconds, stats):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(_Client, remote_addr=dest)
+    end = loop.time() + seconds
+    msg = osc_codec.encode_message('/show/efx/next', [])
+    while loop.time() < end:
+        for _ in range(200):
+            transport.sendto(msg)
+            stats['sent'] += 1
+        # garbage + unknown address
+        transport.sendto(b'\x00garbage')
+        transport.sendto(osc_codec.encode_message('/not/allowed', [1]))
+        stats['sent'] += 2
+        await asyncio.sleep(0.01)
+    transport.close()
+
+async def _run_clients(dest, n, rate, seconds, stats):
+    tasks = [_client(i, dest, rate, seconds, stats) for i in range(n)]
+    tasks.append(_flooder(dest, seconds, stats))
+    await asyncio.gather(*tasks)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--clients', type=int, default=300)
+    ap.add_argument('--rate', type=float, default=30.0, help='messages/s per client')
+    ap.add_argument('--seconds', type=float, default=5.0)
+    ap.add_argument('--fps', type=float, default=60.0)
+    args = ap.parse_args(argv)
+
+    srv = showcontrol_io.ShowControlServer(host='127.0.0.1', port=0)
+    srv.start_in_thread()
+    dest = ('127.0.0.1', srv.port)
+
+    stats = {'sent': 0}
+    t = threading.Thread(target=lambda: asyncio.run(
+        _run_clients(dest, args.clients, args.rate, args.seconds, stats)))
+    t0 = time.perf_counter()
+    t.start()
+
+    # TD-like frame loop on this (main) thread
+    drain_ms, per_frame, delivered = [], [], 0
+    period = 1.0 / args.fps
+    while t.is_alive() or srv.metrics()['queue_depth']:
+        f0 = time.perf_counter()
+        batch = srv.drain()
+        drain_ms.append((time.perf_counter() - f0) * 1000.0)
+        per_frame.append(len(batch))
+        delivered += len(batch)
+        time.sleep(max(0.0, period - (time.perf_counter() - f0)))
+    wall = time.perf_counter() - t0
+    time.sleep(0.1)
+    m = srv.metrics()
+    srv.stop()
+
+    per_client = m.pop('per_client')
+    limited_clients = sum(1 for c in per_client.values() if c['limited'])
+    drain_ms.sort()
+    print(f"clients={args.clients} rate={args.rate}/s seconds={args.seconds} fps={args.fps}")
+    print(f"sent={stats['sent']} packets_seen={m.get('packets', 0)} "
+          f"accepted={m.get('accepted', 0)} delivered_to_td={delivered} "
+          f"coalesced={m.get('coalesced', 0)}")
+    print(f"invalid={m.get('invalid', 0)} malformed={m.get('malformed', 0)} "
+          f"rate_limited={m.get('rate_limited', 0)} (clients limited: {limited_clients}) "
+          f"queue_overflow={m.get('queue_overflow', 0)}")
+    print(f"throughput={m.get('packets', 0) / wall:.0f} pkt/s  "
+          f"max_queue_lag={m.get('max_queue_lag_us', 0) / 1000.0:.2f} ms")
+    print(f"drain per frame: mean={statistics.mean(drain_ms):.3f} ms "
+          f"p99={drain_ms[int(len(drain_ms) * 0.99) - 1]:.3f} ms  "
+          f"items/frame mean={statistics.mean(per_frame):.1f} max={max(per_frame)}")
+
+if __name__ == '__main__':
+    main()
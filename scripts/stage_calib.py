@@ -0,0 +1,139 @@
+# scripts/stage_calib.py
+# Camera-to-stage calibration: one 3x3 matrix maps MediaPipe UV (0..1, origin
+# top-left, y down) to stage space, applied to the whole landmark array at once.
+#
+# stage_xform (stage_calib_chop) applies the matrix once per frame and its output is
+# what the effects receive, so no effect converts coordinates itself. The mappings:
+#   uv_to_top(aspect)        TOP/Geo space from docs/Build Notes/MediaPipe Pose UV to
+#                            TouchDesigner TOP space.md: x = (u - 0.5) * aspect,
+#                            y = 0.5 - v (centered, y up, image height = 1); the
+#                            stage space when there is no calibration
+#   letterbox(img, canvas, mode) fit / fill (crop) / stretch the camera image into a
+#                            canvas, result in canvas pixels (bottom-left origin)
+# pixel_scale() gives stage units per camera pixel, which effects use for sizes set
+# in pixels (dot size, bone radii); guard_meta publishes it as stage_px.
+#
+# With >= 4 correspondences (camera UV -> stage x/y, e.g. tape marks on the floor
+# measured in metres) solve_homography() fits a projective transform (normalised
+# DLT, least squares over all points). The result is solved once and cached in the
+# pose meta table (poseMetaDAT, mirrored into guardedMeta by guard_meta) as
+#   stage_matrix   9 floats, row major
+#   stage_calib    short description of where it came from
+#   stage_px       stage units per camera pixel (written by guard_meta)
+#
+# apply() transforms x/y of a (P, L, 4) frame array or a flat x/y channel vector with
+# a single matmul; NaN (missing) landmarks stay NaN.
+# Put this in a Text DAT named 'stage_calib' in /local/modules.
+
+import csv
+
+import numpy as np
+
+META_MATRIX = 'stage_matrix'
+META_SOURCE = 'stage_calib'
+META_PIXEL = 'stage_px'
+
+
+# --- standard mappings ------------------------------------------------------------
+def uv_to_top(aspect=16.0 / 9.0):
+    return np.array([[aspect, 0.0, -0.5 * aspect],
+                     [0.0, -1.0, 0.5],
+                     [0.0, 0.0, 1.0]])
+
+def aspect(w, h, default=1.0):
+    """Image aspect w / h rounded to 6 places; default when either side is missing."""
+    try:
+        w, h = float(w), float(h)
+    except (TypeError, ValueError):
+        return default
+    return round(w / h, 6) if w > 0 and h > 0 else default
+
+def letterbox(img_w, img_h, canvas_w, canvas_h, mode='fit'):
+    """
+    UV -> canvas pixels (origin bottom-left). 'fit' keeps the whole image (bars),
+    'fill' covers the canvas (crops), 'stretch' ignores the aspect.
+    """
+    img_w, img_h = float(max(1, img_w)), float(max(1, img_h))
+    canvas_w, canvas_h = float(max(1, canvas_w)), float(max(1, canvas_h))
+    if mode == 'stretch':
+        sx, sy = canvas_w, canvas_h
+    else:
+        pick = min if mode == 'fit' else max
+        s = pick(canvas_w / img_w, canvas_h / img_h)
+        sx, sy = img_w * s, img_h * s
+    ox, oy = 0.5 * (canvas_w - sx), 0.5 * (canvas_h - sy)
+    return np.array([[sx, 0.0, ox], [0.0, -sy, oy + sy], [0.0, 0.0, 1.0]])
+
+
+# --- solving ----------------------------------------------------------------------
+def _normaliser(pts):
+    """Similarity that moves points to mean 0, mean distance sqrt(2) (Hartley)."""
+    c = pts.mean(axis=0)
+    d = np.linalg.norm(pts - c, axis=1).mean()
+    s = np.sqrt(2.0) / d if d > 0 else 1.0
+    return np.array([[s, 0.0, -s * c[0]], [0.0, s, -s * c[1]], [0.0, 0.0, 1.0]])
+
+def solve_homography(src, dst):
+    """3x3 H with dst ~ H @ [src, 1]; src/dst (N >= 4, 2). Returns (H, rms error in dst units)."""
+    src = np.asarray(src, dtype=np.float64).reshape(-1, 2)
+    dst = np.asarray(dst, dtype=np.float64).reshape(-1, 2)
+    if len(src) < 4 or len(src) != len(dst):
+        raise ValueError('solve_homography needs >= 4 matching point pairs')
+    Ts, Td = _normaliser(src), _normaliser(dst)
+    s = src @ Ts[:2, :2].T + Ts[:2, 2]
+    d = dst @ Td[:2, :2].T + Td[:2, 2]
+    n = len(s)
+    A = np.zeros((2 * n, 9))
+    A[0::2, 0:2], A[0::2, 2] = s, 1.0
+    A[0::2, 6:8], A[0::2, 8] = -d[:, :1] * s, -d[:, 0]
+    A[1::2, 3:5], A[1::2, 5] = s, 1.0
+    A[1::2, 6:8], A[1::2, 8] = -d[:, 1:] * s, -d[:, 1]
+    Hn = np.linalg.svd(A)[2][-1].reshape(3, 3)
+    H = np.linalg.inv(Td) @ Hn @ Ts
+    H /= H[2, 2]
+    rms = float(np.sqrt(((apply_points(H, src) - dst) ** 2).sum(1).mean()))
+    return H, rms
+
+def load_points(path):
+    """data/stage_calib.csv: u,v,x,y per row (camera UV -> stage)."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = [{(k or '').strip().lower(): (v or '').strip() for k, v in r.items()}
+                for r in csv.DictReader(f)]
+    pts = [[float(r[c]) for c in ('u', 'v', 'x', 'y')] for r in rows
+           if all(r.get(c) for c in ('u', 'v', 'x', 'y'))]
+    pts = np.array(pts, dtype=np.float64).reshape(-1, 4)
+    return pts[:, :2], pts[:, 2:]
+
+
+# --- meta cache -------------------------------------------------------------------
+def to_meta(H):
+    return ' '.join(f'{v:.9g}' for v in np.asarray(H, dtype=np.float64).ravel())
+
+def from_meta(text):
+    """stage_matrix string -> 3x3, or None if missing/malformed."""
+    try:
+        v = np.array([float(t) for t in str(text).split()], dtype=np.float64)
+    except ValueError:
+        return None
+    return v.reshape(3, 3) if v.size == 9 and np.isfinite(v).all() else None
+
+
+# --- applying ---------------------------------------------------------------------
+def apply_points(H, xy):
+    """(N, 2) -> (N, 2)."""
+    h = xy @ H[:2, :2].T + H[:2, 2]
+    w = xy @ H[2, :2] + H[2, 2]
+    return h / w[:, None]
+
+def apply(H, frame):
+    """Transform x/y of a (..., 4) or (..., 2+) array in place; returns it."""
+    xy = frame[..., :2].reshape(-1, 2)
+    frame[..., :2] = apply_points(H, xy).reshape(frame.shape[:-1] + (2,))
+    return frame
+
+def pixel_scale(H, img_w, img_h, uv=(0.5, 0.5)):
+    """Stage units per camera pixel at uv (geometric mean of the local x / y scale)."""
+    H = np.asarray(H, dtype=np.float64)
+    p = H @ np.array([uv[0], uv[1], 1.0])
+    J = (H[:2, :2] - np.outer(p[:2] / p[2], H[2, :2])) / p[2]
+    return float(np.sqrt(abs(np.linalg.det(J)) / (max(1.0, float(img_w)) * max(1.0, float(img_h)))))
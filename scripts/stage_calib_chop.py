@@ -0,0 +1,114 @@
+# scripts/stage_calib_chop.py
+# Script CHOP 'stage_xform' in PoseCam, right after pose_fanout: the effect input.
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, m_img_w/m_img_h
+#   Output : the same channels, with every x/y pair in stage space; everything else
+#            (z, v, p{pid}_present, m_*) passes through untouched.
+#
+# This is the only place camera UV is converted. Its output (Null 'pose_stage') is
+# what the effects receive through PersonRouter's second input, and the effects use
+# it as-is: no effect maps UV to NDC or pixels. Sizes that are set in
+# pixels (dot size, bone radii) are scaled by stage_px, which guard_meta derives from
+# the cached matrix. The render cameras work in stage units; with the default
+# mapping that is an ortho camera with Ortho Width = image aspect (image height 1,
+# centered, y up). Analysis stages (person selection, features, zones, gestures,
+# interaction, canvas_map) stay on pose_out in camera UV.
+#
+# The matrix is resolved once and cached in poseMetaDAT (key stage_matrix, see
+# stage_calib.py), then each cook is one matmul over all landmark pairs:
+#   - data/stage_calib.csv with >= 4 rows u,v,x,y -> homography (camera UV -> stage)
+#   - otherwise the TOP mapping (centered, y up, x scaled by the image aspect)
+# Call op('stage_xform_callbacks').module.Recalibrate() after editing the points.
+
+import os
+
+import numpy as np
+
+import pose_frame
+import stage_calib
+
+CALIB_CSV = 'data/stage_calib.csv'
+META_DAT = 'poseMetaDAT'
+
+_st = {}    # scriptOp path -> state
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def _meta_table(scriptOp):
+    return scriptOp.parent().op(META_DAT)
+
+def _read_meta(t, key):
+    if not t or t.numRows < 2:
+        return None
+    for r in range(1, t.numRows):
+        if t[r, 0].val == key:
+            return t[r, 1].val
+    return None
+
+def _upsert_meta(t, key, value):
+    if not t:
+        return
+    if t.numRows == 0 or t.numCols < 2 or t[0, 0].val.strip().lower() != 'key':
+        t.clear()
+        t.appendRow(['key', 'value'])
+    for r in range(1, t.numRows):
+        if t[r, 0].val == key:
+            if t[r, 1].val != value:
+                t[r, 1].val = value
+            return
+    t.appendRow([key, value])
+
+def _solve(aspect):
+    """(H, description) from the correspondence file, else the TOP mapping."""
+    path = _data(CALIB_CSV)
+    if os.path.isfile(path):
+        src, dst = stage_calib.load_points(path)
+        if len(src) >= 4:
+            H, rms = stage_calib.solve_homography(src, dst)
+            return H, f'homography {len(src)} pts rms={rms:.4g}'
+    return stage_calib.uv_to_top(aspect), f'top aspect={aspect:.6g}'
+
+def _matrix(scriptOp, aspect, force=False):
+    t = _meta_table(scriptOp)
+    if not force:
+        source = _read_meta(t, stage_calib.META_SOURCE) or ''
+        H = stage_calib.from_meta(_read_meta(t, stage_calib.META_MATRIX))
+        # the TOP mapping depends on the image aspect; a homography does not
+        if H is not None and (not source.startswith('top') or source == f'top aspect={aspect:.6g}'):
+            return H
+    H, source = _solve(aspect)
+    _upsert_meta(t, stage_calib.META_MATRIX, stage_calib.to_meta(H))
+    _upsert_meta(t, stage_calib.META_SOURCE, source)
+    debug(f"stage_xform: {source}")
+    return H
+
+def Recalibrate():
+    for st in _st.values():
+        st['H'] = None
+        st['force'] = True
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    st = _st.setdefault(scriptOp.path, {'key': None, 'H': None, 'aspect': None, 'force': False})
+    key = [c.name for c in src.chans()]
+    if st['key'] != key:
+        st['key'] = key
+        st['xi'], st['yi'] = pose_frame.xy_channel_pairs(key)
+    aspect = _meta(src, 'm_img_w', 16.0) / _meta(src, 'm_img_h', 9.0)
+    if st['H'] is None or aspect != st['aspect']:
+        st['H'] = _matrix(scriptOp, aspect, st['force'])
+        st['aspect'], st['force'] = aspect, False
+
+    values = src.numpyArray()[:, -1].astype(float)
+    xy = np.column_stack([values[st['xi']], values[st['yi']]])
+    xy = stage_calib.apply_points(st['H'], xy)
+    values[st['xi']], values[st['yi']] = xy[:, 0], xy[:, 1]
+    pose_frame.WriteChannels(scriptOp, key, values)
+    return
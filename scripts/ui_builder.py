@@ -1,11 +1,30 @@
 # /UI/UI_Builder.py
 # Build an FX_Active page on the master (/EfxSwitch), binding to active fxCore params.
-# Exposure rules:
-#   1) explicit Table DAT 'expose_params' on fxCore
-#   2) OR implicit Ui*/UI*/ui* prefix
+# The page spec comes from fx_schema (Text DAT in /local/modules):
+#   1) the spec fx_schema.Generate stored for the effect's par_schema (osc=1 rows)
+#   2) else discovery via ExposedNames: Table DAT 'expose_params' on fxCore
+#   3) else implicit Ui*/UI*/ui* prefix
+#
+# The page spec (name, style, label, bind path per exposed tuplet) is cached per
+# effect and schema hash and diffed against what is already on the page, so a switch only adds,
+# removes or rebinds the parameters that differ. Invalidate() drops cached specs
+# (e.g. from an expose_params DAT Execute).
+#
+# With PREBUILD_ALL, prebuild_all() creates one FX_<effect> page per effect at
+# startup; rebuild() then just enables the active effect's page, disables the
+# others and sorts the active page first. Custom par names are unique per COMP and
+# effects cloned from Dots share names (Uidotsize, Uicolor, ...), so prebuilt pages
+# prefix every par with the effect (Fxdots + uidotsize -> Fxdotsuidotsize) and bind
+# each component to its source par by position rather than by name.
 
-EXPOSE_TABLE = 'expose_params'
-EXPOSE_PREFIXES = ('Ui','UI','ui')
+import re
+
+import fx_schema
+
+PAGE = 'FX_Active'
+PREBUILD_ALL = False
+
+_specs = {}     # fxCore path -> (schema hash, [(tuplet name, style, label, src path, src par names), ...])
 
 def _fxswitch():
     return op('/EfxSwitch')
@@ -14,43 +33,124 @@ def _active_fxcore():
     par = getattr(_fxswitch().par, 'Activeeffect', None)
     if not par or not par.eval():
         return None
-    eff = _fxswitch().op(par.eval())
+    eff = _fxswitch().op('effects/' + par.eval())
     return eff.op('fxCore') if eff else None
 
 def discover_params(core):
-    out = []
-    # 1) explicit table
-    tab = core.op(EXPOSE_TABLE)
-    if tab and tab.isDAT and tab.numRows > 0:
-        for r in tab.rows():
-            name = r[0].val.strip()
-            if not name: continue
-            p = getattr(core.par, name, None)
-            if p: out.append(p)
-        return out
-    # 2) implicit Ui* prefix
-    for p in core.customPars:
-        if any(p.name.startswith(pref) for pref in EXPOSE_PREFIXES):
-            out.append(p)
-    return out
+    return [getattr(core.par, n) for n in fx_schema.ExposedNames(core)]
+
+def page_spec(core):
+    """Cached [(tuplet name, style, label, src path, src par names)], one entry per tuplet."""
+    h = fx_schema.SchemaHash(core)
+    cached = _specs.get(core.path)
+    if cached is not None and cached[0] == h:
+        return cached[1]
+    spec = fx_schema.UiSpec(core)
+    if spec is None:
+        spec, seen = [], set()
+        for p in discover_params(core):
+            name = p.tupletName
+            if name in seen:
+                continue
+            seen.add(name)
+            spec.append((name, p.style, p.label or name, core.path, tuple(t.name for t in p.tuplet)))
+    _specs[core.path] = (h, spec)
+    return spec
+
+def Invalidate(core_path=None):
+    if core_path is None:
+        _specs.clear()
+    else:
+        _specs.pop(core_path, None)
+
+def _get_page(master, name, create=True):
+    for page in master.customPages:
+        if page.name == name:
+            return page
+    return master.appendCustomPage(name) if create else None
+
+def _prefix(fx):
+    """Par name prefix for an effect's prebuilt page: 'PoseEffect_Dots' -> 'Fxposeeffectdots'."""
+    return 'Fx' + re.sub(r'[^a-z0-9]', '', fx.name.lower())
+
+def _dst_name(prefix, name):
+    # TD custom par names: first letter upper case, the rest lower case / digits
+    return prefix + name.lower() if prefix else name
+
+def _bind(dst_tuplet, src_path, src_names):
+    """Bind each component to the source par at the same position; True if anything changed."""
+    changed = False
+    for dst, src_name in zip(dst_tuplet, src_names):
+        expr = f"op('{src_path}').par.{src_name}"
+        if dst.mode != ParMode.BIND or dst.bindExpr != expr:
+            changed = True
+            dst.mode = ParMode.BIND
+            dst.bindExpr = expr
+    return changed
+
+def sync_page(page, core, prefix=''):
+    """Diff the page against the effect's spec; touch only what changed."""
+    spec = page_spec(core)
+    want = {_dst_name(prefix, name): (style, label, src, names) for name, style, label, src, names in spec}
+    have = {}
+    for p in page.pars:
+        have.setdefault(p.tupletName, p.tuplet)
+
+    added = removed = rebound = 0
+    for name, tup in have.items():
+        if name not in want or tup[0].style != want[name][0]:
+            tup[0].destroy()
+            removed += 1
+    for name, (style, label, src, names) in want.items():
+        tup = have.get(name)
+        if tup is None or not tup[0].valid:
+            tup = page.appendPar(name, par=getattr(op(src).par, names[0]), label=label)
+            added += 1
+        elif tup[0].label != label:
+            tup[0].label = label
+        if _bind(tup, src, names):
+            rebound += 1
+    page.sort(*want)
+    return added, removed, rebound
+
+def _effects():
+    return _fxswitch().ext.PoseEfxSwitchExt.Effects()
+
+def prebuild_all():
+    """Build one FX_<effect> page per effect so switching only enables/disables pages."""
+    master = _fxswitch()
+    for fx in _effects():
+        core = fx.op('fxCore')
+        if core:
+            sync_page(_get_page(master, 'FX_' + fx.name), core, _prefix(fx))
+    debug(f'Prebuilt FX pages for {len(_effects())} effects')
+
+def _show_prebuilt(master, active_fx):
+    names = []
+    for fx in _effects():
+        page = _get_page(master, 'FX_' + fx.name, create=False)
+        if page is None:
+            continue
+        on = fx.path == active_fx.path
+        for p in page.pars:
+            if p.enable != on:
+                p.enable = on
+        names.append(page.name)
+    active = 'FX_' + active_fx.name
+    master.sortCustomPages(*([active] + [n for n in names if n != active]))
 
 def rebuild():
     master = _fxswitch()
     core = _active_fxcore()
-    if not core: 
+    if not core:
         debug('No active fxCore'); return
-    # delete old FX_Active page
-    for page in list(master.customPages):
-        if page.name == 'FX_Active':
-            master.deleteCustomPage(page)
-    pars = discover_params(core)
-    if not pars:
-        debug(f'No exposed params on {core.path}'); return
-    page = master.appendCustomPage('FX_Active')
-    for src in pars:
-        dst = page.append(src.style, src.name)
-        dst.label = src.label or src.name
-        dst.mode = ParMode.BIND
-        dst.bindExpr = f"op('{src.owner.path}').par.{src.name}"
-    debug(f'Built {len(pars)} controls from {core.path}')
-
+    if PREBUILD_ALL:
+        if _get_page(master, 'FX_' + core.parent().name, create=False) is None:
+            prebuild_all()
+        _show_prebuilt(master, core.parent())
+        return
+    if not page_spec(core):
+        debug(f'No exposed params on {core.path}')
+    page = _get_page(master, PAGE)
+    added, removed, rebound = sync_page(page, core)
+    debug(f'FX_Active from {core.path}: +{added} -{removed} rebound {rebound}')
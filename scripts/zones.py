@@ -0,0 +1,203 @@
+# scripts/zones.py
+# Spatial trigger zones: "hand enters the top-left box", "person stands on the mark".
+#
+# Zones come from data/zones.csv:
+#   name,space,shape,points,landmarks,enter_frames,exit_frames,margin
+#   top_left,uv,rect,0 0 0.3 0.3,wrist_l|wrist_r,2,5,0.02
+#   mark,px,poly,560 620; 720 620; 720 720; 560 720,ankle_l|ankle_r,5,10,0.03
+#
+#   space     uv (0..1, y down like pose_fanout) or px (converted with the image size)
+#   shape     rect (x0 y0 x1 y1) or poly (x y; x y; ...)
+#   landmarks '|' separated landmark names tested against this zone ('*' = all)
+#   enter/exit_frames  debounce: consecutive frames needed to enter / leave
+#   margin    hysteresis in UV: once inside, a person only leaves when all of the
+#             zone's landmarks are more than `margin` outside the polygon
+#
+# ZoneSet puts zone bounding boxes (grown by margin) into a uniform grid over UV.
+# Each frame every selected landmark of every person is binned into the grid, the
+# (point, zone) candidates are expanded with numpy and tested in one pass
+# (ray-casting point-in-polygon plus distance to the edges for the margin).
+# ZoneTracker applies hysteresis/debounce per (person, zone) and produces
+# enter/exit events and occupancy counts.
+# Put this in a Text DAT named 'zones' in /local/modules.
+
+import csv
+
+import numpy as np
+
+import pose_frame
+
+GRID = 16
+
+
+def load_zones(path, image_w=1280, image_h=720):
+    """Parse zones.csv into dicts with a UV polygon (V, 2)."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    zones = []
+    for r in rows:
+        r = {(k or '').strip().lower(): (v or '').strip() for k, v in r.items()}
+        if not r.get('name'):
+            continue
+        pts = [[float(v) for v in p.replace(',', ' ').split()] for p in r.get('points', '').split(';')]
+        flat = [v for p in pts for v in p]
+        if r.get('shape', 'rect').lower() == 'rect':
+            x0, y0, x1, y1 = flat[:4]
+            poly = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float64)
+        else:
+            poly = np.array(flat, dtype=np.float64).reshape(-1, 2)
+        if r.get('space', 'uv').lower() == 'px':
+            poly = poly / np.array([float(image_w), float(image_h)])
+        lms = [n.strip() for n in r.get('landmarks', '*').split('|') if n.strip()] or ['*']
+        zones.append({'name': r['name'], 'poly': poly, 'landmarks': lms,
+                      'enter': int(float(r.get('enter_frames') or 1)),
+                      'exit': int(float(r.get('exit_frames') or 1)),
+                      'margin': float(r.get('margin') or 0.0)})
+    return zones
+
+
+class ZoneSet:
+    """Zones compiled into padded vertex arrays and a uniform-grid index."""
+
+    def __init__(self, zones, grid=GRID):
+        self.zones = [z for z in zones if len(z['poly']) >= 3]
+        self.names = [z['name'] for z in self.zones]
+        self.grid = int(grid)
+        Z = len(self.zones)
+        V = max((len(z['poly']) for z in self.zones), default=3)
+        self.verts = np.zeros((Z, V, 2))
+        for i, z in enumerate(self.zones):
+            p = z['poly']
+            self.verts[i, :len(p)] = p
+            self.verts[i, len(p):] = p[-1]          # degenerate padding edges never cross
+        self.next = np.roll(self.verts, -1, axis=1)
+        for i, z in enumerate(self.zones):           # close each polygon on its own last vertex
+            n = len(z['poly'])
+            self.next[i, n - 1] = z['poly'][0]
+            self.next[i, n:] = z['poly'][-1]
+        self.margin = np.array([z['margin'] for z in self.zones])
+        self.enter = np.array([z['enter'] for z in self.zones], dtype=np.intp)
+        self.exit = np.array([z['exit'] for z in self.zones], dtype=np.intp)
+
+        # grid: cell -> zones whose (margin-grown) bbox overlaps it, as CSR arrays
+        G = self.grid
+        cells = [[] for _ in range(G * G)]
+        for i, z in enumerate(self.zones):
+            lo = np.clip(((z['poly'].min(0) - z['margin']) * G).astype(int), 0, G - 1)
+            hi = np.clip(((z['poly'].max(0) + z['margin']) * G).astype(int), 0, G - 1)
+            for cy in range(lo[1], hi[1] + 1):
+                for cx in range(lo[0], hi[0] + 1):
+                    cells[cy * G + cx].append(i)
+        self.cell_ptr = np.zeros(G * G + 1, dtype=np.intp)
+        self.cell_ptr[1:] = np.cumsum([len(c) for c in cells])
+        self.cell_zone = np.array([i for c in cells for i in c], dtype=np.intp)
+        self.layout_key = None
+
+    def compile(self, layout):
+        """Resolve landmark names; (Z, M) mask of which landmarks each zone tests."""
+        wanted = []
+        for z in self.zones:
+            for n in (layout.landmarks if '*' in z['landmarks'] else z['landmarks']):
+                if n in layout.index and n not in wanted and n not in pose_frame.VIRTUAL:
+                    wanted.append(n)
+        self.lm_names = wanted
+        self.lm_idx = layout.idx(wanted)
+        self.zone_lm = np.array([[('*' in z['landmarks']) or (n in z['landmarks']) for n in wanted]
+                                 for z in self.zones], dtype=bool).reshape(len(self.zones), len(wanted))
+        self.layout_key = layout.key
+
+    def test(self, layout, frame, min_visibility=0.5):
+        """(inside, near): (P, Z) bool; near = inside or within the zone margin."""
+        if self.layout_key != layout.key:
+            self.compile(layout)
+        P, Z, M = len(layout), len(self.zones), len(self.lm_idx)
+        inside = np.zeros((P, Z), dtype=bool)
+        near = np.zeros((P, Z), dtype=bool)
+        if not P or not Z or not M:
+            return inside, near
+
+        pts = frame[:, self.lm_idx, :2].reshape(-1, 2)
+        ok = pose_frame.valid(frame, min_visibility)[:, self.lm_idx].reshape(-1)
+        pid_row = np.repeat(np.arange(P), M)
+        lm_col = np.tile(np.arange(M), P)
+        G = self.grid
+        cxy = np.clip((np.nan_to_num(pts) * G).astype(np.intp), 0, G - 1)
+        cell = cxy[:, 1] * G + cxy[:, 0]
+        cnt = np.where(ok, self.cell_ptr[cell + 1] - self.cell_ptr[cell], 0)
+        total = int(cnt.sum())
+        if not total:
+            return inside, near
+
+        # expand (point, zone) candidates
+        pi = np.repeat(np.arange(len(pts)), cnt)
+        offs = np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        zi = self.cell_zone[np.repeat(self.cell_ptr[cell], cnt) + offs]
+        keep = self.zone_lm[zi, lm_col[pi]]
+        pi, zi = pi[keep], zi[keep]
+        if not len(pi):
+            return inside, near
+
+        p = pts[pi][:, None, :]                      # (C, 1, 2)
+        a, b = self.verts[zi], self.next[zi]         # (C, V, 2)
+        ay, by = a[..., 1], b[..., 1]
+        py = p[..., 1]
+        cross = (ay > py) != (by > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xint = (b[..., 0] - a[..., 0]) * (py - ay) / (by - ay) + a[..., 0]
+        hit = (cross & (p[..., 0] < xint)).sum(axis=1) % 2 == 1
+
+        ab = b - a
+        t = np.clip(((p - a) * ab).sum(-1) / np.maximum((ab * ab).sum(-1), 1e-12), 0.0, 1.0)
+        d = np.linalg.norm(a + ab * t[..., None] - p, axis=-1).min(axis=1)
+        close = hit | (d <= self.margin[zi])
+
+        rows = pid_row[pi]
+        np.logical_or.at(inside, (rows, zi), hit)
+        np.logical_or.at(near, (rows, zi), close)
+        return inside, near
+
+
+class ZoneTracker:
+    """Per (person, zone) hysteresis + debounce; rows follow layout pids across layout changes."""
+
+    def __init__(self, zoneset):
+        self.zs = zoneset
+        self.pids = []
+        Z = len(zoneset.zones)
+        self.state = np.zeros((0, Z), dtype=bool)
+        self.n_in = np.zeros((0, Z), dtype=np.intp)
+        self.n_out = np.zeros((0, Z), dtype=np.intp)
+
+    def _remap(self, pids):
+        """Carry state over for persons that stay; persons that left produce exit events."""
+        Z = len(self.zs.zones)
+        old = {pid: i for i, pid in enumerate(self.pids)}
+        state = np.zeros((len(pids), Z), dtype=bool)
+        n_in = np.zeros((len(pids), Z), dtype=np.intp)
+        n_out = np.zeros((len(pids), Z), dtype=np.intp)
+        for r, pid in enumerate(pids):
+            i = old.get(pid)
+            if i is not None:
+                state[r], n_in[r], n_out[r] = self.state[i], self.n_in[i], self.n_out[i]
+        gone = [(pid, self.zs.names[z], 'exit') for pid, i in old.items() if pid not in set(pids)
+                for z in np.flatnonzero(self.state[i])]
+        self.pids, self.state, self.n_in, self.n_out = list(pids), state, n_in, n_out
+        return gone
+
+    def update(self, layout, inside, near):
+        """Returns [(pid, zone name, 'enter'|'exit')] for this frame."""
+        events = self._remap(layout.pids) if layout.pids != self.pids else []
+        hit = np.where(self.state, near, inside)
+        self.n_in = np.where(hit, self.n_in + 1, 0)
+        self.n_out = np.where(hit, 0, self.n_out + 1)
+        enter = ~self.state & (self.n_in >= self.zs.enter[None])
+        leave = self.state & (self.n_out >= self.zs.exit[None])
+        self.state = (self.state | enter) & ~leave
+        for r, z in zip(*np.nonzero(enter)):
+            events.append((self.pids[r], self.zs.names[z], 'enter'))
+        for r, z in zip(*np.nonzero(leave)):
+            events.append((self.pids[r], self.zs.names[z], 'exit'))
+        return events
+
+    def occupancy(self):
+        return self.state.sum(axis=0)
@@ -0,0 +1,86 @@
+# scripts/zones_chop.py
+# Script CHOP 'zones' (next to pose_fanout).
+#   Input 0: pose CHOP with p{pid}_{landmark}_{x|y|z[|v]}, m_img_w/m_img_h
+#   Output : zone_{name} = number of persons inside, plus p{pid}_zone_{name} (0/1)
+# Events through osc_router.Emit:
+#   /pose2art/zone/<name>/enter <pid>
+#   /pose2art/zone/<name>/exit <pid>
+#   /pose2art/zone/<name>/inside <count>      (when the occupancy changes)
+#
+# Zones are read from data/zones.csv (see zones.py) and re-read when the file
+# changes on disk (checked at most every RELOAD_CHECK_S) or the image size changes
+# (pixel-space zones).
+
+import os
+import time
+
+import numpy as np
+
+import pose_frame
+import zones
+
+ZONES_CSV = 'data/zones.csv'
+NAMES_CSV = 'data/landmark_names.csv'
+ROUTER_DAT = '/ShowControlIO/osc_router'
+RELOAD_CHECK_S = 1.0
+
+_st = {}    # scriptOp path -> state
+
+def _data(rel):
+    return os.path.normpath(os.path.join(project.folder, rel))
+
+def _meta(src, name, default):
+    ch = src.chan(name)
+    return float(ch[0]) if ch is not None and ch[0] > 0 else default
+
+def _load(st, img):
+    path = _data(ZONES_CSV)
+    zs = zones.ZoneSet(zones.load_zones(path, *img))
+    st.update(zs=zs, tracker=zones.ZoneTracker(zs), img=img, occ=None,
+              sig=os.stat(path).st_mtime if os.path.isfile(path) else None)
+    debug(f"zones: {len(zs.names)} zones {zs.names}")
+
+def onCook(scriptOp):
+    src = scriptOp.inputs[0] if scriptOp.inputs else None
+    if src is None or src.numChans == 0:
+        scriptOp.clear()
+        return
+    st = _st.get(scriptOp.path)
+    img = (_meta(src, 'm_img_w', 1280.0), _meta(src, 'm_img_h', 720.0))
+    if st is None:
+        st = _st[scriptOp.path] = {'order': pose_frame.load_landmark_names(_data(NAMES_CSV)),
+                                   'layout': None, 'frame': None, 'checked': time.monotonic()}
+        _load(st, img)
+    now = time.monotonic()
+    if now - st['checked'] >= RELOAD_CHECK_S:
+        st['checked'] = now
+        path = _data(ZONES_CSV)
+        sig = os.stat(path).st_mtime if os.path.isfile(path) else None
+        if sig != st['sig'] or img != st['img']:
+            _load(st, img)
+
+    key = tuple(c.name for c in src.chans())
+    if st['layout'] is None or st['layout'].key != key:
+        st['layout'] = pose_frame.FrameLayout(key, st['order'])
+    layout, zs, tracker = st['layout'], st['zs'], st['tracker']
+
+    values = src.numpyArray()[:, -1].astype(float)
+    st['frame'] = frame = layout.pack(values, st['frame'])
+    inside, near = zs.test(layout, frame)
+    events = tracker.update(layout, inside, near)
+    occ = tracker.occupancy()
+
+    router = op(ROUTER_DAT)
+    if router:
+        for pid, name, kind in events:
+            router.module.Emit(f'/pose2art/zone/{name}/{kind}', pid)
+        if st['occ'] is not None and len(st['occ']) == len(occ):
+            for z in np.flatnonzero(occ != st['occ']):
+                router.module.Emit(f'/pose2art/zone/{zs.names[z]}/inside', int(occ[z]))
+    st['occ'] = occ
+
+    names = [f'zone_{n}' for n in zs.names]
+    names += [f'p{pid}_zone_{n}' for pid in tracker.pids for n in zs.names]
+    pose_frame.WriteChannels(scriptOp, names,
+                             np.concatenate([occ, tracker.state.ravel()]).astype(float))
+    return